@@ -11,11 +11,17 @@ PageConfig(layout="centered").get_config()
 import logging
 import os
 import streamlit as st
+from deps.admin import show_admin_panel
+from deps.common.metrics import start_metrics_server
+from deps.scheduler import start_scheduler
 from passphrase.utils import is_auth
 
 
 url_args = st.experimental_get_query_params()
 
+start_scheduler()
+start_metrics_server()
+
 
 def main() -> None:
     st.title("Stock analysis tools")
@@ -32,4 +38,7 @@ def main() -> None:
 
 if __name__ == "__main__":
     logging.info("%s running", os.path.basename(__file__))
-    is_auth(main, url_args)
+    if "admin" in url_args:
+        is_auth(show_admin_panel, url_args)
+    else:
+        is_auth(main, url_args)
@@ -0,0 +1,82 @@
+"""Benchmark of downsampling price series before charting.
+
+Compares the Vega-Lite spec of `stock_chart_trad_mult` drawn from every bar
+against the bars kept by `downsample_prices`, by spec size and time to build
+the spec JSON sent to the browser. Altair refuses to build specs over 5,000
+rows, shown as `-`.
+
+Run from the repository root:
+
+    python -m benchmarks.chart_downsampling
+"""
+
+import timeit
+from typing import Callable
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from deps.charts.chart_components import WIDTH, stock_chart_trad_mult
+from deps.charts.downsample import lttb_indices
+
+
+# Daily bars of 1, 10 and 40 years
+SIZES: list[int] = [252, 2_520, 10_080]
+
+
+def _fake_prices(size: int) -> pd.DataFrame:
+    """Columns of `yahoo.get_historic_prices` used by the price chart."""
+    rng = np.random.default_rng(size)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size)))
+    prices_df = pd.DataFrame(
+        {
+            "DateCloseET": pd.bdate_range(end="2024-01-02", periods=size, tz="EST"),
+            "Close": close,
+        }
+    )
+    prices_df["PercentChange"] = prices_df["Close"].pct_change()
+    return prices_df
+
+
+def _downsample(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """`downsample_prices` without the Streamlit cache."""
+    if len(prices_df) <= WIDTH:
+        return prices_df
+    x = pd.DatetimeIndex(prices_df["DateCloseET"]).asi8
+    return prices_df.iloc[lttb_indices(x, prices_df["Close"].to_numpy(), WIDTH)]
+
+
+def main() -> None:
+    print(
+        f"{'bars':>6} {'full spec':>10} {'downsampled':>12}"
+        + f" {'full':>9} {'downsampled':>12}"
+    )
+    for size in SIZES:
+        prices_df = _fake_prices(size)
+
+        full_size, full_seconds = _time_spec(lambda: prices_df)
+        small_size, small_seconds = _time_spec(lambda: _downsample(prices_df))
+        print(
+            f"{size:>6} {full_size:>10} {small_size:>12}"
+            + f" {full_seconds:>9} {small_seconds:>12}"
+        )
+
+
+def _time_spec(get_prices: Callable[[], pd.DataFrame]) -> tuple[str, str]:
+    """Size and fastest time of building the chart spec JSON."""
+    try:
+        spec: str = stock_chart_trad_mult(get_prices()).to_json()
+    except alt.MaxRowsError:
+        return "-", "-"
+
+    seconds: float = min(
+        timeit.repeat(
+            lambda: stock_chart_trad_mult(get_prices()).to_json(), number=1, repeat=5
+        )
+    )
+    return f"{len(spec) / 1000:.0f}kB", f"{seconds * 1000:.1f}ms"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Micro-benchmark of assembling Finnhub metrics onto the drops DataFrame.
+
+Compares appending one row at a time with `.loc[len(df)]` and a positional
+`concat` against building one metrics frame and joining on `symbol`.
+
+Run from the repository root:
+
+    python -m benchmarks.drop_enrichment
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from deps.common.utils import metrics_to_frame
+
+
+COLUMNS: list[str] = ["marketCap", "volume", "52WeekLow", "52WeekHigh"]
+SIZES: list[int] = [50, 500, 5_000]
+
+
+def _fake_drops(size: int) -> tuple[pd.DataFrame, list[tuple]]:
+    """Losers DataFrame and metric tuples shaped like the real providers."""
+    rng = np.random.default_rng(size)
+    symbols = [f"S{i:05d}" for i in range(size)]
+    drops_df = pd.DataFrame(
+        {
+            "symbol": symbols,
+            "name": symbols,
+            "changesPercentage": rng.uniform(-40, -10, size),
+            "price": rng.uniform(1, 500, size),
+        }
+    )
+    metrics = [tuple(row) for row in rng.uniform(1, 1_000, (size, len(COLUMNS)))]
+    return drops_df, metrics
+
+
+def row_append(drops_df: pd.DataFrame, metrics: list[tuple]) -> pd.DataFrame:
+    """Previous approach: grow a frame row by row then concat by position."""
+    intermediary_df = pd.DataFrame({column: [] for column in COLUMNS})
+    for row in metrics:
+        intermediary_df.loc[len(intermediary_df)] = list(row)
+    return pd.concat([drops_df, intermediary_df], axis=1)
+
+
+def columnar_join(drops_df: pd.DataFrame, metrics: list[tuple]) -> pd.DataFrame:
+    """Current approach: materialize once and join on `symbol`."""
+    metrics_df = metrics_to_frame(drops_df["symbol"], metrics, COLUMNS)
+    return drops_df.join(metrics_df, on="symbol")
+
+
+def main() -> None:
+    print(f"{'symbols':>8} {'row_append':>12} {'columnar_join':>14} {'speedup':>8}")
+    for size in SIZES:
+        drops_df, metrics = _fake_drops(size)
+        repeat = max(1, 500 // size)
+
+        row_seconds = min(
+            timeit.repeat(lambda: row_append(drops_df, metrics), number=1, repeat=repeat)
+        )
+        join_seconds = min(
+            timeit.repeat(
+                lambda: columnar_join(drops_df, metrics), number=1, repeat=repeat * 5
+            )
+        )
+        print(
+            f"{size:>8} {row_seconds * 1000:>10.1f}ms {join_seconds * 1000:>12.1f}ms"
+            + f" {row_seconds / join_seconds:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark of screening drops over the whole market price matrix.
+
+Times `compute_market_screen` over a matrix of every listed company, done
+once per matrix refresh, and `filter_drops` for a few Top drops settings,
+done per page view. Neither calls a provider.
+
+Run from the repository root:
+
+    python -m benchmarks.drop_screen
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.standin import SECTORS, TICKER_COUNT, get_symbol
+from deps.price_matrix import FIELDS, compute_market_screen, filter_drops
+
+
+BARS: int = 280
+
+SETTINGS: list[tuple[float, str, str]] = [
+    (0.10, "", ""),
+    (0.10, "Technology", ""),
+    (0.05, "Healthcare", "Industry 1"),
+    (0.02, "", "Industry 7"),
+]
+
+
+def _fake_matrix() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Matrix and company data shaped like the stand-in's listed companies."""
+    rng = np.random.default_rng(0)
+    symbols: list[str] = [get_symbol(i) for i in range(TICKER_COUNT)]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (BARS, TICKER_COUNT)), axis=0))
+    # Wider moves on the last day so every setting finds drops
+    close[-1] = close[-2] * np.exp(rng.normal(0, 0.08, TICKER_COUNT))
+    values: dict[str, np.ndarray] = {
+        "Close": close,
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Volume": rng.integers(1e5, 1e7, (BARS, TICKER_COUNT)).astype(float),
+    }
+    matrix_df = pd.concat(
+        {
+            field: pd.DataFrame(
+                values[field],
+                index=pd.bdate_range(end="2024-01-02", periods=BARS, tz="EST"),
+                columns=symbols,
+            )
+            for field in FIELDS
+        },
+        axis=1,
+    )
+
+    static_df = pd.DataFrame(
+        {
+            "name": [f"Company {symbol}" for symbol in symbols],
+            "type": "stock",
+            "sector": [SECTORS[i % len(SECTORS)] for i in range(TICKER_COUNT)],
+            "industry": [f"Industry {i % 40}" for i in range(TICKER_COUNT)],
+            "website": "",
+        },
+        index=pd.Index(symbols, name="symbol"),
+    ).astype({"type": "category", "sector": "category", "industry": "category"})
+    return matrix_df, static_df
+
+
+def main() -> None:
+    matrix_df, static_df = _fake_matrix()
+
+    screen_seconds: float = min(
+        timeit.repeat(
+            lambda: compute_market_screen(matrix_df, static_df), number=1, repeat=5
+        )
+    )
+    print(f"Screen of {TICKER_COUNT} symbols: {screen_seconds * 1000:.1f}ms")
+
+    screen_df = compute_market_screen(matrix_df, static_df)
+    print(f"{'drop':>5} {'sector':>12} {'industry':>11} {'rows':>5} {'time':>8}")
+    for drop_percent, sector, industry in SETTINGS:
+        seconds: float = min(
+            timeit.repeat(
+                lambda: filter_drops(screen_df, drop_percent, sector, industry),
+                number=10,
+                repeat=5,
+            )
+        )
+        rows: int = len(filter_drops(screen_df, drop_percent, sector, industry))
+        print(
+            f"{drop_percent:>5.0%} {sector or '-':>12} {industry or '-':>11}"
+            + f" {rows:>5} {seconds * 100:>6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark of drawing 52 week range bars on the drops table.
+
+Compares one `Styler.bar` call per row against `range_bar_css` applied to
+the whole column, including rendering with `Styler.to_html`.
+
+Run from the repository root:
+
+    python -m benchmarks.drop_table_styling
+"""
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from deps.common.styles import range_bar_css
+
+
+SIZES: list[int] = [50, 1_000]
+
+
+def _fake_table(size: int) -> pd.DataFrame:
+    """Formatted drops table columns used by the range bar."""
+    rng = np.random.default_rng(size)
+    low = rng.uniform(1, 100, size)
+    high = low + rng.uniform(1, 100, size)
+    return pd.DataFrame(
+        {
+            "Symbol": [f"S{i:05d}" for i in range(size)],
+            "52WeekLow": low,
+            "ClosingPrice": rng.uniform(low, high),
+            "52WeekHigh": high,
+        }
+    )
+
+
+def per_row_bar(df: pd.DataFrame) -> str:
+    """Previous approach: one styling pass per row."""
+    df_styler = df.style
+    for rowIdx, (low, high) in enumerate(zip(df["52WeekLow"], df["52WeekHigh"])):
+        df_styler = df_styler.bar(
+            subset=pd.IndexSlice[rowIdx, "ClosingPrice"],
+            color="purple",
+            vmin=low,
+            vmax=high,
+        )
+    return df_styler.to_html()
+
+
+def vectorized_bar(df: pd.DataFrame) -> str:
+    """Current approach: one styling pass for the column."""
+    return df.style.apply(
+        range_bar_css,
+        subset=["ClosingPrice"],
+        low=df["52WeekLow"],
+        high=df["52WeekHigh"],
+        color="purple",
+    ).to_html()
+
+
+def main() -> None:
+    print(f"{'rows':>6} {'per_row_bar':>12} {'vectorized_bar':>15} {'speedup':>8}")
+    for size in SIZES:
+        df = _fake_table(size)
+        repeat = 5 if size < 500 else 1
+
+        loop_seconds = min(
+            timeit.repeat(lambda: per_row_bar(df), number=1, repeat=repeat)
+        )
+        vector_seconds = min(
+            timeit.repeat(lambda: vectorized_bar(df), number=1, repeat=5)
+        )
+        print(
+            f"{size:>6} {loop_seconds * 1000:>10.1f}ms {vector_seconds * 1000:>13.1f}ms"
+            + f" {loop_seconds / vector_seconds:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark of technical indicators computed from earlier results.
+
+Times `compute_indicators` with every indicator of `DEFAULT_INDICATORS` over
+10 years of daily closes for a first computation, after one new bar, and
+again with no new bar. Speedup is how many times faster a new bar is than
+a first computation.
+
+Run from the repository root:
+
+    python -m benchmarks.indicators
+"""
+
+import timeit
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from deps.indicators import DEFAULT_INDICATORS, clear_indicators, compute_indicators
+
+
+# Symbols computed at once
+SIZES: list[int] = [1, 100, 1_000]
+
+BARS: int = 2_520
+
+
+def _fake_closes(symbols: int) -> pd.DataFrame:
+    rng = np.random.default_rng(symbols)
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (BARS, symbols)), axis=0)),
+        index=pd.bdate_range(end="2024-01-02", periods=BARS, tz="EST"),
+        columns=[f"S{column}" for column in range(symbols)],
+    )
+
+
+def main() -> None:
+    print(
+        f"{'symbols':>7} {'first':>9} {'new bar':>9} {'no new bar':>11}"
+        + f" {'speedup':>8}"
+    )
+    for size in SIZES:
+        closes_df = _fake_closes(size)
+
+        def compute() -> None:
+            compute_indicators(closes_df, DEFAULT_INDICATORS)
+
+        def without_last_bar() -> None:
+            clear_indicators()
+            compute_indicators(closes_df.iloc[:-1], DEFAULT_INDICATORS)
+
+        first: float = _best(compute, setup=clear_indicators)
+        new_bar: float = _best(compute, setup=without_last_bar)
+        same: float = _best(compute, setup=compute)
+        print(
+            f"{size:>7} {first * 1000:>7.1f}ms {new_bar * 1000:>7.1f}ms"
+            + f" {same * 1000:>9.1f}ms {first / new_bar:>7.1f}x"
+        )
+
+
+def _best(func: Callable[[], None], setup: Callable[[], None]) -> float:
+    """Fastest of 5 calls, each after `setup`."""
+    return min(timeit.repeat(func, setup=setup, number=1, repeat=5))
+
+
+if __name__ == "__main__":
+    main()
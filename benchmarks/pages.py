@@ -0,0 +1,216 @@
+"""End-to-end benchmark of the Top drops and Stock symbol pages.
+
+Each page runs in Streamlit's testing harness with every provider served by
+`benchmarks.standin`. A scenario runs in a fresh process so its first run is
+cold: empty Streamlit caches, local data directory and connection pools. The
+runs after it are warm. Provider rate limits are lifted so timings measure
+this app and the injected latency only.
+
+Run from the repository root:
+
+    python -m benchmarks.pages --latency-ms 50 --output baseline.json
+    python -m benchmarks.pages --latency-ms 50 --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from streamlit.testing.v1 import AppTest
+import yfinance as yf
+
+from benchmarks.standin import StandInServer, get_symbol
+
+
+PASSPHRASE: str = "standin"
+SYMBOL: str = get_symbol(5)
+TIMEOUT_SECONDS: int = 300
+
+
+def _run_top_drops(app: AppTest) -> None:
+    """Top drops table as shown on page load."""
+    app.run()
+
+
+def _run_stock_symbol(app: AppTest) -> None:
+    """Price chart, competitors and insider tables of one symbol."""
+    if not app.text_input:
+        app.query_params["p"] = PASSPHRASE
+        app.run()
+
+    app.text_input[0].input(SYMBOL)
+    app.button[0].click()
+    app.run()
+
+
+def _run_compare(app: AppTest) -> None:
+    """One year of 20 symbols on the comparison chart."""
+    if not app.text_input:
+        app.query_params["p"] = PASSPHRASE
+        app.run()
+
+    app.text_input[1].input(", ".join(get_symbol(i) for i in range(20)))
+    app.button[1].click()
+    app.run()
+
+
+SCENARIOS: dict[str, tuple[str, Callable[[AppTest], None]]] = {
+    "top_drops": ("pages/3_🔻_Top_drops.py", _run_top_drops),
+    "stock_symbol": ("pages/2_📈_Stock_symbol.py", _run_stock_symbol),
+    "compare": ("pages/2_📈_Stock_symbol.py", _run_compare),
+}
+
+
+def run_scenario(name: str, latency_ms: float, runs: int) -> dict:
+    """Time one page in this process.
+
+    Args:
+        name: Key of `SCENARIOS`.
+        latency_ms: Delay of every stand-in response.
+        runs: Number of timed runs including the cold first run.
+
+    Returns:
+        Seconds of the cold run, median seconds of the warm runs and number
+        of requests the stand-in served during the cold run.
+    """
+    page, run_page = SCENARIOS[name]
+    server: StandInServer = StandInServer(latency_ms / 1000).start()
+    data_dir: str = tempfile.mkdtemp(prefix="benchmark-")
+
+    # Keep the stand-in's cookie out of the user's yfinance cache
+    yf.set_tz_cache_location(data_dir)
+    yf.cache._CookieDBManager.set_location(data_dir)
+
+    app = AppTest.from_file(page, default_timeout=TIMEOUT_SECONDS)
+    app.secrets["api_config"] = {
+        "timeout_seconds": 30,
+        "data_dir": data_dir,
+        "base_urls": server.base_urls,
+        "rate_limits": {"finnhub": 1e6, "fmp": 1e6, "yahoo": 1e6},
+    }
+    app.secrets["finnhub"] = {"apikey": PASSPHRASE}
+    app.secrets["financial_model_prep"] = {"apikey": PASSPHRASE}
+    app.secrets["passphrases"] = {"p": [PASSPHRASE]}
+    app.secrets["scheduler"] = {"enabled": False}
+
+    seconds: list[float] = []
+    cold_requests: int = 0
+    for run in range(runs):
+        start_time: float = time.perf_counter()
+        run_page(app)
+        seconds.append(time.perf_counter() - start_time)
+
+        if app.exception:
+            raise RuntimeError(f"{name} failed: {app.exception[0].message}")
+        if app.error:
+            raise RuntimeError(f"{name} showed error: {app.error[0].value}")
+        if run == 0:
+            cold_requests = server.request_count
+
+    server.stop()
+
+    return {
+        "coldSeconds": round(seconds[0], 3),
+        "warmSeconds": round(statistics.median(seconds[1:]), 3) if runs > 1 else None,
+        "coldRequests": cold_requests,
+    }
+
+
+def run_all(latency_ms: float, runs: int) -> dict:
+    """Run every scenario in its own process and collect the results."""
+    scenarios: dict[str, dict] = {}
+    for name in SCENARIOS:
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.pages",
+                "--scenario",
+                name,
+                f"--latency-ms={latency_ms}",
+                f"--runs={runs}",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode:
+            sys.stderr.write(process.stderr[-2000:])
+            raise RuntimeError(f"Scenario {name} exited with {process.returncode}")
+        scenarios[name] = json.loads(process.stdout.strip().splitlines()[-1])
+
+    return {
+        "latencyMs": latency_ms,
+        "runs": runs,
+        "python": platform.python_version(),
+        "scenarios": scenarios,
+    }
+
+
+def print_results(results: dict, baseline: dict | None = None) -> None:
+    """Table of timings, with change from a baseline if given."""
+    print(f"{'scenario':<14} {'cold':>8} {'warm':>8} {'requests':>9}", end="")
+    print(f" {'cold vs base':>13} {'warm vs base':>13}" if baseline else "")
+
+    for name, result in results["scenarios"].items():
+        warm = result["warmSeconds"]
+        print(
+            f"{name:<14} {result['coldSeconds']:>7.2f}s"
+            + (f" {warm:>7.2f}s" if warm is not None else f" {'-':>8}")
+            + f" {result['coldRequests']:>9}",
+            end="",
+        )
+
+        base: dict | None = (baseline or {}).get("scenarios", {}).get(name)
+        if not base:
+            print()
+            continue
+        print(
+            f" {_change(result['coldSeconds'], base['coldSeconds']):>13}"
+            + f" {_change(warm, base['warmSeconds']):>13}"
+        )
+
+
+def _change(seconds: float | None, base_seconds: float | None) -> str:
+    if not seconds or not base_seconds:
+        return "-"
+    return f"{(seconds / base_seconds - 1) * 100:+.0f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args.latency_ms, args.runs)))
+        return
+
+    results: dict = run_all(args.latency_ms, args.runs)
+
+    baseline: dict | None = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("latencyMs") != args.latency_ms:
+            print(f"Baseline was run with {baseline.get('latencyMs')}ms latency")
+
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+"""Local stand-in for every provider endpoint used by `deps`.
+
+Serves generated payloads shaped like the Finnhub, FinancialModelingPrep,
+Yahoo Finance, GitHub and Stock Watcher responses so pages can be timed
+without the network. Each request is delayed by a fixed latency.
+
+Requests arrive as `/<original host>/<original path>` through
+`api_config.base_urls`, see `StandInServer.base_urls`.
+"""
+
+from datetime import date, datetime, timedelta
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+# Hosts called by `deps` and yfinance
+HOSTS: list[str] = [
+    "finnhub.io",
+    "financialmodelingprep.com",
+    "raw.githubusercontent.com",
+    "house-stock-watcher-data.s3-us-west-2.amazonaws.com",
+    "senate-stock-watcher-data.s3-us-west-2.amazonaws.com",
+    "fc.yahoo.com",
+    "query1.finance.yahoo.com",
+    "query2.finance.yahoo.com",
+]
+
+SECTORS: list[str] = [
+    "Technology",
+    "Healthcare",
+    "Financial Services",
+    "Energy",
+    "Consumer Cyclical",
+]
+
+# Sizes close to the real datasets
+TICKER_COUNT: int = 6_000
+LOSER_COUNT: int = 60
+HOUSE_TRADE_COUNT: int = 20_000
+SENATE_TICKER_COUNT: int = 2_000
+PEER_COUNT: int = 8
+
+
+def get_symbol(index: int) -> str:
+    """Letters only symbol such as 'QAAF' as accepted by the stock form."""
+    letters: str = ""
+    for _ in range(3):
+        index, letter = divmod(index, 26)
+        letters = chr(ord("A") + letter) + letters
+    return "Q" + letters
+
+
+class Fixtures:
+    def __init__(self, seed: int = 0) -> None:
+        """Deterministic payloads for every stand-in endpoint.
+
+        Args:
+            seed: Seed of generated prices and trades.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.symbols: list[str] = [get_symbol(i) for i in range(TICKER_COUNT)]
+        self.today: date = datetime.now().date()
+        self._static: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, host: str, path: str, query: dict[str, list[str]]
+    ) -> tuple[int, bytes, str]:
+        """Status, body and content type of a request."""
+        parts: list[str] = path.strip("/").split("/")
+
+        if host == "finnhub.io":
+            symbol: str = query.get("symbol", [""])[0]
+            if path.endswith("/stock/metric"):
+                return self._json(self.finnhub_metric(symbol))
+            if path.endswith("/stock/earnings"):
+                return self._json(self.finnhub_earnings(symbol))
+            if path.endswith("/stock/peers"):
+                return self._json(self.finnhub_peers(symbol))
+            if path.endswith("/calendar/earnings"):
+                return self._json(
+                    self.finnhub_earnings_calendar(
+                        date.fromisoformat(query["from"][0]),
+                        date.fromisoformat(query["to"][0]),
+                    )
+                )
+
+        elif host == "financialmodelingprep.com":
+            if path.endswith("/stock_market/losers"):
+                return self._cached(path, lambda: self._encode(self.fmp_losers()))
+            if "earnings-surprises" in parts or "income-statement" in parts:
+                return self._json([])
+
+        elif host == "raw.githubusercontent.com" and path.endswith("us_tickers.csv"):
+            return self._cached(path, self.us_tickers_csv, "text/csv")
+
+        elif host.startswith("house-stock-watcher"):
+            return self._cached(path, lambda: self._encode(self.house_trades()))
+
+        elif host.startswith("senate-stock-watcher"):
+            return self._cached(path, lambda: self._encode(self.senate_trades()))
+
+        elif host == "fc.yahoo.com":
+            return 200, b"", "text/html"
+
+        elif host.endswith("finance.yahoo.com"):
+            if path.endswith("/getcrumb"):
+                return 200, b"standin-crumb", "text/plain"
+            if "chart" in parts:
+                return self._json(self.yahoo_chart(parts[-1], query))
+            if "quoteSummary" in parts:
+                return self._json(self.yahoo_quote_summary(parts[-1]))
+            if "timeseries" in parts:
+                return self._json({"timeseries": {"result": [{}], "error": None}})
+            if path.endswith("/finance/quote"):
+                return self._json(self.yahoo_quote(query.get("symbols", [""])[0]))
+
+        return 404, b"{}", "application/json"
+
+    def _json(self, payload) -> tuple[int, bytes, str]:
+        return 200, self._encode(payload), "application/json"
+
+    @staticmethod
+    def _encode(payload) -> bytes:
+        return json.dumps(payload).encode()
+
+    def _cached(
+        self, key: str, build, content_type: str = "application/json"
+    ) -> tuple[int, bytes, str]:
+        """Large datasets are built once per server."""
+        with self._lock:
+            if key not in self._static:
+                self._static[key] = build()
+        return 200, self._static[key], content_type
+
+    def get_etag(self, body: bytes) -> str | None:
+        """ETag of a dataset so snapshots can be revalidated."""
+        with self._lock:
+            is_static: bool = any(body is static for static in self._static.values())
+        return f'"{zlib.crc32(body):08x}"' if is_static else None
+
+    @staticmethod
+    def _symbol_rng(symbol: str) -> np.random.Generator:
+        return np.random.default_rng(zlib.crc32(symbol.encode()))
+
+    def us_tickers_csv(self) -> bytes:
+        return pd.DataFrame(
+            {
+                "symbol": self.symbols,
+                "name": [f"Company {symbol}" for symbol in self.symbols],
+                "type": "stock",
+                "sector": [SECTORS[i % len(SECTORS)] for i in range(TICKER_COUNT)],
+                "industry": [f"Industry {i % 40}" for i in range(TICKER_COUNT)],
+                "website": [
+                    f"https://{symbol.lower()}.example.com" for symbol in self.symbols
+                ],
+            }
+        ).to_csv(index=False).encode()
+
+    def fmp_losers(self) -> list[dict]:
+        # Every fifth symbol is Technology, the default Top drops sector
+        return [
+            {
+                "symbol": self.symbols[i * 5],
+                "name": f"Company {self.symbols[i * 5]}",
+                "change": -float(self.rng.uniform(1, 20)),
+                "price": float(self.rng.uniform(5, 300)),
+                "changesPercentage": -float(self.rng.uniform(10, 40)),
+            }
+            for i in range(LOSER_COUNT)
+        ]
+
+    def finnhub_metric(self, symbol: str) -> dict:
+        rng = self._symbol_rng(symbol)
+        low: float = float(rng.uniform(5, 200))
+        return {
+            "metric": {
+                "marketCapitalization": float(rng.uniform(1e2, 1e6)),
+                "3MonthAverageTradingVolume": float(rng.uniform(1e3, 1e7)),
+                "52WeekLow": low,
+                "52WeekHigh": low * float(rng.uniform(1.1, 3)),
+            },
+            "symbol": symbol,
+        }
+
+    def finnhub_earnings(self, symbol: str) -> list[dict]:
+        rng = self._symbol_rng(symbol)
+        earnings: list[dict] = []
+        for quarter_ago in range(4):
+            period: date = self.today - timedelta(days=91 * quarter_ago + 30)
+            estimate: float = float(rng.uniform(0.1, 3))
+            actual: float = estimate * float(rng.uniform(0.8, 1.2))
+            earnings.append(
+                {
+                    "actual": actual,
+                    "estimate": estimate,
+                    "period": period.isoformat(),
+                    "quarter": (period.month - 1) // 3 + 1,
+                    "surprise": actual - estimate,
+                    "surprisePercent": (actual - estimate) / estimate * 100,
+                    "symbol": symbol,
+                    "year": period.year,
+                }
+            )
+        return earnings
+
+    def finnhub_earnings_calendar(self, start: date, end: date) -> dict:
+        """Every symbol reports every 91 days on a day of its own."""
+        reports: list[dict] = []
+        for symbol in self.symbols:
+            offset: int = zlib.crc32(symbol.encode()) % 91
+            day: date = start + timedelta(days=(offset - start.toordinal()) % 91)
+            while day <= end:
+                seed: int = zlib.crc32(f"{symbol}{day}".encode())
+                estimate: float = 0.1 + seed % 300 / 100
+                reported: bool = day < self.today
+                reports.append(
+                    {
+                        "date": day.isoformat(),
+                        "epsActual": (
+                            estimate * (0.8 + (seed >> 8) % 40 / 100)
+                            if reported
+                            else None
+                        ),
+                        "epsEstimate": estimate,
+                        "hour": ["bmo", "amc"][seed % 2],
+                        "quarter": (day.month - 1) // 3 + 1,
+                        "revenueActual": None,
+                        "revenueEstimate": None,
+                        "symbol": symbol,
+                        "year": day.year,
+                    }
+                )
+                day += timedelta(days=91)
+        return {"earningsCalendar": reports}
+
+    def finnhub_peers(self, symbol: str) -> list[str]:
+        index: int = self.symbols.index(symbol) if symbol in self.symbols else 0
+        return [symbol] + self.symbols[index + 1 : index + PEER_COUNT]
+
+    def house_trades(self) -> list[dict]:
+        dates: list[date] = [
+            self.today - timedelta(days=int(days_ago))
+            for days_ago in self.rng.integers(0, 1500, HOUSE_TRADE_COUNT)
+        ]
+        return [
+            {
+                "disclosure_year": day.year,
+                "disclosure_date": (day + timedelta(days=20)).strftime("%m/%d/%Y"),
+                "transaction_date": day.isoformat(),
+                "owner": ["self", "joint", "spouse"][i % 3],
+                "ticker": self.symbols[int(i * 7919 % 500)],
+                "asset_description": "Common stock",
+                "type": ["purchase", "sale_full", "sale_partial"][i % 3],
+                "amount": "$1,001 - $15,000",
+                "representative": f"Hon. Member {i % 435}",
+                "district": f"CA{i % 50:02d}",
+                "state": "CA",
+                "ptr_link": "https://example.com/ptr",
+                "cap_gains_over_200_usd": False,
+                "industry": None,
+                "sector": SECTORS[i % len(SECTORS)],
+                "party": ["Democrat", "Republican"][i % 2],
+            }
+            for i, day in enumerate(dates)
+        ]
+
+    def senate_trades(self) -> list[dict]:
+        aggregates: list[dict] = []
+        for i in range(SENATE_TICKER_COUNT):
+            symbol: str = get_symbol(i if i < 500 else TICKER_COUNT + i)
+            transactions: list[dict] = []
+            for j in range(5):
+                day: date = self.today - timedelta(days=(i * 37 + j * 101) % 1500)
+                transactions.append(
+                    {
+                        "transaction_date": day.strftime("%m/%d/%Y"),
+                        "owner": "Self",
+                        "ticker": symbol,
+                        "asset_description": "Common stock",
+                        "asset_type": "Stock",
+                        "type": ["Purchase", "Sale"][j % 2],
+                        "amount": "$15,001 - $50,000",
+                        "comment": "--",
+                        "party": ["Democrat", "Republican"][i % 2],
+                        "state": "VA",
+                        "industry": "Tech",
+                        "sector": SECTORS[i % len(SECTORS)],
+                        "senator": f"Sen. Member {i % 100}",
+                        "ptr_link": "https://example.com/ptr",
+                        "disclosure_date": (day + timedelta(days=20)).strftime(
+                            "%m/%d/%Y"
+                        ),
+                    }
+                )
+            aggregates.append({"ticker": symbol, "transactions": transactions})
+        return aggregates
+
+    def yahoo_chart(self, symbol: str, query: dict[str, list[str]]) -> dict:
+        end: datetime = datetime.now()
+        start: datetime = end - timedelta(days=5)
+        if "period1" in query:
+            start = datetime.fromtimestamp(int(query["period1"][0]))
+        if "period2" in query:
+            end = min(end, datetime.fromtimestamp(int(query["period2"][0])))
+
+        days = pd.bdate_range(start.date(), end.date())
+        # Daily bars are stamped at the market open
+        timestamps: list[int] = [
+            int(day.timestamp())
+            for day in (days + pd.Timedelta(hours=9, minutes=30)).tz_localize(
+                "America/New_York"
+            )
+        ]
+        rng = self._symbol_rng(symbol)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days))))
+        quote = {
+            "open": (close * 0.995).round(4).tolist(),
+            "high": (close * 1.01).round(4).tolist(),
+            "low": (close * 0.99).round(4).tolist(),
+            "close": close.round(4).tolist(),
+            "volume": rng.integers(1e5, 1e7, len(days)).tolist(),
+        }
+
+        return {
+            "chart": {
+                "result": [
+                    {
+                        "meta": {
+                            "currency": "USD",
+                            "symbol": symbol,
+                            "exchangeName": "NMS",
+                            "instrumentType": "EQUITY",
+                            "firstTradeDate": 345479400,
+                            "regularMarketTime": int(end.timestamp()),
+                            "gmtoffset": -14400,
+                            "timezone": "EDT",
+                            "exchangeTimezoneName": "America/New_York",
+                            "regularMarketPrice": float(close[-1]) if days.size else 0,
+                            "chartPreviousClose": float(close[0]) if days.size else 0,
+                            "priceHint": 2,
+                            "dataGranularity": "1d",
+                            "range": "",
+                            "validRanges": ["1d", "5d", "1mo", "1y", "max"],
+                        },
+                        "timestamp": timestamps,
+                        "indicators": {
+                            "quote": [quote],
+                            "adjclose": [{"adjclose": quote["close"]}],
+                        },
+                    }
+                ],
+                "error": None,
+            }
+        }
+
+    def yahoo_quote_summary(self, symbol: str) -> dict:
+        rng = self._symbol_rng(symbol)
+        index: int = self.symbols.index(symbol) if symbol in self.symbols else 0
+        low: float = float(rng.uniform(5, 200))
+        return {
+            "quoteSummary": {
+                "result": [
+                    {
+                        "assetProfile": {
+                            "address1": "1 Main Street",
+                            "city": "Springfield",
+                            "state": "CA",
+                            "country": "United States",
+                            "website": f"https://{symbol.lower()}.example.com",
+                            "industry": f"Industry {index % 40}",
+                            "sector": SECTORS[index % len(SECTORS)],
+                            "longBusinessSummary": f"Company {symbol} makes things.",
+                            "fullTimeEmployees": int(rng.integers(100, 100_000)),
+                        },
+                        "summaryDetail": {
+                            "previousClose": _raw(low * 1.5),
+                            "trailingPE": _raw(rng.uniform(5, 60)),
+                            "dividendYield": _raw(rng.uniform(0, 0.05)),
+                            "marketCap": _raw(rng.uniform(1e8, 1e12)),
+                            "fiftyTwoWeekLow": _raw(low),
+                            "fiftyTwoWeekHigh": _raw(low * 2),
+                            "priceToSalesTrailing12Months": _raw(rng.uniform(1, 20)),
+                        },
+                        "financialData": {
+                            "recommendationKey": "buy",
+                            "totalCash": _raw(rng.uniform(1e7, 1e11)),
+                            "totalCashPerShare": _raw(rng.uniform(1, 50)),
+                            "debtToEquity": _raw(rng.uniform(0, 200)),
+                            "totalRevenue": _raw(rng.uniform(1e8, 1e11)),
+                            "operatingCashflow": _raw(rng.uniform(1e7, 1e10)),
+                            "profitMargins": _raw(rng.uniform(-0.2, 0.4)),
+                        },
+                        "defaultKeyStatistics": {
+                            "sharesShort": _raw(rng.uniform(1e5, 1e8)),
+                            "sharesOutstanding": _raw(rng.uniform(1e7, 1e10)),
+                        },
+                        "quoteType": {
+                            "symbol": symbol,
+                            "shortName": f"Company {symbol}",
+                            "longName": f"Company {symbol} Inc.",
+                            "quoteType": "EQUITY",
+                        },
+                    }
+                ],
+                "error": None,
+            }
+        }
+
+    def yahoo_quote(self, symbol: str) -> dict:
+        return {
+            "quoteResponse": {
+                "result": [
+                    {
+                        "symbol": symbol,
+                        "shortName": f"Company {symbol}",
+                        "longName": f"Company {symbol} Inc.",
+                    }
+                ],
+                "error": None,
+            }
+        }
+
+
+def _raw(value: float) -> dict:
+    """Yahoo quote summary number."""
+    return {"raw": round(float(value), 4), "fmt": ""}
+
+
+class StandInServer:
+    def __init__(self, latency_seconds: float = 0.0, seed: int = 0) -> None:
+        """Stand-in provider server on a free local port.
+
+        Args:
+            latency_seconds: Delay added to every response.
+            seed: Seed of generated fixtures.
+        """
+        self.latency_seconds = latency_seconds
+        self.fixtures = Fixtures(seed)
+        self.request_count: int = 0
+        self._count_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._create_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_urls(self) -> dict[str, str]:
+        """`api_config.base_urls` routing every provider host here."""
+        port: int = self._server.server_address[1]
+        return {host: f"http://127.0.0.1:{port}/{host}" for host in HOSTS}
+
+    def start(self) -> "StandInServer":
+        threading.Thread(
+            target=self._server.serve_forever, name="standin", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                with server._count_lock:
+                    server.request_count += 1
+                time.sleep(server.latency_seconds)
+
+                parts = urlsplit(self.path)
+                host, _, path = parts.path.lstrip("/").partition("/")
+                status, body, content_type = server.fixtures.get(
+                    host, f"/{path}", parse_qs(parts.query)
+                )
+
+                headers: dict[str, str] = {"Content-Type": content_type}
+                etag: str | None = server.fixtures.get_etag(body)
+                if etag:
+                    headers["ETag"] = etag
+                    if self.headers.get("If-None-Match") == etag:
+                        status, body = 304, b""
+                if host == "fc.yahoo.com":
+                    headers["Set-Cookie"] = "A3=standin; Path=/"
+                if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = _gzip(body)
+                    headers["Content-Encoding"] = "gzip"
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                """Silence the default log line per request."""
+
+        return Handler
+
+
+def _gzip(body: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=1) as gzip_file:
+        gzip_file.write(body)
+    return buffer.getvalue()
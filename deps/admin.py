@@ -0,0 +1,39 @@
+"""Admin panel of provider call metrics.
+
+Not listed in the sidebar. Open the home page with `?admin` and a valid
+passphrase such as `/?admin&p=...`.
+"""
+
+import streamlit as st
+
+from deps.common.metrics import get_cache_stats, get_call_stats, to_prometheus_text
+from deps.common.rate_limit import get_rate_governor_stats
+
+
+def show_admin_panel() -> None:
+    """Render latency, errors and cache counts of this process."""
+    st.title("Provider metrics")
+    st.write(
+        "Counts since this server process started. Scrape `/metrics` on the "
+        + "port set in `metrics.port` of secrets for the same data."
+    )
+
+    st.write("### Provider calls")
+    st.dataframe(get_call_stats(), hide_index=True)
+
+    st.write("### Cache")
+    cache_df = get_cache_stats()
+    st.write(
+        f"About {cache_df['megabytes'].sum():.1f} MB held by cached functions "
+        + "and in-memory stores. "
+        + "Set `max_megabytes` under `[cache]` in secrets to bound it."
+    )
+    st.dataframe(cache_df, hide_index=True)
+
+    st.write("### Rate limits")
+    st.dataframe(get_rate_governor_stats(), hide_index=True)
+
+    prometheus_text: str = to_prometheus_text()
+    with st.expander("Prometheus text"):
+        st.code(prometheus_text, language="text")
+    st.download_button("Download metrics", prometheus_text, file_name="metrics.txt")
@@ -33,6 +33,3 @@ def add_to_outlook_calendar() -> str:
     # TODO:
     # https://github.com/InteractionDesignFoundation/add-event-to-calendar-docs/blob/main/services/outlook-web.md
     return ""
-
-
-print(add_to_google_calendar("GOOGL", datetime.now()))
@@ -7,7 +7,13 @@ import pandas as pd
 WIDTH = 2100
 
 
-def stock_chart_trad_mult(symbol_data: pd.DataFrame, title: str = "") -> alt.Chart:
+def stock_chart_trad_mult(
+    symbol_data: pd.DataFrame,
+    title: str = "",
+    y_column: str = "Close",
+    y_title: str = "Close price",
+    y_format: str = "",
+) -> alt.Chart:
     """Show multi-line graph for a many stock symbols.
 
     Column names must match the source data from Yahoo Finance historical prices.
@@ -22,20 +28,31 @@ def stock_chart_trad_mult(symbol_data: pd.DataFrame, title: str = "") -> alt.Cha
       symbol_data: DataFrame with Close, DateCloseET, Symbol, Name,
       Percent Change.
       title: Optional chart title header.
+      y_column: Column drawn as lines such as `ChangeSinceStart` to compare
+      symbols with different prices.
+      y_title: Title of the y axis.
+      y_format: d3 format of `y_column` on the axis and in tooltips such as
+      `.2%`. Altair's default if empty.
 
     Returns:
       Altair graph.
     """
     x_axis = alt.X("DateCloseET:T", axis=alt.Axis(labelAngle=-50))
     y_axis = alt.Y(
-        "Close",
+        y_column,
         scale=alt.Scale(
-            domain=[symbol_data["Close"].min(), symbol_data["Close"].max()]
+            domain=[symbol_data[y_column].min(), symbol_data[y_column].max()]
         ),
-        title="Close price",
+        title=y_title,
+        axis=alt.Axis(format=y_format) if y_format else alt.Axis(),
     )
 
-    color = alt.Color("Name:N", legend=None)
+    # Legend only tells lines apart when there is more than one
+    many_names: bool = "Name" in symbol_data and symbol_data["Name"].nunique() > 1
+    color = alt.Color(
+        "Name:N",
+        legend=alt.Legend(orient="top", title=None) if many_names else None,
+    )
     selection = alt.selection_multi(
         fields=["DateCloseET"],
         nearest=True,
@@ -54,6 +71,12 @@ def stock_chart_trad_mult(symbol_data: pd.DataFrame, title: str = "") -> alt.Cha
         alt.Tooltip("DateCloseET:T"),
         alt.Tooltip("Close", format="$.2f"),
     ]
+    if y_column != "Close":
+        tooltip.append(
+            alt.Tooltip(y_column, format=y_format)
+            if y_format
+            else alt.Tooltip(y_column)
+        )
 
     change_chart = (
         alt.Chart(symbol_data)
@@ -83,6 +106,58 @@ def stock_chart_trad_mult(symbol_data: pd.DataFrame, title: str = "") -> alt.Cha
     return alt.layer(change_chart, horizontal_marker)
 
 
+def indicator_chart(
+    prices_df: pd.DataFrame,
+    labels: list[str],
+    y_title: str = "",
+    y_format: str = "",
+) -> alt.Chart:
+    """Show lines of technical indicators of a price history.
+
+    Layer on `stock_chart_trad_mult` for indicators in prices such as moving
+    averages, or show on its own for others such as RSI.
+
+    Args:
+      prices_df: Price history with DateCloseET and a column per indicator.
+      labels: Indicator columns to draw.
+      y_title: Title of the y axis.
+      y_format: d3 format of values on the axis and in tooltips.
+
+    Returns:
+      Altair graph.
+    """
+    indicators_df: pd.DataFrame = prices_df.melt(
+        id_vars=["DateCloseET"],
+        value_vars=labels,
+        var_name="Indicator",
+        value_name="Value",
+    ).dropna(subset=["Value"])
+
+    return (
+        alt.Chart(indicators_df)
+        .mark_line(strokeWidth=1, clip=True)
+        .encode(
+            x=alt.X("DateCloseET:T", axis=alt.Axis(labelAngle=-50)),
+            y=alt.Y(
+                "Value:Q",
+                scale=alt.Scale(zero=False),
+                title=y_title,
+                axis=alt.Axis(format=y_format) if y_format else alt.Axis(),
+            ),
+            color=alt.Color(
+                "Indicator:N", legend=alt.Legend(orient="top", title=None)
+            ),
+            tooltip=[
+                alt.Tooltip("Indicator:N"),
+                alt.Tooltip("DateCloseET:T"),
+                alt.Tooltip("Value:Q", format=y_format)
+                if y_format
+                else alt.Tooltip("Value:Q"),
+            ],
+        )
+    )
+
+
 def competitor_ratio_charts(ratio_df: pd.DataFrame, base_symbol: str) -> alt.Chart:
     """Return Altair chart comparing financial ratios.
 
@@ -1,20 +1,38 @@
 """Charts."""
 
+from datetime import date, datetime, timedelta
 import logging
+from typing import NamedTuple
+
 import altair as alt
 import pandas as pd
 from deps.finnhub import get_company_competitors, get_finnhub_earnings_surprises
 import streamlit as st
 
 from deps.charts.chart_components import (
+    WIDTH,
     competitor_ratio_charts,
     earnings_beat_chart,
+    indicator_chart,
     stock_chart_trad_mult,
 )
-from deps.yahoo import (
-    get_company_yahoo,
-    get_historic_prices,
+from deps.calendar import add_to_google_calendar
+from deps.common.concurrency import call_concurrently
+from deps.charts.downsample import downsample_prices
+from deps.earnings_calendar import get_next_earnings_dates
+from deps.indicators import (
+    INDICATOR_KINDS,
+    Indicator,
+    IndicatorKind,
+    get_indicators,
 )
+from deps.peer_group import PeerGroupMatrix, get_peer_group_matrix
+from deps.providers import get_company_info
+from deps.yahoo import get_comparison_prices, get_historic_prices
+
+
+# Altair refuses to chart more rows than this
+MAX_CHART_ROWS: int = 5000
 
 
 def days_ago_input(days_ago_text: str) -> int:
@@ -39,20 +57,104 @@ def days_ago_input(days_ago_text: str) -> int:
     return days
 
 
-def show_historical_chart(symbol: str, days_ago: int) -> None:
-    """Render company historical price charts with earnings results."""
-    info_df = get_company_yahoo(symbol)
-    historic_prices_df: pd.DataFrame = get_historic_prices(symbol, days_ago)
+class HistoricalChartData(NamedTuple):
+    """Data of the historical price chart of one company.
+
+    Attributes:
+        info_df: Company info with one row.
+        prices_df: Price history joined with columns of `indicators`.
+        earnings_beat_df: Estimated and actual earnings of past quarters.
+        next_earnings_call_date: Estimated date of the next earnings call or
+            NaT.
+        indicators: Technical indicators found in `prices_df`.
+    """
+
+    info_df: pd.DataFrame
+    prices_df: pd.DataFrame
+    earnings_beat_df: pd.DataFrame
+    next_earnings_call_date: pd.Timestamp
+    indicators: list[Indicator]
+
+
+def get_historical_chart_data(
+    symbol: str, days_ago: int, indicators: list[Indicator] | None = None
+) -> HistoricalChartData:
+    """Fetch company info, prices, indicators and earnings at the same time.
 
-    # Earnings graph looks awkward where last earnings call was recent and the
-    # next earnings call is in ~90 days.  Remove the earnings graph completely
-    # if days duration selection is too low.
-    earnings_beat_df: pd.DataFrame = get_finnhub_earnings_surprises(
-        symbol,
-        days_ago=days_ago,
-    )  # Get last x quarters
+    Indicators and the next earnings date are left out if they fail, rather
+    than failing the whole chart.
+
+    Args:
+        symbol: Company stock symbol.
+        days_ago: Range of stock history prior to today.
+        indicators: Technical indicators to compute.
+    """
+    indicators = indicators or []
+    start: date = datetime.now().date() - timedelta(days=days_ago)
+    info_df, historic_prices_df, indicators_df, earnings_beat_df, next_dates = (
+        call_concurrently(
+            lambda: get_company_info(symbol),
+            lambda: get_historic_prices(symbol, days_ago),
+            lambda: _get_optional_indicators(symbol, indicators, start),
+            # Earnings graph looks awkward where last earnings call was recent
+            # and the next earnings call is in ~90 days.  Remove the earnings
+            # graph completely if days duration selection is too low.
+            lambda: get_finnhub_earnings_surprises(symbol, days_ago=days_ago),
+            # Looked up in the local earnings calendar rather than calling a
+            # provider which stalled the page:
+            # https://github.com/xcollantes/stock-analysis-frontend/issues/40
+            lambda: _get_optional_next_earnings_date(symbol),
+        )
+    )
+
+    if symbol in indicators_df:
+        historic_prices_df = historic_prices_df.join(indicators_df[symbol])
+    else:
+        indicators = []
+
+    return HistoricalChartData(
+        info_df=info_df,
+        prices_df=historic_prices_df,
+        earnings_beat_df=earnings_beat_df,
+        next_earnings_call_date=next_dates.iloc[0],
+        indicators=indicators,
+    )
 
-    a_row = info_df.loc[0]
+
+def _get_optional_indicators(
+    symbol: str, indicators: list[Indicator], start: date
+) -> pd.DataFrame:
+    """Indicators of one company, or empty if they failed."""
+    try:
+        return get_indicators([symbol], indicators, start)
+    except Exception as e:
+        logging.error("Failed indicators of %s: %s", symbol, e)
+        return pd.DataFrame()
+
+
+def _get_optional_next_earnings_date(symbol: str) -> pd.Series:
+    """Next earnings date of one company, NaT if the lookup failed."""
+    try:
+        return get_next_earnings_dates([symbol])
+    except Exception as e:
+        logging.error("Failed next earnings date of %s: %s", symbol, e)
+        return pd.Series([pd.NaT], index=[symbol])
+
+
+def show_historical_chart(symbol: str, data: HistoricalChartData) -> None:
+    """Render company historical price charts with earnings results.
+
+    Technical indicators in prices such as moving averages are drawn on the
+    price chart, others in a chart of their own below it.
+
+    Args:
+        symbol: Company stock symbol.
+        data: From `get_historical_chart_data`.
+    """
+    indicators: list[Indicator] = data.indicators
+    chart_prices_df: pd.DataFrame = downsample_prices(data.prices_df)
+
+    a_row = data.info_df.loc[0]
     st.header(f"{a_row.get('longName', '')} ({symbol})")
 
     with st.expander("Company info"):
@@ -82,116 +184,118 @@ def show_historical_chart(symbol: str, days_ago: int) -> None:
     """
         )
 
+    price_chart: alt.Chart = stock_chart_trad_mult(chart_prices_df)
+    price_labels: list[str] = [
+        indicator.label
+        for indicator in indicators
+        if INDICATOR_KINDS[indicator.kind].price_scale
+    ]
+    if price_labels:
+        price_chart = alt.layer(
+            price_chart, indicator_chart(chart_prices_df, price_labels)
+        )
+
     st.altair_chart(
         alt.layer(
-            stock_chart_trad_mult(historic_prices_df),
-            earnings_beat_chart(earnings_beat_df, symbol),
+            price_chart,
+            earnings_beat_chart(data.earnings_beat_df, symbol),
         ).resolve_scale(y="independent"),
         use_container_width=True,
     )
 
-    # Turned off feature due to stalling:
-    # https://github.com/xcollantes/stock-analysis-frontend/issues/40
-    #
-    # Assuming Yahoo Finance returns next earnings as first row
+    for indicator in indicators:
+        kind: IndicatorKind = INDICATOR_KINDS[indicator.kind]
+        if not kind.price_scale:
+            st.altair_chart(
+                indicator_chart(
+                    chart_prices_df,
+                    [indicator.label],
+                    y_title=indicator.label,
+                    y_format=kind.y_format,
+                ).properties(height=150),
+                use_container_width=True,
+            )
 
-    # next_earnings_call_date: datetime = earnings_beat_df.loc[0, "Date"]
-    # st.write(
-    #     f"**{next_earnings_call_date.strftime('%a, %d %b %Y')}** is the next earnings call estimated date "
-    #     + f"in {(datetime.today().date() - datetime.date(next_earnings_call_date)).days * -1} days "
-    #     + f"[[Add to Google Calendar]({add_to_google_calendar(symbol, next_earnings_call_date)})]"
-    # )
+    next_earnings_call_date: pd.Timestamp = data.next_earnings_call_date
+    if pd.notna(next_earnings_call_date):
+        st.write(
+            f"**{next_earnings_call_date.strftime('%a, %d %b %Y')}** is the next earnings call estimated date "
+            + f"in {(next_earnings_call_date.date() - date.today()).days} days "
+            + f"[[Add to Google Calendar]({add_to_google_calendar(symbol, next_earnings_call_date)})]"
+        )
 
 
-def show_financial_metrics_competitors_chart(symbol: str) -> None:
-    """Render graphs of company against competitors.
+def show_comparison_chart(symbols: list[str], days_ago: int) -> None:
+    """Render change in price of many companies since the first day.
+
+    Args:
+        symbols: Company stock symbols.
+        days_ago: Range of stock history prior to today.
+    """
+    prices_df: pd.DataFrame = get_comparison_prices(tuple(symbols), days_ago)
+    if prices_df.empty:
+        st.warning("No price history found")
+        return
+
+    missing: list[str] = sorted(set(symbols) - set(prices_df["Name"]))
+    if missing:
+        st.warning(f"No price history found for {', '.join(missing)}")
+
+    # Fewer points per line the more lines there are to stay under the limit
+    max_points: int = min(WIDTH, MAX_CHART_ROWS // len(symbols))
+    st.altair_chart(
+        stock_chart_trad_mult(
+            downsample_prices(
+                prices_df,
+                max_points=max_points,
+                y_column="ChangeSinceStart",
+                series_column="Name",
+            ),
+            y_column="ChangeSinceStart",
+            y_title="Change since start",
+            y_format=".2%",
+        ),
+        use_container_width=True,
+    )
+
+
+def get_competitors_matrix(symbol: str) -> PeerGroupMatrix:
+    """Fundamentals of a company and its competitors.
 
     Args:
         symbol: Company stock symbol.
     """
     comp_series: pd.Series = get_company_competitors(symbol)
 
-    show_combined_df: pd.DataFrame = pd.DataFrame()
-    desired_columns_show_combined = [
-        "symbol",
-        "shortName",
-        "trailingPE",
-        "recommendationKey",
-        "industry",
-        "sector",
-        "longBusinessSummary",
-        "fullTimeEmployees",
-        "totalCash",
-        "fiftyTwoWeekLow",
-        "previousClose",
-        "fiftyTwoWeekHigh",
-        "dividendYield",
-        "marketCap",
-    ]
+    # Sorted set so every company with the same peers shares one matrix
+    return get_peer_group_matrix(tuple(sorted(set(comp_series.dropna()))))
 
-    combined_df: pd.DataFrame = pd.DataFrame()
-    desired_columns_combined = [
-        "symbol",
-        "shortName",
-        "trailingPE",
-        "priceToSalesTrailing12Months",
-        "profitMargins",
-        "debtToEquity",
-        "totalRevenue",
-        "totalCashPerShare",
-        "operatingCashflow",
-        "totalCash",
-        "sharesShort",
-        "sharesOutstanding",
-    ]
 
-    for comp_symbol in comp_series:
-        comp_df: pd.DataFrame = get_company_yahoo(comp_symbol)
-        # comp_df = get_company_metrics_fmp(comp_symbol)  # Alternate
-
-        # Fields change according to the data source
-        try:
-            show_combined_df = pd.concat(
-                [
-                    show_combined_df,
-                    comp_df.loc[
-                        :,
-                        comp_df.columns.isin(desired_columns_show_combined),
-                    ],
-                ],
-                axis=0,
-                ignore_index=True,
-            )
-        except KeyError as ke:
-            logging.warn("Could not find field for %s: %s", comp_symbol, ke)
+def show_competitors(symbol: str, peer_matrix: PeerGroupMatrix) -> None:
+    """Render competitor benchmarks with their heading.
 
-        # Reorder since `concat` may not have preserved column order.
-        show_combined_df = show_combined_df.reindex(
-            columns=desired_columns_show_combined
-        )
+    Args:
+        symbol: Company stock symbol.
+        peer_matrix: From `get_competitors_matrix`.
+    """
+    st.write("### Competitor benchmarks")
+    st.write(
+        "If a company fundamentals outperform competitors, this would be a signal of an opportunity."
+    )
+    show_financial_metrics_competitors_chart(symbol, peer_matrix)
 
-        # Fields change according to the data source
-        #
-        # NOTE: Yahoo Finance API may use a different symbol such as input
-        # 'GOOG' (Class C share with no voting rights) will output 'GOOGL'
-        # (Class A share with voting rights).
-        try:
-            combined_df = pd.concat(
-                [
-                    combined_df,
-                    comp_df.loc[
-                        :,
-                        comp_df.columns.isin(desired_columns_combined),
-                    ],
-                ],
-                axis=0,
-                ignore_index=True,
-            )
-        except KeyError as ke:
-            logging.warn("Could not get metrics for %s: %s: %s", comp_symbol, ke, ke)
 
+def show_financial_metrics_competitors_chart(
+    symbol: str, peer_matrix: PeerGroupMatrix
+) -> None:
+    """Render graphs of company against competitors.
+
+    Args:
+        symbol: Company stock symbol.
+        peer_matrix: From `get_competitors_matrix`.
+    """
     st.write(
-        show_combined_df.style.format(
+        peer_matrix.overview_df.style.format(
             formatter={
                 "trailingPE": "{:,.2f}",
                 "totalCash": "${:,.0f}",
@@ -206,9 +310,4 @@ def show_financial_metrics_competitors_chart(symbol: str) -> None:
         )
     )
 
-    # Transform chart
-    transformed_combined_df = pd.melt(
-        combined_df, id_vars=["symbol", "shortName"], var_name="metric"
-    )
-
-    st.altair_chart(competitor_ratio_charts(transformed_combined_df, symbol))
+    st.altair_chart(competitor_ratio_charts(peer_matrix.metrics_df, symbol))
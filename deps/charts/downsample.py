@@ -0,0 +1,114 @@
+"""Fewer points of a price series that draw the same line.
+
+Charts are at most `WIDTH` pixels wide so more points than pixels only add
+to the chart spec sent to the browser. Largest-Triangle-Three-Buckets keeps
+the first and last points and, from each bucket of points in between, the
+point making the largest triangle with the point kept before it and the
+average of the next bucket, which keeps peaks and troughs.
+"""
+
+import numpy as np
+import pandas as pd
+
+from deps.charts.chart_components import WIDTH
+from deps.common.metrics import tracked_cache_data
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Positions of points kept by Largest-Triangle-Three-Buckets.
+
+    Buckets are chosen one after another since each depends on the point
+    kept before it; the points within a bucket are compared at once.
+
+    Args:
+        x: Increasing x values such as timestamps as numbers.
+        y: Values of the same length as `x`.
+        max_points: Number of points to keep, at least 3.
+
+    Returns:
+        Sorted positions into `x` and `y`. All positions if there are no more
+        than `max_points` points.
+    """
+    size: int = len(x)
+    if size <= max_points or max_points < 3:
+        return np.arange(size)
+
+    x = x.astype(float)
+    y = y.astype(float)
+
+    # Bucket i spans [edges[i], edges[i + 1]) over points between the first and last
+    edges: np.ndarray = (
+        np.floor(np.linspace(0, size - 2, max_points - 1)).astype(int) + 1
+    )
+    edges[-1] = size - 1
+
+    # Average of each bucket, then the last point as the bucket after the last
+    x_sums: np.ndarray = np.add.reduceat(x[: size - 1], edges[:-1])
+    y_sums: np.ndarray = np.add.reduceat(y[: size - 1], edges[:-1])
+    counts: np.ndarray = np.diff(edges)
+    next_x: np.ndarray = np.append(x_sums[1:] / counts[1:], x[-1])
+    next_y: np.ndarray = np.append(y_sums[1:] / counts[1:], y[-1])
+
+    kept: np.ndarray = np.empty(max_points, dtype=int)
+    kept[0] = 0
+    kept[-1] = size - 1
+    previous: int = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle areas, the same order as the areas
+        areas: np.ndarray = np.abs(
+            (x[previous] - next_x[bucket]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y[bucket] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    return kept
+
+
+@tracked_cache_data(ttl="1h", max_entries=128, show_spinner=False)
+def downsample_prices(
+    prices_df: pd.DataFrame,
+    max_points: int = WIDTH,
+    x_column: str = "DateCloseET",
+    y_column: str = "Close",
+    series_column: str | None = None,
+) -> pd.DataFrame:
+    """Rows of price series keeping the shape of their lines.
+
+    Args:
+        prices_df: Series sorted by `x_column` such as from
+            `yahoo.get_historic_prices`.
+        max_points: Rows to keep per series, such as the chart width in
+            pixels.
+        x_column: Dates of the series.
+        y_column: Values drawn as the line.
+        series_column: Column naming the series of each row such as `Name`
+            if there is more than one series.
+
+    Returns:
+        Series with no more than `max_points` rows unchanged, others cut to
+        at most `max_points` of their rows with every column.
+    """
+    if series_column and not prices_df.empty:
+        return pd.concat(
+            [
+                _downsample_series(series_df, max_points, x_column, y_column)
+                for _, series_df in prices_df.groupby(series_column, sort=False)
+            ],
+            ignore_index=True,
+        )
+    return _downsample_series(prices_df, max_points, x_column, y_column)
+
+
+def _downsample_series(
+    prices_df: pd.DataFrame, max_points: int, x_column: str, y_column: str
+) -> pd.DataFrame:
+    if len(prices_df) <= max_points:
+        return prices_df
+
+    series_df: pd.DataFrame = prices_df.dropna(subset=[y_column])
+    x: np.ndarray = pd.DatetimeIndex(series_df[x_column]).asi8
+    return series_df.iloc[
+        lttb_indices(x, series_df[y_column].to_numpy(), max_points)
+    ]
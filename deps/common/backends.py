@@ -0,0 +1,233 @@
+"""Where provider requests are answered from.
+
+Set `api_config.backend` in secrets to one of:
+    live: Call providers over the network. Default.
+    record: Call providers and save every response in the responses
+        directory.
+    local: Answer every request from files in the responses directory
+        without any network calls, such as a recording or a hand made
+        dataset for a demo.
+
+Responses are stored as `<responses_dir>/<host>/<path>` with the query,
+without API keys, appended after `@`. A request with no exact match is
+answered with the latest response recorded for the same path.
+"""
+
+import glob
+from http.cookies import SimpleCookie
+import json
+import logging
+import mimetypes
+from pathlib import Path
+import threading
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import cookiejar_from_dict
+from requests.structures import CaseInsensitiveDict
+import streamlit as st
+
+
+BACKENDS: list[str] = ["live", "record", "local"]
+
+# Query parameters never stored in file names
+SECRET_PARAMS: set[str] = {"apikey", "token", "crumb"}
+
+# Response headers kept with a recording
+RECORDED_HEADERS: list[str] = ["Content-Type", "ETag", "Last-Modified", "Set-Cookie"]
+
+_write_lock = threading.Lock()
+
+
+def get_backend() -> str:
+    """Backend set in `st.secrets.api_config.backend`."""
+    backend: str = st.secrets.api_config.get("backend", "live")
+    if backend not in BACKENDS:
+        raise ValueError(f"api_config.backend must be one of {BACKENDS}: {backend}")
+    return backend
+
+
+def is_offline() -> bool:
+    """Whether requests are answered without calling providers."""
+    return get_backend() == "local"
+
+
+def get_responses_dir() -> Path:
+    """Directory of recorded responses set in `api_config.responses_dir`."""
+    api_config = st.secrets.api_config
+    return Path(
+        api_config.get(
+            "responses_dir", Path(api_config.get("data_dir", ".data")) / "responses"
+        )
+    )
+
+
+def get_response_path(responses_dir: Path, url: str) -> Path:
+    """File of a request's response.
+
+    Args:
+        responses_dir: Root of recorded responses.
+        url: Full URL including query string.
+    """
+    parts = urlsplit(url)
+    params: list[tuple[str, str]] = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query)
+        if key.lower() not in SECRET_PARAMS
+    )
+
+    name: str = parts.path.strip("/") or "index"
+    if params:
+        name += "@" + quote(urlencode(params), safe="=&,")
+
+    return responses_dir / parts.netloc / name
+
+
+def create_adapter(
+    pool_connections: int, pool_maxsize: int, base_urls: dict[str, str]
+) -> BaseAdapter:
+    """Adapter of a provider session for the backend set in secrets.
+
+    Args:
+        pool_connections: Hosts the session calls, each kept in its own
+            connection pool.
+        pool_maxsize: Connections kept open to each host when calling it.
+        base_urls: Base URL that requests for a host are sent to instead as
+            in `api_config.base_urls`.
+    """
+    backend: str = get_backend()
+    if backend == "local":
+        return LocalDirectoryAdapter(get_responses_dir())
+    if backend == "record":
+        return RecordingAdapter(
+            get_responses_dir(),
+            base_urls,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(
+        self, responses_dir: Path, base_urls: dict[str, str], **kwargs
+    ) -> None:
+        """HTTP adapter saving every successful response.
+
+        Args:
+            responses_dir: Root of recorded responses.
+            base_urls: Base URL by host. Responses from a base URL are saved
+                under the host so they replay without the same base URLs.
+            kwargs: Passed to `HTTPAdapter` such as `pool_maxsize`.
+        """
+        super().__init__(**kwargs)
+        self.responses_dir = responses_dir
+        self.base_urls = base_urls
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response: requests.Response = super().send(request, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        path: Path = get_response_path(
+            self.responses_dir, self._get_provider_url(request.url)
+        )
+        headers: dict[str, str] = {
+            name: response.headers[name]
+            for name in RECORDED_HEADERS
+            if name in response.headers
+        }
+
+        with _write_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(response.content)
+            _get_headers_path(path).write_text(json.dumps(headers))
+
+        return response
+
+    def _get_provider_url(self, url: str) -> str:
+        """URL as requested before it was sent to a base URL."""
+        for host, base_url in self.base_urls.items():
+            base_url = base_url.rstrip("/")
+            if url == base_url or url.startswith((base_url + "/", base_url + "?")):
+                return f"https://{host}{url[len(base_url):]}"
+        return url
+
+
+class LocalDirectoryAdapter(BaseAdapter):
+    def __init__(self, responses_dir: Path) -> None:
+        """Adapter answering requests from files without network calls.
+
+        Args:
+            responses_dir: Root of recorded responses.
+        """
+        super().__init__()
+        self.responses_dir = responses_dir
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = None
+
+        path: Path | None = self._find(
+            get_response_path(self.responses_dir, request.url)
+        )
+        if path is None:
+            logging.warning("No local response for %s", urlsplit(request.url).path)
+            response.status_code = 404
+            response.reason = "Not in local directory"
+            response._content = b""
+            return response
+
+        headers_path: Path = _get_headers_path(path)
+        headers: dict[str, str] = (
+            json.loads(headers_path.read_text()) if headers_path.exists() else {}
+        )
+        headers.setdefault(
+            "Content-Type", mimetypes.guess_type(path.name)[0] or "application/json"
+        )
+
+        response.headers = CaseInsensitiveDict(headers)
+        if "Set-Cookie" in headers:
+            cookie = SimpleCookie(headers["Set-Cookie"])
+            response.cookies = cookiejar_from_dict(
+                {name: morsel.value for name, morsel in cookie.items()}
+            )
+
+        etag: str | None = headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = path.read_bytes()
+
+        return response
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _find(path: Path) -> Path | None:
+        """Exact response, else the latest response for the same URL path."""
+        if path.is_file():
+            return path
+
+        name: str = path.name.split("@")[0]
+        candidates: list[Path] = [
+            candidate
+            for candidate in [
+                path.with_name(name),
+                *path.parent.glob(f"{glob.escape(name)}@*"),
+            ]
+            if candidate.is_file() and not candidate.name.endswith(".headers.json")
+        ]
+        return max(
+            candidates, key=lambda candidate: candidate.stat().st_mtime, default=None
+        )
+
+
+def _get_headers_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.headers.json")
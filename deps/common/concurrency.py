@@ -0,0 +1,228 @@
+"""Run blocking provider calls concurrently.
+
+Data shared by sessions and threads, such as HTTP sessions, rate governors
+and local datasets, is module state guarded by a lock rather than
+`st.cache_resource`. Streamlit caches neither read nor write values on
+threads without a script run context, like the scheduler in
+`deps/scheduler.py` and background snapshot refreshes, so those threads
+would not share what pages see.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+import logging
+import threading
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner.script_run_context import (
+    SCRIPT_RUN_CONTEXT_ATTR_NAME,
+)
+
+
+DEFAULT_MAX_WORKERS: int = 8
+
+
+class Section(NamedTuple):
+    """Part of a page whose data loads at the same time as other parts.
+
+    Attributes:
+        name: Shown while the section loads and in logs.
+        load: Fetches the data of the section. Runs in a worker thread so it
+            must not draw anything besides cache spinners.
+        show: Draws the section from the data returned by `load`.
+    """
+
+    name: str
+    load: Callable[[], Any]
+    show: Callable[[Any], None]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def get_max_workers() -> int:
+    """Concurrency limit for provider calls set in `st.secrets.api_config`."""
+    return int(st.secrets.api_config.get("max_workers", DEFAULT_MAX_WORKERS))
+
+
+def _create_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Thread pool whose workers share the caller's Streamlit script context.
+
+    Without the context, cached functions called from workers cannot show
+    their spinners and Streamlit logs a missing `ScriptRunContext` warning.
+    """
+    ctx = get_script_run_ctx()
+
+    def attach_ctx() -> None:
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="provider",
+        initializer=attach_ctx,
+    )
+
+
+def map_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int | None = None,
+    default: Any = None,
+    timeout: float | None = None,
+) -> list[Any]:
+    """Call `func` on every item with at most `max_workers` calls in flight.
+
+    Args:
+        func: Blocking function taking one item, usually a provider call.
+        items: Inputs such as stock symbols.
+        max_workers: Concurrency limit. Defaults to `get_max_workers()`.
+        default: Result used for an item whose call raised an exception or
+            did not finish in time.
+        timeout: Seconds to wait for all calls. Calls still running keep
+            running in the background, detached from the page's script run
+            context, and their results are discarded.
+
+    Returns:
+        Results in the same order as `items`. A failure for one item is
+        logged and replaced by `default` without affecting the others.
+    """
+    items = list(items)
+    results: list[Any] = [default] * len(items)
+
+    for index, result in iter_bounded(func, items, max_workers, default, timeout):
+        results[index] = result
+
+    return results
+
+
+def iter_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int | None = None,
+    default: Any = None,
+    timeout: float | None = None,
+) -> Iterator[tuple[int, Any]]:
+    """Call `func` on every item and yield each result as soon as it is ready.
+
+    Same as `map_bounded` but lets the caller show results while slower
+    calls are still running.
+
+    Args:
+        func: Blocking function taking one item, usually a provider call.
+        items: Inputs such as stock symbols.
+        max_workers: Concurrency limit. Defaults to `get_max_workers()`.
+        default: Result yielded for an item whose call raised an exception.
+        timeout: Seconds to wait for all calls. Items still running are
+            logged and not yielded. Their calls cannot be stopped and keep
+            running in the background, detached from the page's script run
+            context so they no longer write to it.
+
+    Yields:
+        Position of the item in `items` and its result, in completion order.
+    """
+    items = list(items)
+    if not items:
+        return
+
+    workers: int = min(max_workers or get_max_workers(), len(items))
+
+    # Worker thread of each started call, to detach calls outliving the wait
+    threads: dict[int, threading.Thread] = {}
+
+    def call(index: int) -> Any:
+        threads[index] = threading.current_thread()
+        return func(items[index])
+
+    executor: ThreadPoolExecutor = _create_executor(workers)
+    futures = {executor.submit(call, index): index for index in range(len(items))}
+
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            index: int = futures[future]
+            try:
+                result: Any = future.result()
+            except Exception as e:
+                logging.error("Failed %s for %s: %s", func.__name__, items[index], e)
+                result = default
+            yield index, result
+    except TimeoutError:
+        for future, index in futures.items():
+            if not future.done():
+                logging.warning(
+                    "Timed out %s for %s after %ss",
+                    func.__name__,
+                    items[index],
+                    timeout,
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future, index in futures.items():
+            if not future.done() and index in threads:
+                _detach_ctx(threads[index])
+
+
+def _detach_ctx(thread: threading.Thread) -> None:
+    """Stop a worker still running a call from writing to the caller's page."""
+    if hasattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME):
+        setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+
+
+def call_concurrently(*funcs: Callable[[], Any]) -> list[Any]:
+    """Call independent functions taking no arguments all at once.
+
+    Args:
+        funcs: Blocking functions, usually provider calls of one page
+            section.
+
+    Returns:
+        Results in the same order as `funcs`. An exception of any call is
+        raised here; calls still running are left to finish in the
+        background.
+    """
+    if not funcs:
+        return []
+
+    executor: ThreadPoolExecutor = _create_executor(
+        min(get_max_workers(), len(funcs))
+    )
+    try:
+        futures = [executor.submit(func) for func in funcs]
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def show_sections(sections: list[Section]) -> None:
+    """Load every section at once and show each as soon as its data is ready.
+
+    Sections keep their order on the page whatever order they load in, so
+    the page takes about as long as its slowest section instead of the sum
+    of all of them. Drawing stays in the script thread.
+
+    Args:
+        sections: Parts of the page in display order. A section whose load
+            or show raised an exception, or whose load returned None, shows
+            an error without affecting the others.
+    """
+    placeholders: list = [st.empty() for _ in sections]
+    for placeholder, section in zip(placeholders, sections):
+        placeholder.caption(f"Loading {section.name} ...")
+
+    for index, data in iter_bounded(_load_section, sections, len(sections)):
+        section: Section = sections[index]
+        with placeholders[index].container():
+            if data is None:
+                st.error(f"Could not load {section.name}")
+                continue
+
+            try:
+                section.show(data)
+            except Exception as e:
+                logging.error("Failed to show %s: %s", section, e)
+                st.error(f"Could not show {section.name}")
+
+
+def _load_section(section: Section) -> Any:
+    return section.load()
@@ -13,3 +13,17 @@ def symbol_has_error(symbol_query: str) -> str:
         return "More than 4 characters"
 
     return ""
+
+
+def symbols_have_error(symbols: list[str], max_symbols: int) -> str:
+    """Check many stock queries are valid, if not returns error message."""
+    if not symbols:
+        return "Enter stock symbols"
+    if len(symbols) > max_symbols:
+        return f"At most {max_symbols} symbols"
+    for symbol in symbols:
+        error_message: str = symbol_has_error(symbol)
+        if error_message:
+            return f"{symbol}: {error_message}"
+
+    return ""
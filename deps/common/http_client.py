@@ -0,0 +1,210 @@
+"""Shared HTTP client for provider APIs.
+
+One keep-alive connection pool per host is shared by every Streamlit session
+in the process so reruns reuse open TCP and TLS connections.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+import streamlit as st
+
+from deps.common.backends import create_adapter, is_offline
+from deps.common.metrics import observe_call
+from deps.common.rate_limit import (
+    PROVIDER_HOSTS,
+    RateGovernor,
+    backoff_seconds,
+    get_governor_for_host,
+    parse_retry_after,
+)
+
+
+DEFAULT_POOL_MAXSIZE: int = 10
+DEFAULT_MAX_RETRIES: int = 3
+RETRY_STATUS_CODES: set[int] = {429, 500, 502, 503, 504}
+
+# Hosts yfinance calls through the one session it is given, for prices and
+# for its cookie and crumb
+YAHOO_HOSTS: list[str] = [
+    "query1.finance.yahoo.com",
+    "query2.finance.yahoo.com",
+    "fc.yahoo.com",
+    "finance.yahoo.com",
+    "guce.yahoo.com",
+    "consent.yahoo.com",
+]
+
+
+def _get_pool_maxsize(host: str) -> int:
+    """Connections kept open for a host.
+
+    Set per host in `st.secrets.api_config.pool_sizes` with
+    `api_config.pool_maxsize` as the default for all other hosts.
+    """
+    api_config = st.secrets.api_config
+    pool_sizes = api_config.get("pool_sizes", {})
+    return int(pool_sizes.get(host, api_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)))
+
+
+def _get_pool_connections(host: str) -> int:
+    """Hosts called through the session of a host, one pool each.
+
+    A pool per host keeps a session from closing the connections of one
+    host whenever it calls another.
+    """
+    return len(YAHOO_HOSTS) if host in YAHOO_HOSTS else 1
+
+
+class _ProviderSession(requests.Session):
+    """Session sending requests for some hosts to other base URLs.
+
+    Set in `st.secrets.api_config.base_urls` by host, for example to serve
+    `finnhub.io` from a local stand-in with `"finnhub.io" =
+    "http://127.0.0.1:8000/finnhub.io"`.
+    """
+
+    def __init__(self, base_urls: dict[str, str]) -> None:
+        super().__init__()
+        self.base_urls = base_urls
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        parts = urlsplit(url)
+        base_url: str | None = self.base_urls.get(parts.netloc)
+        if base_url:
+            url = base_url.rstrip("/") + url.split(parts.netloc, 1)[1]
+        return super().request(method, url, *args, **kwargs)
+
+
+def _observe_rate_limits(governor: RateGovernor) -> Callable:
+    """Response hook adapting a provider's rate to its responses.
+
+    A session hook rather than code in `get` so requests that clients such
+    as yfinance send through the session themselves are governed too.
+    """
+
+    def hook(response: requests.Response, *args, **kwargs) -> requests.Response:
+        if response.status_code == 429:
+            governor.on_rate_limited(
+                parse_retry_after(response.headers.get("Retry-After"))
+            )
+        elif response.status_code < 400:
+            governor.on_success()
+        return response
+
+    return hook
+
+
+# Process-wide sessions by host
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(host: str) -> requests.Session:
+    """Return the process-wide session for a host.
+
+    Args:
+        host: Network location such as `finnhub.io`.
+    """
+    with _sessions_lock:
+        if host not in _sessions:
+            # Local responses are saved by provider host, not base URL
+            base_urls: dict[str, str] = (
+                {}
+                if is_offline()
+                else dict(st.secrets.api_config.get("base_urls", {}))
+            )
+            adapter = create_adapter(
+                _get_pool_connections(host), _get_pool_maxsize(host), base_urls
+            )
+
+            session = _ProviderSession(base_urls)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            governor: RateGovernor | None = get_governor_for_host(host)
+            if governor:
+                session.hooks["response"].append(_observe_rate_limits(governor))
+            _sessions[host] = session
+
+        return _sessions[host]
+
+
+def get(
+    url: str,
+    timeout: float | None = None,
+    endpoint: str | None = None,
+    **kwargs,
+) -> requests.Response:
+    """Send GET request through the pooled session for the URL's host.
+
+    Requests to rate limited providers wait for the provider's governor.
+    Responses of 429 and 5xx are retried up to `api_config.max_retries` times,
+    honoring `Retry-After` or else backing off exponentially with jitter.
+
+    Args:
+        url: Full URL including query string.
+        timeout: Seconds to wait for the server. Defaults to
+            `api_config.timeout_seconds` in secrets.
+        endpoint: Name of the API in call metrics. Defaults to the URL path
+            which should not be used when the path contains a symbol.
+        kwargs: Passed to `requests.Session.get` such as `params`, `headers`.
+
+    Returns:
+        Response with a successful status code.
+
+    Raises:
+        requests.HTTPError: Response status code is 4xx or 5xx after retries.
+    """
+    if timeout is None:
+        timeout = st.secrets.api_config.timeout_seconds
+    max_retries: int = int(st.secrets.api_config.get("max_retries", DEFAULT_MAX_RETRIES))
+
+    host: str = urlsplit(url).netloc
+    governor: RateGovernor | None = get_governor_for_host(host)
+    provider: str = PROVIDER_HOSTS.get(host, host)
+    endpoint = endpoint or urlsplit(url).path
+
+    for attempt in range(max_retries + 1):
+        if governor:
+            governor.acquire()
+
+        start_time: float = time.monotonic()
+        try:
+            response: requests.Response = get_session(host).get(
+                url, timeout=timeout, **kwargs
+            )
+        except requests.RequestException:
+            observe_call(
+                provider, endpoint, time.monotonic() - start_time, error=True
+            )
+            raise
+        observe_call(
+            provider,
+            endpoint,
+            time.monotonic() - start_time,
+            response_bytes=len(response.content),
+            error=response.status_code >= 400,
+        )
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+            break
+
+        # A governor paused by the session's hook holds back the retry
+        if not (response.status_code == 429 and governor):
+            retry_after: float | None = parse_retry_after(
+                response.headers.get("Retry-After")
+            )
+            time.sleep(
+                retry_after if retry_after is not None else backoff_seconds(attempt)
+            )
+        logging.info(
+            "Retry %d for %s after status %d", attempt + 1, host, response.status_code
+        )
+
+    response.raise_for_status()
+    return response
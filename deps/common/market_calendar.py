@@ -0,0 +1,104 @@
+"""US stock market trading days and times."""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+
+
+MARKET_TZ = ZoneInfo("America/New_York")
+
+# Regular session close in Eastern Time
+MARKET_CLOSE: time = time(16, 0)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Full day closures of the New York Stock Exchange."""
+
+    rules = [
+        # Not observed on the Friday before when on a Saturday
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday(
+            "Juneteenth",
+            month=6,
+            day=19,
+            start_date="2022-01-01",
+            observance=nearest_workday,
+        ),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=8)
+def _get_holidays(year: int) -> frozenset[date]:
+    """Market holidays in a year."""
+    holidays = NYSEHolidayCalendar().holidays(
+        start=datetime(year, 1, 1), end=datetime(year, 12, 31)
+    )
+    return frozenset(holiday.date() for holiday in holidays)
+
+
+def is_trading_day(day: date) -> bool:
+    """Whether the market is open on a day."""
+    return day.weekday() < 5 and day not in _get_holidays(day.year)
+
+
+def next_market_time(now: datetime, times: list[time]) -> datetime:
+    """Return the next trading day time after now.
+
+    Args:
+        now: Timezone aware current time.
+        times: Times of day in Eastern Time such as 16:15 after market close.
+
+    Returns:
+        Earliest of the times on a trading day that is later than now.
+    """
+    now = now.astimezone(MARKET_TZ)
+    day: date = now.date()
+
+    while True:
+        if is_trading_day(day):
+            for time_of_day in sorted(times):
+                candidate = datetime.combine(day, time_of_day, tzinfo=MARKET_TZ)
+                if candidate > now:
+                    return candidate
+        day += timedelta(days=1)
+
+
+def last_market_close(now: datetime) -> datetime:
+    """Return the close of the last trading day session ended by now.
+
+    Args:
+        now: Timezone aware current time.
+
+    Returns:
+        `MARKET_CLOSE` of today if the market has closed, else of the
+        trading day before.
+    """
+    now = now.astimezone(MARKET_TZ)
+    day: date = now.date()
+    if now.time() < MARKET_CLOSE:
+        day -= timedelta(days=1)
+
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
@@ -0,0 +1,472 @@
+"""Latency, size, error and cache counts of provider calls.
+
+Counts are kept per process and shared by all sessions. They are shown on
+the admin panel and served in Prometheus text format for scraping.
+
+Cached functions are bounded by `ttl` and `max_entries` with
+`DEFAULT_CACHE_TTL` and `DEFAULT_CACHE_MAX_ENTRIES` if not given. Cache
+memory by function is what Streamlit reports holding. Data kept in module
+state outside Streamlit's caches is reported the same way by registering
+the store with `register_store`.
+
+Set in `st.secrets.metrics`:
+    port: Serve `/metrics` on this port. Not served if unset.
+
+Set in `st.secrets.cache`:
+    max_megabytes: Clear the largest cached function or store when the
+        size of everything cached is over this. Checked at most every
+        `CACHE_CHECK_INTERVAL_SECONDS` on a cache miss. Not limited if unset.
+"""
+
+from contextlib import contextmanager
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.caching.cache_data_api import _data_caches
+from streamlit.runtime.caching.cache_resource_api import _resource_caches
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+# Upper bounds of latency histogram buckets
+LATENCY_BUCKETS_SECONDS: list[float] = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Limits of cached functions which do not set their own
+DEFAULT_CACHE_TTL: str = "1d"
+DEFAULT_CACHE_MAX_ENTRIES: int = 256
+
+# Sizing every cache is too slow to do on each miss
+CACHE_CHECK_INTERVAL_SECONDS: float = 10.0
+
+
+class _CallStats:
+    """Counts of calls to one provider endpoint."""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.errors: int = 0
+        self.total_seconds: float = 0.0
+        self.response_bytes: int = 0
+        # Last bucket is calls slower than every bound
+        self.buckets: list[int] = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)
+
+
+class _Cache(NamedTuple):
+    """Bound of a cached function or store and how to empty it.
+
+    Attributes:
+        max_entries: Most entries held, or None if bounded otherwise such as
+            one entry per provider.
+        clear: Drop every entry.
+        get_values: Values held by a store, None for cached functions which
+            Streamlit sizes itself.
+    """
+
+    max_entries: int | None
+    clear: Callable[[], None]
+    get_values: Callable[[], list[Any]] | None = None
+
+
+# Counts of every session and background thread
+_call_stats: dict[tuple[str, str], _CallStats] = {}
+_cache_stats: dict[str, dict[str, int]] = {}
+_caches: dict[str, _Cache] = {}
+_stats_lock = threading.Lock()
+_last_cache_check: float = 0.0
+
+_server_started: bool = False
+
+
+def observe_call(
+    provider: str,
+    endpoint: str,
+    seconds: float,
+    response_bytes: int = 0,
+    error: bool = False,
+) -> None:
+    """Record one call to a provider.
+
+    Args:
+        provider: Data source such as 'finnhub' or a host name.
+        endpoint: Short name of the API without symbols or keys.
+        seconds: Time until the response was received.
+        response_bytes: Size of the response body.
+        error: Whether the call failed or returned an error status.
+    """
+    bucket: int = next(
+        (
+            index
+            for index, bound in enumerate(LATENCY_BUCKETS_SECONDS)
+            if seconds <= bound
+        ),
+        len(LATENCY_BUCKETS_SECONDS),
+    )
+
+    with _stats_lock:
+        stats = _call_stats.setdefault((provider, endpoint), _CallStats())
+        stats.count += 1
+        stats.errors += int(error)
+        stats.total_seconds += seconds
+        stats.response_bytes += response_bytes
+        stats.buckets[bucket] += 1
+
+
+@contextmanager
+def track_call(provider: str, endpoint: str) -> Iterator[None]:
+    """Record latency of a block calling a provider, as an error if it raises.
+
+    For clients such as yfinance which do not go through `http_client`.
+    """
+    start_time: float = time.monotonic()
+    try:
+        yield
+    except Exception:
+        observe_call(provider, endpoint, time.monotonic() - start_time, error=True)
+        raise
+    observe_call(provider, endpoint, time.monotonic() - start_time)
+
+
+def _track_cache(cache_decorator: Callable, **cache_kwargs) -> Callable:
+    """Wrap a Streamlit cache decorator to bound it and count calls and
+    misses."""
+    cache_kwargs.setdefault("ttl", DEFAULT_CACHE_TTL)
+    cache_kwargs.setdefault("max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+
+    def decorator(func: Callable) -> Callable:
+        # Name Streamlit reports the cache under
+        name: str = f"{func.__module__}.{func.__qualname__}"
+
+        # Only runs when Streamlit has no cached value
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs) -> Any:
+            if _has_script_run_ctx():
+                _count_cache(name, "misses")
+                _check_cache_size()
+            return func(*args, **kwargs)
+
+        cached_func = cache_decorator(**cache_kwargs)(on_miss)
+
+        @functools.wraps(func)
+        def on_call(*args, **kwargs) -> Any:
+            # Streamlit neither reads nor stores values without a script run
+            # context so calls such as from the scheduler are not counted
+            if _has_script_run_ctx():
+                _count_cache(name, "calls")
+            return cached_func(*args, **kwargs)
+
+        with _stats_lock:
+            _caches[name] = _Cache(cache_kwargs["max_entries"], cached_func.clear)
+
+        on_call.clear = cached_func.clear
+        return on_call
+
+    return decorator
+
+
+def tracked_cache_data(**cache_kwargs) -> Callable:
+    """`st.cache_data` that is bounded and counts cache hits and misses.
+
+    Args:
+        cache_kwargs: Passed to `st.cache_data` such as `ttl`, `max_entries`,
+            `show_spinner`.
+    """
+    return _track_cache(st.cache_data, **cache_kwargs)
+
+
+def tracked_cache_resource(**cache_kwargs) -> Callable:
+    """`st.cache_resource` that is bounded and counts cache hits and misses.
+
+    Args:
+        cache_kwargs: Passed to `st.cache_resource` such as `ttl`,
+            `max_entries`.
+    """
+    return _track_cache(st.cache_resource, **cache_kwargs)
+
+
+def register_store(
+    name: str,
+    get_values: Callable[[], list[Any]],
+    clear: Callable[[], None],
+    max_entries: int | None = None,
+) -> None:
+    """Report memory of data kept in module state like a cached function.
+
+    Args:
+        name: Shown in place of the function name such as
+            `deps.indicators._memo`.
+        get_values: Values held, one per entry. Must not block for long.
+        clear: Drop every entry, called when `cache.max_megabytes` is
+            exceeded and this store is the largest.
+        max_entries: Bound of the store shown in reports.
+    """
+    with _stats_lock:
+        _caches[name] = _Cache(max_entries, clear, get_values)
+
+
+def _has_script_run_ctx() -> bool:
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def _count_cache(name: str, field: str) -> None:
+    with _stats_lock:
+        counts = _cache_stats.setdefault(name, {"calls": 0, "misses": 0})
+        counts[field] += 1
+
+
+def estimate_bytes(value: Any, seen: set[int] | None = None) -> int:
+    """Approximate memory held by a value including nested values.
+
+    Args:
+        value: DataFrame, array or container of them.
+        seen: Ids of objects already counted, so objects shared by many
+            values such as one date index are counted once.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item, seen) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_bytes(key, seen) + estimate_bytes(item, seen)
+            for key, item in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+def _get_cache_sizes() -> dict[str, tuple[int, int]]:
+    """Entries and bytes of every cached function and store by name.
+
+    Cached functions are sized by Streamlit: the pickled size of
+    `st.cache_data` values and a deep size of `st.cache_resource` values.
+    """
+    with _stats_lock:
+        caches: dict[str, _Cache] = dict(_caches)
+
+    sizes: dict[str, tuple[int, int]] = {name: (0, 0) for name in caches}
+    for stat in [*_data_caches.get_stats(), *_resource_caches.get_stats()]:
+        if stat.cache_name in sizes:
+            entries, size = sizes[stat.cache_name]
+            sizes[stat.cache_name] = (entries + 1, size + stat.byte_length)
+
+    for name, cache in caches.items():
+        if cache.get_values is not None:
+            values: list[Any] = cache.get_values()
+            seen: set[int] = set()
+            sizes[name] = (
+                len(values),
+                sum(estimate_bytes(value, seen) for value in values),
+            )
+
+    return sizes
+
+
+def _check_cache_size() -> None:
+    """Clear the largest cached function or store if everything cached is
+    over `cache.max_megabytes`."""
+    global _last_cache_check
+
+    max_megabytes = st.secrets.get("cache", {}).get("max_megabytes")
+    if not max_megabytes:
+        return
+
+    with _stats_lock:
+        now: float = time.monotonic()
+        if now - _last_cache_check < CACHE_CHECK_INTERVAL_SECONDS:
+            return
+        _last_cache_check = now
+
+    sizes: dict[str, tuple[int, int]] = _get_cache_sizes()
+    total_bytes: int = sum(size for _, size in sizes.values())
+    if total_bytes <= float(max_megabytes) * 1e6:
+        return
+
+    largest: str = max(sizes, key=lambda name: sizes[name][1])
+    logging.warning(
+        "Cache is %.0f MB, over %s MB; clearing %s",
+        total_bytes / 1e6,
+        max_megabytes,
+        largest,
+    )
+    _caches[largest].clear()
+
+
+def get_call_stats() -> pd.DataFrame:
+    """Calls, errors, latency and bytes per provider endpoint."""
+    with _stats_lock:
+        rows: list[dict] = [
+            {
+                "provider": provider,
+                "endpoint": endpoint,
+                "calls": stats.count,
+                "errors": stats.errors,
+                "meanSeconds": stats.total_seconds / stats.count,
+                "responseBytes": stats.response_bytes,
+                **dict(zip(_get_bucket_labels(), stats.buckets)),
+            }
+            for (provider, endpoint), stats in sorted(_call_stats.items())
+        ]
+    return pd.DataFrame(rows)
+
+
+def _get_bucket_labels() -> list[str]:
+    """Column names of latency histogram buckets such as `<=0.5s`."""
+    return [f"<={bound}s" for bound in LATENCY_BUCKETS_SECONDS] + [
+        f">{LATENCY_BUCKETS_SECONDS[-1]}s"
+    ]
+
+
+def get_cache_stats() -> pd.DataFrame:
+    """Calls, hits, misses, entries and memory per cached function or store.
+
+    Stores have no calls, hits or misses.
+    """
+    sizes: dict[str, tuple[int, int]] = _get_cache_sizes()
+    with _stats_lock:
+        rows: list[dict] = []
+        for name, cache in sorted(_caches.items()):
+            counts: dict[str, int] | None = (
+                _cache_stats.get(name, {"calls": 0, "misses": 0})
+                if cache.get_values is None
+                else None
+            )
+            rows.append(
+                {
+                    "function": name,
+                    "calls": counts["calls"] if counts else None,
+                    "hits": counts["calls"] - counts["misses"] if counts else None,
+                    "misses": counts["misses"] if counts else None,
+                    "entries": sizes.get(name, (0, 0))[0],
+                    "maxEntries": cache.max_entries,
+                    "megabytes": sizes.get(name, (0, 0))[1] / 1e6,
+                }
+            )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "function",
+            "calls",
+            "hits",
+            "misses",
+            "entries",
+            "maxEntries",
+            "megabytes",
+        ],
+    ).astype(
+        {"calls": "Int64", "hits": "Int64", "misses": "Int64", "maxEntries": "Int64"}
+    )
+
+
+def to_prometheus_text() -> str:
+    """All counts in Prometheus text exposition format."""
+    lines: list[str] = [
+        "# HELP provider_request_duration_seconds Latency of provider calls.",
+        "# TYPE provider_request_duration_seconds histogram",
+    ]
+    counters: dict[str, list[str]] = {
+        "provider_request_errors_total": [],
+        "provider_response_bytes_total": [],
+    }
+
+    with _stats_lock:
+        for (provider, endpoint), stats in sorted(_call_stats.items()):
+            labels: str = f'provider="{provider}",endpoint="{endpoint}"'
+            cumulative: int = 0
+            for bound, count in zip(LATENCY_BUCKETS_SECONDS, stats.buckets):
+                cumulative += count
+                lines.append(
+                    "provider_request_duration_seconds_bucket"
+                    + f'{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines += [
+                "provider_request_duration_seconds_bucket"
+                + f'{{{labels},le="+Inf"}} {stats.count}',
+                "provider_request_duration_seconds_sum"
+                + f"{{{labels}}} {stats.total_seconds}",
+                f"provider_request_duration_seconds_count{{{labels}}} {stats.count}",
+            ]
+            counters["provider_request_errors_total"].append(
+                f"provider_request_errors_total{{{labels}}} {stats.errors}"
+            )
+            counters["provider_response_bytes_total"].append(
+                f"provider_response_bytes_total{{{labels}}} {stats.response_bytes}"
+            )
+
+        for name, counts in sorted(_cache_stats.items()):
+            counters.setdefault("cache_calls_total", []).append(
+                f'cache_calls_total{{function="{name}"}} {counts["calls"]}'
+            )
+            counters.setdefault("cache_misses_total", []).append(
+                f'cache_misses_total{{function="{name}"}} {counts["misses"]}'
+            )
+
+    gauges: dict[str, list[str]] = {"cache_entries": [], "cache_bytes": []}
+    for name, (entries, size) in sorted(_get_cache_sizes().items()):
+        gauges["cache_entries"].append(f'cache_entries{{function="{name}"}} {entries}')
+        gauges["cache_bytes"].append(f'cache_bytes{{function="{name}"}} {size}')
+
+    for metric, samples in counters.items():
+        lines += [f"# TYPE {metric} counter", *samples]
+    for metric, samples in gauges.items():
+        lines += [f"# TYPE {metric} gauge", *samples]
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+
+        body: bytes = to_prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Silence the default log line per scrape."""
+
+
+def start_metrics_server() -> None:
+    """Serve `/metrics` once per process if `metrics.port` is set in secrets."""
+    global _server_started
+
+    port = st.secrets.get("metrics", {}).get("port")
+    if not port:
+        return
+
+    with _stats_lock:
+        if _server_started:
+            return
+        _server_started = True
+
+    try:
+        server = ThreadingHTTPServer(("", int(port)), _MetricsHandler)
+    except OSError as e:
+        logging.error("Could not serve metrics on port %s: %s", port, e)
+        return
+
+    threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    ).start()
+    logging.info("Serving metrics on port %s", port)
@@ -0,0 +1,207 @@
+"""Client-side rate limiting per data provider.
+
+Each provider has one token bucket shared by every Streamlit session in the
+process. The bucket halves its rate when the provider answers 429 and slowly
+climbs back to the configured rate while requests succeed.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from deps.common.backends import is_offline
+
+
+# Requests per minute if not set in `st.secrets.api_config.rate_limits`
+DEFAULT_RATE_LIMITS: dict[str, int] = {
+    "finnhub": 60,
+    "fmp": 300,
+    "yahoo": 120,
+}
+
+# Requests per minute when answered from local files
+OFFLINE_RATE_LIMIT: int = 1_000_000
+
+# Hosts whose requests count against a provider's rate limit
+PROVIDER_HOSTS: dict[str, str] = {
+    "finnhub.io": "finnhub",
+    "financialmodelingprep.com": "fmp",
+    "query1.finance.yahoo.com": "yahoo",
+    "query2.finance.yahoo.com": "yahoo",
+}
+
+
+class RateGovernor:
+    def __init__(self, provider: str, requests_per_minute: float) -> None:
+        """Token bucket for one provider.
+
+        Args:
+            provider: Provider name such as 'finnhub'.
+            requests_per_minute: Highest rate allowed by the provider plan.
+        """
+        self.provider = provider
+        self.max_rate: float = requests_per_minute / 60
+        self.rate: float = self.max_rate
+        self.capacity: float = max(1.0, self.max_rate)  # About one second burst
+
+        self._tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+        self._paused_until: float = 0.0
+        self._limited_in_a_row: int = 0
+        self._waiting: int = 0
+        self._throttled: int = 0
+        self._condition = threading.Condition()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests currently waiting for a token."""
+        return self._waiting
+
+    def acquire(self) -> float:
+        """Block until a request may be sent.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        start: float = time.monotonic()
+        with self._condition:
+            self._waiting += 1
+            try:
+                while True:
+                    now: float = time.monotonic()
+                    self._refill(now)
+
+                    wait: float = self._paused_until - now
+                    if wait <= 0 and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    if wait <= 0:
+                        wait = (1 - self._tokens) / self.rate
+
+                    self._condition.wait(wait)
+            finally:
+                self._waiting -= 1
+
+        waited: float = time.monotonic() - start
+        if waited > 1:
+            logging.info(
+                "Rate bound: %s waited %.1fs, queue depth %d",
+                self.provider,
+                waited,
+                self._waiting,
+            )
+        return waited
+
+    def on_success(self) -> None:
+        """Recover rate additively after a successful request."""
+        with self._condition:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+            self._limited_in_a_row = 0
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """Slow down after provider returned 429 Too Many Requests.
+
+        Args:
+            retry_after: Seconds the provider asked clients to wait. Backs off
+                exponentially with jitter by 429s in a row if not given.
+        """
+        with self._condition:
+            if retry_after is None:
+                retry_after = backoff_seconds(self._limited_in_a_row)
+            self._limited_in_a_row += 1
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self._tokens = 0
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + retry_after
+            )
+            self._throttled += 1
+        logging.warning(
+            "Rate limited: %s paused %.1fs, now %.1f requests per minute",
+            self.provider,
+            retry_after,
+            self.rate * 60,
+        )
+
+    def stats(self) -> dict:
+        """Current state of the bucket for monitoring."""
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                "provider": self.provider,
+                "requestsPerMinute": round(self.rate * 60, 1),
+                "maxRequestsPerMinute": round(self.max_rate * 60, 1),
+                "tokens": round(self._tokens, 2),
+                "queueDepth": self._waiting,
+                "pausedSeconds": round(
+                    max(0.0, self._paused_until - time.monotonic()), 1
+                ),
+                "throttledCount": self._throttled,
+            }
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+# Process-wide registry of governors by provider name
+_governors: dict[str, RateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(provider: str) -> RateGovernor:
+    """Return the shared governor for a provider, creating it on first use.
+
+    Args:
+        provider: 'finnhub', 'fmp', 'yahoo' or another name in
+            `api_config.rate_limits`. Not limited with the `local` backend.
+    """
+    with _governors_lock:
+        if provider not in _governors:
+            rate_limits = st.secrets.api_config.get("rate_limits", {})
+            requests_per_minute: float = float(
+                rate_limits.get(provider, DEFAULT_RATE_LIMITS.get(provider, 60))
+            )
+            if is_offline():
+                requests_per_minute = OFFLINE_RATE_LIMIT
+            _governors[provider] = RateGovernor(provider, requests_per_minute)
+        return _governors[provider]
+
+
+def get_governor_for_host(host: str) -> RateGovernor | None:
+    """Return governor for a provider host or None if host is not limited."""
+    provider = PROVIDER_HOSTS.get(host)
+    return get_governor(provider) if provider else None
+
+
+def get_rate_governor_stats() -> pd.DataFrame:
+    """State of every provider governor, including queue depth."""
+    with _governors_lock:
+        governors = list(_governors.values())
+    return pd.DataFrame([governor.stats() for governor in governors])
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Convert `Retry-After` header of seconds or HTTP date into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for a retry attempt from 0."""
+    return random.uniform(0, min(cap, base * 2**attempt))
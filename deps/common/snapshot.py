@@ -0,0 +1,278 @@
+"""Local Parquet snapshots of remote datasets.
+
+A snapshot is refreshed with a conditional GET using the `ETag` and
+`Last-Modified` of the previous download. An unchanged dataset costs one
+round trip and is served from memory or disk without parsing.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Callable
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from deps.common import http_client
+from deps.common.metrics import register_store
+
+
+DEFAULT_DATA_DIR: str = ".data"
+DEFAULT_SNAPSHOT_TIMEOUT_SECONDS: int = 30
+
+
+def get_data_dir() -> Path:
+    """Directory for local data set in `st.secrets.api_config.data_dir`."""
+    data_dir = Path(st.secrets.api_config.get("data_dir", DEFAULT_DATA_DIR))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
+
+def replace_file(path: Path, write: Callable[[str], None]) -> None:
+    """Replace a file so readers never see half of it.
+
+    Writes to a uniquely named temporary file next to `path` first, so
+    threads writing the same file at once never move each other's files.
+
+    Args:
+        path: File to replace.
+        write: Writes the new contents to the path it is given, such as
+            `DataFrame.to_parquet`.
+    """
+    fd, temp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+# Snapshots already in memory by name with the metadata they came from
+_loaded_snapshots: dict[str, tuple[dict, pd.DataFrame]] = {}
+_snapshots_lock = threading.Lock()
+
+
+def _get_loaded_snapshots() -> list[pd.DataFrame]:
+    with _snapshots_lock:
+        return [df for _, df in _loaded_snapshots.values()]
+
+
+def _clear_loaded_snapshots() -> None:
+    """Forget snapshots in memory so the next load reads them from disk."""
+    with _snapshots_lock:
+        _loaded_snapshots.clear()
+
+
+# Bounded by one entry per dataset name
+register_store(
+    "deps.common.snapshot._loaded_snapshots",
+    _get_loaded_snapshots,
+    _clear_loaded_snapshots,
+)
+
+
+def load_snapshot(
+    name: str,
+    url: str,
+    parse: Callable[[requests.Response], pd.DataFrame],
+) -> pd.DataFrame:
+    """Return dataset from its local snapshot after checking URL for changes.
+
+    Args:
+        name: File name of the snapshot without extension.
+        url: Source of the dataset.
+        parse: Convert a full response into a typed DataFrame. Only called
+            when the source has changed.
+
+    Returns:
+        Latest dataset. If the source cannot be reached, the last snapshot is
+        returned instead.
+
+    Raises:
+        requests.RequestException: Source could not be reached and there is
+            no snapshot to fall back on.
+    """
+    data_path: Path = get_data_dir() / f"{name}.parquet"
+    meta_path: Path = get_data_dir() / f"{name}.json"
+
+    meta: dict = {}
+    if data_path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+
+    headers: dict[str, str] = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response: requests.Response = http_client.get(
+            url,
+            headers=headers,
+            endpoint=name,
+            timeout=st.secrets.api_config.get(
+                "snapshot_timeout_seconds", DEFAULT_SNAPSHOT_TIMEOUT_SECONDS
+            ),
+        )
+    except requests.RequestException as re:
+        if not meta:
+            raise
+        logging.warning("Using last %s snapshot: %s", name, re)
+        return _read_snapshot(name, meta, data_path)
+
+    if response.status_code == 304:
+        logging.info("Snapshot %s not modified", name)
+        return _read_snapshot(name, meta, data_path)
+
+    df: pd.DataFrame = parse(response)
+    meta = {
+        "url": url,
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+    }
+
+    # Data before metadata so a crash never leaves metadata of a missing version
+    replace_file(data_path, df.to_parquet)
+    replace_file(meta_path, lambda path: Path(path).write_text(json.dumps(meta)))
+
+    with _snapshots_lock:
+        _loaded_snapshots[name] = (meta, df)
+
+    logging.info("Snapshot %s saved with %d rows", name, len(df))
+    return df
+
+
+def _read_snapshot(name: str, meta: dict, data_path: Path) -> pd.DataFrame:
+    """Return snapshot from memory if still current, otherwise from disk."""
+    with _snapshots_lock:
+        loaded = _loaded_snapshots.get(name)
+        if loaded and loaded[0] == meta:
+            return loaded[1]
+
+        df: pd.DataFrame = pd.read_parquet(data_path)
+        _loaded_snapshots[name] = (meta, df)
+        return df
+
+
+class BackgroundSnapshot:
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        parse: Callable[[requests.Response], pd.DataFrame],
+        ttl_seconds: float,
+    ) -> None:
+        """Snapshot served from memory and refreshed in a background thread.
+
+        Callers never wait for a refresh except for the very first load,
+        which is done once for every caller waiting on it.
+
+        Args:
+            name: File name of the snapshot without extension.
+            url: Source of the dataset.
+            parse: Convert a full response into a typed DataFrame.
+            ttl_seconds: Age after which the next `get` starts a refresh.
+        """
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.ttl_seconds = ttl_seconds
+
+        self._df: pd.DataFrame | None = None
+        self._loaded_at: float = 0.0
+        self._refreshing: bool = False
+        self._lock = threading.Lock()
+        self._first_load_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a first version of the dataset is in memory."""
+        return self._df is not None
+
+    def get(self) -> pd.DataFrame:
+        """Return current dataset. Do not modify the returned DataFrame."""
+        with self._lock:
+            df = self._df
+            stale: bool = time.monotonic() - self._loaded_at > self.ttl_seconds
+            start_refresh: bool = df is not None and stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if df is None:
+            return self._load_first()
+
+        if start_refresh:
+            threading.Thread(
+                target=self._refresh, name=f"refresh-{self.name}", daemon=True
+            ).start()
+
+        return df
+
+    def _load_first(self) -> pd.DataFrame:
+        """Load the first version, waiting for another caller already loading it."""
+        with self._first_load_lock:
+            if self._df is not None:
+                return self._df
+
+            df: pd.DataFrame = load_snapshot(self.name, self.url, self.parse)
+            with self._lock:
+                self._df = df
+                self._loaded_at = time.monotonic()
+            return df
+
+    def _refresh(self) -> None:
+        """Replace the version in memory, keeping it if the source fails."""
+        try:
+            df: pd.DataFrame = load_snapshot(self.name, self.url, self.parse)
+            with self._lock:
+                self._df = df
+                self._loaded_at = time.monotonic()
+        except Exception as e:
+            logging.error("Could not refresh %s: %s", self.name, e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+def to_typed(
+    df: pd.DataFrame,
+    date_columns: dict[str, str | None] | None = None,
+    category_columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """Give JSON or CSV columns compact types that Parquet can store.
+
+    Args:
+        df: Normalized DataFrame with object columns.
+        date_columns: Column name to `strftime` format, or None to infer.
+            Values that cannot be parsed become NaT.
+        category_columns: Low cardinality text columns.
+
+    Returns:
+        DataFrame with datetime, categorical and string columns.
+    """
+    df = df.copy()
+
+    for column, date_format in (date_columns or {}).items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(
+                df[column], format=date_format or "mixed", errors="coerce"
+            )
+
+    for column in category_columns or []:
+        if column in df.columns:
+            df[column] = df[column].astype("string").astype("category")
+
+    # Remaining object columns may mix types which Parquet cannot store
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].astype("string")
+
+    return df
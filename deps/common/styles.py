@@ -0,0 +1,52 @@
+"""Styling helpers for pandas Styler tables."""
+
+import numpy as np
+import pandas as pd
+
+
+def range_bar_css(
+    values: pd.Series,
+    low: pd.Series,
+    high: pd.Series,
+    color: str,
+    width: str = "10em",
+) -> np.ndarray:
+    """CSS to draw each value as a bar within its own low to high range.
+
+    Draws a bar equivalent to calling `Styler.bar(vmin=low, vmax=high)` once
+    per row, though the CSS differs, computed for every row in one pass. Use
+    with `Styler.apply(axis=0)`.
+
+    Args:
+        values: Column of values to draw such as closing price.
+        low: Start of each row's range such as 52 week low.
+        high: End of each row's range such as 52 week high.
+        color: HTML color name of the bar.
+        width: CSS width of the cell.
+
+    Returns:
+        CSS string per row. Rows with a missing value or range get no bar.
+    """
+    values = np.asarray(values, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    high = np.asarray(high, dtype="float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.clip((values - low) / (high - low) * 100, 0, 100)
+    has_bar = np.isfinite(percent)
+
+    css = np.full(len(values), f"width: {width};", dtype=object)
+    if has_bar.any():
+        percent_text = np.char.mod("%.1f%%", percent[has_bar])
+        css[has_bar] = np.char.add(
+            np.char.add(
+                np.char.add(
+                    f"width: {width}; background: linear-gradient(90deg, {color} ",
+                    percent_text,
+                ),
+                np.char.add(", transparent ", percent_text),
+            ),
+            ");",
+        ).astype(object)
+
+    return css
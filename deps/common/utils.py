@@ -1,5 +1,9 @@
 """Util data processing functions."""
 
+import re
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
 
 
@@ -13,3 +17,41 @@ def dict_check(check, key) -> any:
         return check[key]
     except KeyError:
         return None
+
+
+def metrics_to_frame(
+    symbols: Iterable[str],
+    metrics: Iterable[tuple | None],
+    columns: list[str],
+) -> pd.DataFrame:
+    """Build one DataFrame of numeric metrics indexed by symbol.
+
+    Values are collected into a single float array and materialized once
+    instead of appending a row at a time.
+
+    Args:
+        symbols: Stock symbols, one per entry in `metrics`.
+        metrics: Tuple of values in `columns` order per symbol. `None` marks a
+            symbol with no data and becomes a row of NaN.
+        columns: Names of the metric columns.
+
+    Returns:
+        DataFrame with a `symbol` index and one float column per metric.
+    """
+    empty_row = (np.nan,) * len(columns)
+    values = np.array(
+        [empty_row if row is None else row for row in metrics],
+        dtype="float64",
+    ).reshape(-1, len(columns))
+
+    return pd.DataFrame(
+        values,
+        index=pd.Index(list(symbols), name="symbol"),
+        columns=columns,
+    )
+
+
+def split_symbols(symbols_text: str) -> list[str]:
+    """Unique upper case symbols from text separated by commas or spaces."""
+    symbols: list[str] = re.split(r"[,\s]+", symbols_text.strip().upper())
+    return list(dict.fromkeys(symbol for symbol in symbols if symbol))
@@ -1,11 +1,121 @@
 """Component DataFrames of largest drops."""
 
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
 import pandas as pd
-from deps.finnhub import get_finnhub_company_metrics
+from deps.common.concurrency import iter_bounded
+from deps.common.market_calendar import MARKET_TZ, last_market_close
+from deps.common.styles import range_bar_css
+from deps.common.metrics import register_store
+from deps.common.utils import metrics_to_frame
+from deps.finnhub import clear_company_metrics, get_finnhub_company_metrics
 import streamlit as st
 
 from deps.fmp import get_top_losing
 from deps.github import get_static_company_data
+from deps.price_matrix import filter_drops, screen_drops
+from deps.providers import DROPS_PROVIDERS, get_drops_provider
+
+# Order of values returned by `get_finnhub_company_metrics`
+ENRICHMENT_COLUMNS: list[str] = [
+    "marketCap",
+    "threeMonthAverageVolume",
+    "52WeekLow",
+    "52WeekHigh",
+]
+
+# Finnhub reports volume in millions of shares
+FINNHUB_VOLUME_UNIT: float = 1e6
+
+# Redraw a streamed table at most this often as Finnhub metrics arrive
+PROGRESS_INTERVAL_SECONDS: float = 0.5
+
+# Thresholds offered on the Top drops page
+DROP_PERCENT_OPTIONS: list[float] = [0.05, 0.10, 0.15, 0.20, 0.30]
+
+# The shared drops hold every drop at least this large so the drops of any
+# threshold, sector and industry are a slice of them
+MIN_DROP_PERCENT: float = min(DROP_PERCENT_OPTIONS)
+
+# Columns of the shared drops besides the `symbol` index. Volume is the
+# average of daily shares traded over about three months from either source.
+DATASET_COLUMNS: list[str] = [
+    "name",
+    "changesPercentage",
+    "change",
+    "52WeekLow",
+    "price",
+    "52WeekHigh",
+    "marketCap",
+    "threeMonthAverageVolume",
+    "type",
+    "sector",
+    "industry",
+    "website",
+]
+CATEGORY_COLUMNS: list[str] = ["type", "sector", "industry"]
+
+# Age at which a page view builds stored drops again
+DROPS_TTL: timedelta = timedelta(hours=1)
+
+
+class _StoredDrops(NamedTuple):
+    df: pd.DataFrame
+    built_at: datetime
+
+
+# Enriched drops of every sector and industry by drops provider, shared by
+# all sessions. Entries are replaced by the pre-warm scheduler in
+# `deps/scheduler.py`, or by a page view once stale.
+_drops_store: dict[str, _StoredDrops] = {}
+_drops_store_lock = threading.Lock()
+
+# One build at a time per provider so a page view waits for a running
+# pre-warm instead of repeating it
+_drops_build_locks: dict[str, threading.Lock] = {}
+
+
+def _get_stored_drops() -> list[pd.DataFrame]:
+    with _drops_store_lock:
+        return [stored.df for stored in _drops_store.values()]
+
+
+def _get_current_drops(key: str) -> pd.DataFrame | None:
+    """Stored drops of a provider, or None if stale.
+
+    Drops are stale once built before the last market close or longer than
+    `DROPS_TTL` ago.
+    """
+    with _drops_store_lock:
+        stored: _StoredDrops | None = _drops_store.get(key)
+
+    now: datetime = datetime.now(MARKET_TZ)
+    if (
+        stored is None
+        or stored.built_at < last_market_close(now)
+        or now - stored.built_at > DROPS_TTL
+    ):
+        return None
+    return stored.df
+
+
+def _clear_stored_drops() -> None:
+    """Forget built drops so the next page view builds them again."""
+    with _drops_store_lock:
+        _drops_store.clear()
+
+
+register_store(
+    "deps.drops_components._drops_store",
+    _get_stored_drops,
+    _clear_stored_drops,
+    len(DROPS_PROVIDERS),
+)
 
 
 class TopDrops:
@@ -15,26 +125,80 @@ class TopDrops:
         security_type: str = "stock",
         sector: str = "Technology",
         industry: str = "",
+        max_workers: int | None = None,
     ) -> None:
         """Initiate instance.
 
+        Drops of every instance are sliced from one shared set of enriched
+        drops, built once per refresh.
+
         Args:
-            drop_percent: Threshold for showing percent decrease for the day.
+            drop_percent: Threshold for showing percent decrease for the day,
+                at least `MIN_DROP_PERCENT`.
             security_type: 'stock', 'etf', 'trust'
             sector: 'Basic Materials', 'Communication Services', 'Consumer
                 Cyclical'...
             industry: 'Aerospace & Defense', 'Agricultural Inputs','Auto &
                 Truck', 'Dealerships'...
+            max_workers: Limit of concurrent Finnhub calls when enriching
+                drops. Defaults to `api_config.max_workers` in secrets.
         """
         self.drop_percent = drop_percent
         self.security_type = security_type
         self.sector = sector
         self.industry = industry
+        self.max_workers = max_workers
 
     def get_drop_dataframe_formatted(self) -> pd.DataFrame:
         """Return largest drops of the day in DataFrame."""
-        df: pd.DataFrame = self._create_drop_dataframe()
+        return self._format_drop_dataframe(self.get_drop_dataframe())
+
+    def get_drop_table(self, color: str) -> None:
+        """Apply styles to DataFrame.
+
+        Args:
+            color: HTML color name.
+        """
+        st.markdown(
+            self._get_table_html(self.get_drop_dataframe_formatted(), color),
+            unsafe_allow_html=True,
+        )
+
+    def stream_drop_table(self, color: str) -> None:
+        """Show drops right away and fill in Finnhub metrics as they arrive.
+
+        Same table as `get_drop_table`. Current drops in the shared store are
+        shown at once.
+
+        Args:
+            color: HTML color name.
+        """
+        key: str = get_drops_provider()
+        placeholder = st.empty()
+
+        def show(dataset_df: pd.DataFrame) -> None:
+            placeholder.markdown(
+                self._get_table_html(
+                    self._format_drop_dataframe(self._slice(dataset_df)), color
+                ),
+                unsafe_allow_html=True,
+            )
+
+        with _drops_store_lock:
+            build_lock = _drops_build_locks.setdefault(key, threading.Lock())
+
+        df: pd.DataFrame | None = _get_current_drops(key)
+        if df is None:
+            with build_lock:
+                df = _get_current_drops(key)
+                if df is None:
+                    df = self._build_and_store(key, on_progress=show)
 
+        show(df)
+
+    @staticmethod
+    def _format_drop_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+        """Select and rename columns shown in the drops table."""
         df = df[
             [
                 "symbol",
@@ -45,7 +209,7 @@ class TopDrops:
                 "price",
                 "52WeekHigh",
                 "marketCap",
-                "volume",
+                "threeMonthAverageVolume",
                 "type",
                 "sector",
                 "industry",
@@ -63,7 +227,7 @@ class TopDrops:
             "ClosingPrice",
             "52WeekHigh",
             "MarketCap",
-            "Volume",
+            "AvgVolume3M",
             "Type",
             "Sector",
             "Industry",
@@ -72,13 +236,14 @@ class TopDrops:
 
         return df
 
-    def get_drop_table(self, color: str) -> None:
-        """Apply styles to DataFrame.
+    @staticmethod
+    def _get_table_html(df: pd.DataFrame, color: str) -> str:
+        """Apply styles to formatted drops and render as HTML.
 
         Args:
+            df: Drops from `_format_drop_dataframe`.
             color: HTML color name.
         """
-        df: pd.DataFrame = self.get_drop_dataframe_formatted()
         df_styler = (
             df.style.format(
                 formatter={
@@ -88,72 +253,174 @@ class TopDrops:
                     "ClosingPrice": "${:.2f}",
                     "52WeekHigh": "${:.2f}",
                     "MarketCap": "${:,.2f}",
-                    "Volume": "{:,.0f}",
+                    "AvgVolume3M": "{:,.0f}",
                 },
                 hyperlinks="html",
             )
             .set_properties(subset=["ClosingPrice"], **{"text-align": "right"})
             .background_gradient(subset=["PercentDayChange"], cmap="autumn")
-            .background_gradient(subset=["MarketCap"], cmap="Greens")
-            .highlight_null(color="gray")
         )
 
-        # https://stackoverflow.com/q/77030320/8278075
-        for rowIdx, (low, high) in enumerate(zip(df["52WeekLow"], df["52WeekHigh"])):
-            df_styler = df_styler.bar(
-                subset=pd.IndexSlice[rowIdx, "ClosingPrice"],
-                color=color,
-                vmin=low,
-                vmax=high,
+        # No market caps from the price matrix or while waiting for Finnhub
+        if df["MarketCap"].notna().any():
+            df_styler = df_styler.background_gradient(
+                subset=["MarketCap"], cmap="Greens"
             )
 
+        df_styler = df_styler.highlight_null(color="gray")
+
+        # Bar of closing price within each row's own 52 week range
+        # https://stackoverflow.com/q/77030320/8278075
+        df_styler = df_styler.apply(
+            range_bar_css,
+            subset=["ClosingPrice"],
+            low=df["52WeekLow"],
+            high=df["52WeekHigh"],
+            color=color,
+        )
+
         # Pandas Styler object is HTML and CSS
-        st.markdown(df_styler.to_html(escape=False), unsafe_allow_html=True)
+        return df_styler.to_html(escape=False)
 
-    def _create_drop_dataframe(self) -> pd.DataFrame:
-        """Join drops DataFrame with company data."""
+    def get_drop_dataframe(self) -> pd.DataFrame:
+        """Return enriched drops matching the settings, largest first."""
+        return self._slice(self.get_dataset())
 
-        # Top drops for the day
-        top_losses_df: pd.DataFrame = get_top_losing(self.drop_percent)
-        static_co_df: pd.DataFrame = get_static_company_data()
+    def get_dataset(self) -> pd.DataFrame:
+        """Return shared drops of every setting, creating them if stale.
 
-        top_losses_df = (
-            top_losses_df.merge(
-                static_co_df,
-                how="left",
-                on=["symbol"],
-            )
-            .rename(columns={"name_x": "name"})
-            .drop(labels=["name_y"], axis=1)  # Remove duplicate column from merge
-        )
+        Do not modify the returned DataFrame.
+        """
+        key: str = get_drops_provider()
+        with _drops_store_lock:
+            build_lock = _drops_build_locks.setdefault(key, threading.Lock())
+
+        df: pd.DataFrame | None = _get_current_drops(key)
+        if df is None:
+            with build_lock:
+                df = _get_current_drops(key)
+                if df is None:
+                    df = self._build_and_store(key)
+
+        return df
 
-        if self.sector:
-            top_losses_df = top_losses_df[top_losses_df["sector"] == self.sector]
+    def refresh(self) -> pd.DataFrame:
+        """Create shared drops of every setting and replace them in the store."""
+        key: str = get_drops_provider()
+        with _drops_store_lock:
+            build_lock = _drops_build_locks.setdefault(key, threading.Lock())
 
-        if self.industry:
-            top_losses_df = top_losses_df[top_losses_df["industry"] == self.industry]
+        with build_lock:
+            return self._build_and_store(key)
 
-        if self.sector or self.industry:
-            top_losses_df = top_losses_df.reset_index(drop=True)
+    def _build_and_store(
+        self,
+        key: str,
+        on_progress: Callable[[pd.DataFrame], None] | None = None,
+    ) -> pd.DataFrame:
+        # Provider caches outlive `DROPS_TTL` and the market close, so clear
+        # them for a rebuild to fetch drops and metrics again
+        get_top_losing.clear()
+        clear_company_metrics()
+
+        df: pd.DataFrame = self._create_drop_dataframe(on_progress)
+
+        with _drops_store_lock:
+            _drops_store[key] = _StoredDrops(df, datetime.now(MARKET_TZ))
+
+        return df
 
-        # Append data from Yahoo Finance
+    def _slice(self, dataset_df: pd.DataFrame) -> pd.DataFrame:
+        """Drops of this instance's settings from the shared drops."""
+        return filter_drops(dataset_df, self.drop_percent, self.sector, self.industry)
+
+    def _create_drop_dataframe(
+        self, on_progress: Callable[[pd.DataFrame], None] | None = None
+    ) -> pd.DataFrame:
+        """Join drops of every sector with company data and Finnhub metrics.
+
+        Drops come from the source set in `providers.drops`. Drops from the
+        price matrix have no market caps and need no provider calls.
+        FinancialModelingPrep stands in for the price matrix until the
+        scheduler has refreshed it for the last market session.
+
+        Args:
+            on_progress: Called with the drops before any Finnhub metrics and
+                then at most every `PROGRESS_INTERVAL_SECONDS` as metrics
+                arrive. Metrics not yet returned are NaN.
+
+        Returns:
+            Drops of at least `MIN_DROP_PERCENT` with `DATASET_COLUMNS`
+            indexed by `symbol`.
+        """
+
+        if get_drops_provider() == "price_matrix":
+            # Drops, prices, 52 week ranges and volumes from the local matrix
+            screen_df: pd.DataFrame | None = screen_drops(MIN_DROP_PERCENT)
+            if screen_df is not None:
+                return self._to_dataset(screen_df.assign(marketCap=np.nan))
+
+            logging.warning(
+                "Price matrix not built for the last market session, "
+                + "using FinancialModelingPrep drops"
+            )
+
+        top_losses_df: pd.DataFrame = self._get_fmp_drops()
+
+        # Append metrics from Finnhub
         #
-        # Use intermediary DataFrame and concat. This is faster than joining
-        # onto the `top_losses_df` DataFrame.
-        yahoo_intermediary_df = pd.DataFrame(
-            {"marketCap": [], "volume": [], "52WeekLow": [], "52WeekHigh": []}
+        # Fan out Finnhub calls; a failed symbol gets empty metrics instead
+        # of failing the whole table. Metrics are joined on `symbol` so a
+        # missing row cannot shift values onto another company.
+        symbols: list[str] = top_losses_df["symbol"].drop_duplicates().tolist()
+        all_metrics: list[tuple | None] = [None] * len(symbols)
+
+        def join_metrics() -> pd.DataFrame:
+            metrics_df: pd.DataFrame = metrics_to_frame(
+                symbols, all_metrics, ENRICHMENT_COLUMNS
+            )
+            metrics_df["threeMonthAverageVolume"] *= FINNHUB_VOLUME_UNIT
+            return self._to_dataset(top_losses_df.join(metrics_df, on="symbol"))
+
+        if on_progress:
+            on_progress(join_metrics())
+        last_progress: float = time.monotonic()
+
+        for index, metrics in iter_bounded(
+            get_finnhub_company_metrics,
+            symbols,
+            max_workers=self.max_workers,
+        ):
+            all_metrics[index] = metrics
+            if on_progress and (
+                time.monotonic() - last_progress >= PROGRESS_INTERVAL_SECONDS
+            ):
+                on_progress(join_metrics())
+                last_progress = time.monotonic()
+
+        return join_metrics()
+
+    @staticmethod
+    def _to_dataset(drops_df: pd.DataFrame) -> pd.DataFrame:
+        """Columns of the shared drops indexed by `symbol`."""
+        return (
+            drops_df.set_index("symbol")[DATASET_COLUMNS]
+            .astype({column: "category" for column in CATEGORY_COLUMNS})
         )
 
-        for symbol in top_losses_df["symbol"]:
-            overview_info_df: pd.DataFrame = get_finnhub_company_metrics(symbol)
-            yahoo_intermediary_df.loc[len(yahoo_intermediary_df)] = [
-                overview_info_df[0],
-                overview_info_df[1],
-                overview_info_df[2],
-                overview_info_df[3],
-            ]
+    @staticmethod
+    def _get_fmp_drops() -> pd.DataFrame:
+        """FinancialModelingPrep's biggest losers joined with company data."""
+        # Top drops for the day
+        top_losses_df: pd.DataFrame = get_top_losing(MIN_DROP_PERCENT)
+        static_co_df: pd.DataFrame = get_static_company_data()
 
-        top_losses_df = pd.concat([top_losses_df, yahoo_intermediary_df], axis=1)
+        # Index join on the static data's sorted `symbol` index
+        top_losses_df = top_losses_df.join(
+            static_co_df, on="symbol", rsuffix="_static"
+        ).drop(
+            labels=["name_static"], axis=1
+        )  # Remove duplicate column from join
 
         top_losses_df = top_losses_df.sort_values(
             by=["changesPercentage"], ascending=True, ignore_index=True
@@ -0,0 +1,290 @@
+"""Local table of earnings reports of every listed company.
+
+Finnhub's earnings calendar is ingested a month at a time for the whole
+market and kept as one Parquet table indexed by symbol and report date, so
+earnings of any symbol are a slice of the table instead of an API call.
+After the first ingestion, a refresh only fetches from `REFETCH_DAYS`
+before the previous refresh, when reported actuals may still be missing,
+or from the earliest window that failed, until `days_ahead`.
+
+Only the scheduler refreshes the calendar, so it stays empty until the first
+scheduled run.
+
+Set in `st.secrets.earnings_calendar`:
+    history_days: Days of past reports to keep. How far back Finnhub
+        answers depends on the plan.
+    days_ahead: Days of scheduled reports to keep.
+"""
+
+from datetime import date, datetime, timedelta
+import json
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+
+from deps.common import http_client
+from deps.common.concurrency import map_bounded
+from deps.common.metrics import register_store
+from deps.common.snapshot import get_data_dir, replace_file, to_typed
+from deps.github import get_static_company_data
+
+
+CALENDAR_URL: str = "https://finnhub.io/api/v1/calendar/earnings"
+
+DEFAULT_HISTORY_DAYS: int = 5 * 365
+DEFAULT_DAYS_AHEAD: int = 120
+
+# Days per calendar request
+WINDOW_DAYS: int = 30
+
+# Reports this recent are fetched again in case actuals were added
+REFETCH_DAYS: int = 35
+
+# Scheduled reports have no actuals yet
+NUMERIC_COLUMNS: list[str] = [
+    "quarter",
+    "year",
+    "epsEstimate",
+    "epsActual",
+    "revenueEstimate",
+    "revenueActual",
+]
+CALENDAR_COLUMNS: list[str] = ["symbol", "date", "hour", *NUMERIC_COLUMNS]
+
+# Calendar shared by every session and the scheduler
+_calendar_df: pd.DataFrame | None = None
+_calendar_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def _get_calendars() -> list[pd.DataFrame]:
+    with _calendar_lock:
+        return [] if _calendar_df is None else [_calendar_df]
+
+
+def _clear_calendar() -> None:
+    """Forget the calendar in memory so the next lookup reads it from disk."""
+    global _calendar_df
+
+    with _calendar_lock:
+        _calendar_df = None
+
+
+register_store(
+    "deps.earnings_calendar._calendar_df", _get_calendars, _clear_calendar, 1
+)
+
+
+def refresh_earnings_calendar() -> pd.DataFrame:
+    """Fetch new and recent reports of all listed companies and store them.
+
+    Returns:
+        Whole calendar indexed by symbol and date.
+    """
+    global _calendar_df
+
+    config = st.secrets.get("earnings_calendar", {})
+    today: date = datetime.now().date()
+    start: date = today - timedelta(
+        days=int(config.get("history_days", DEFAULT_HISTORY_DAYS))
+    )
+    end: date = today + timedelta(
+        days=int(config.get("days_ahead", DEFAULT_DAYS_AHEAD))
+    )
+
+    with _refresh_lock:
+        calendar_df, meta = _read_calendar()
+
+        fetch_from: date = start
+        if meta.get("refetch_from") and date.fromisoformat(meta["start"]) <= start:
+            fetch_from = max(start, date.fromisoformat(meta["refetch_from"]))
+
+        windows: list[tuple[date, date]] = _get_windows(fetch_from, end)
+        logging.info(
+            "API call: Finnhub.io: Earnings calendar %s to %s in %d requests",
+            fetch_from,
+            end,
+            len(windows),
+        )
+        window_dfs: list[pd.DataFrame | None] = map_bounded(_fetch_window, windows)
+
+        # Reports of windows that failed are kept from the previous refresh
+        report_dates = calendar_df.index.get_level_values("date")
+        replaced: np.ndarray = np.zeros(len(calendar_df), dtype=bool)
+        for (window_start, window_end), window_df in zip(windows, window_dfs):
+            if window_df is not None:
+                replaced |= (report_dates >= pd.Timestamp(window_start)) & (
+                    report_dates <= pd.Timestamp(window_end)
+                )
+        kept_df: pd.DataFrame = calendar_df[
+            ~replaced & (report_dates >= pd.Timestamp(start))
+        ]
+
+        fetched_df: pd.DataFrame = pd.concat(
+            [window_df for window_df in window_dfs if window_df is not None]
+            or [_empty_calendar().reset_index()],
+            ignore_index=True,
+        )
+        listed: pd.Index = get_static_company_data().index
+        fetched_df = fetched_df[fetched_df["symbol"].isin(listed)]
+
+        calendar_df = pd.concat(
+            [kept_df, fetched_df.set_index(["symbol", "date"])]
+        ).sort_index()
+        calendar_df = calendar_df[~calendar_df.index.duplicated(keep="last")]
+
+        # Windows that failed are fetched again by the next refresh
+        refetch_from: date = min(
+            [today - timedelta(days=REFETCH_DAYS)]
+            + [
+                window_start
+                for (window_start, _), window_df in zip(windows, window_dfs)
+                if window_df is None
+            ]
+        )
+        _write_calendar(calendar_df, start, refetch_from)
+
+        with _calendar_lock:
+            _calendar_df = calendar_df
+
+    logging.info("Earnings calendar has %d reports", len(calendar_df))
+    return calendar_df
+
+
+def get_earnings_calendar() -> pd.DataFrame:
+    """Stored calendar indexed by symbol and date without calling Finnhub.
+
+    Empty until the first `refresh_earnings_calendar`. Do not modify the
+    returned DataFrame.
+    """
+    global _calendar_df
+
+    with _calendar_lock:
+        if _calendar_df is None:
+            _calendar_df = _read_calendar()[0]
+        return _calendar_df
+
+
+def get_earnings_history(symbol: str) -> pd.DataFrame | None:
+    """Past and scheduled reports of one company.
+
+    Args:
+        symbol: Company stock symbol.
+
+    Returns:
+        Reports sorted by date with a `date` column, or None if the symbol is
+        not in the calendar.
+    """
+    try:
+        # Binary search of the sorted index
+        return get_earnings_calendar().loc[symbol.upper()].reset_index()
+    except KeyError:
+        return None
+
+
+def get_next_earnings_dates(symbols: Iterable[str]) -> pd.Series:
+    """Date of the next scheduled report of many companies.
+
+    Args:
+        symbols: Company stock symbols.
+
+    Returns:
+        Report dates indexed by symbol, NaT where none is scheduled.
+    """
+    calendar_df: pd.DataFrame = get_earnings_calendar()
+    report_dates = calendar_df.index.get_level_values("date")
+    upcoming = report_dates >= pd.Timestamp(datetime.now().date())
+
+    return (
+        pd.Series(report_dates[upcoming], index=calendar_df.index[upcoming])
+        .groupby(level="symbol", observed=True)
+        .min()
+        .reindex([symbol.upper() for symbol in symbols])
+    )
+
+
+def _fetch_window(window: tuple[date, date]) -> pd.DataFrame:
+    """Reports of all companies between two dates, both included."""
+    window_start, window_end = window
+    response: requests.Response = http_client.get(
+        CALENDAR_URL,
+        endpoint="calendar/earnings",
+        params={
+            "from": window_start.isoformat(),
+            "to": window_end.isoformat(),
+            "token": st.secrets.get("finnhub", {}).get("apikey", ""),
+        },
+    )
+    return _to_calendar(
+        pd.DataFrame(
+            response.json().get("earningsCalendar") or [], columns=CALENDAR_COLUMNS
+        )
+    )
+
+
+def _to_calendar(window_df: pd.DataFrame) -> pd.DataFrame:
+    """Calendar columns with the same types whether or not values are null."""
+    window_df[NUMERIC_COLUMNS] = window_df[NUMERIC_COLUMNS].apply(
+        pd.to_numeric, errors="coerce"
+    ).astype("float64")
+    return to_typed(window_df, date_columns={"date": "%Y-%m-%d"})
+
+
+def _get_windows(start: date, end: date) -> list[tuple[date, date]]:
+    """Consecutive ranges of `WINDOW_DAYS` covering start to end."""
+    starts = pd.date_range(start, end, freq=f"{WINDOW_DAYS}D").date
+    return [
+        (window_start, min(end, window_start + timedelta(days=WINDOW_DAYS - 1)))
+        for window_start in starts
+    ]
+
+
+def _empty_calendar() -> pd.DataFrame:
+    return _to_calendar(pd.DataFrame(columns=CALENDAR_COLUMNS)).set_index(
+        ["symbol", "date"]
+    )
+
+
+def _get_paths() -> tuple[Path, Path]:
+    """Parquet table and JSON metadata file of the calendar."""
+    return (
+        get_data_dir() / "earnings_calendar.parquet",
+        get_data_dir() / "earnings_calendar.json",
+    )
+
+
+def _read_calendar() -> tuple[pd.DataFrame, dict]:
+    """Stored calendar and metadata, or empty if never refreshed."""
+    data_path, meta_path = _get_paths()
+    if not (data_path.exists() and meta_path.exists()):
+        return _empty_calendar(), {}
+
+    return pd.read_parquet(data_path), json.loads(meta_path.read_text())
+
+
+def _write_calendar(
+    calendar_df: pd.DataFrame, covered_from: date, refetch_from: date
+) -> None:
+    """Replace the stored calendar.
+
+    Args:
+        calendar_df: Whole calendar indexed by symbol and date.
+        covered_from: First date of the stored reports.
+        refetch_from: First date the next refresh fetches again.
+    """
+    data_path, meta_path = _get_paths()
+    meta: dict = {
+        "start": covered_from.isoformat(),
+        "refetch_from": refetch_from.isoformat(),
+        "fetched_at": time.time(),
+    }
+
+    replace_file(data_path, calendar_df.to_parquet)
+    replace_file(meta_path, lambda path: Path(path).write_text(json.dumps(meta)))
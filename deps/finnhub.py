@@ -7,28 +7,42 @@ import pandas as pd
 import requests
 import streamlit as st
 
+from deps.common import http_client
+from deps.common.metrics import tracked_cache_data
+from deps.earnings_calendar import get_earnings_history
 
-FINNHUB_KEY: str = st.secrets.finnhub.apikey
+
+FINNHUB_URL: str = "https://finnhub.io/api/v1"
 
 logging.basicConfig(level=logging.DEBUG)
 
 
-@st.cache_data(show_spinner="Querying company data ...")
+def _get_api_key() -> str:
+    """Finnhub key from secrets. Not needed with the `local` backend."""
+    return st.secrets.get("finnhub", {}).get("apikey", "")
+
+
+# Full payloads are only read by `get_finnhub_company_metrics` which caches
+# the few values used, so few are kept.
+@tracked_cache_data(max_entries=32, show_spinner="Querying company data ...")
 def _call_finnhub_company_metrics(symbol: str) -> json:
     """Gets all metrics for company including historical prices."""
     try:
         logging.info("API call: Finnhub.io: Company overall metrics")
-        response: requests.Response = requests.get(
-            f"https://finnhub.io/api/v1/stock/metric?symbol={symbol}&metric=all&token={FINNHUB_KEY}",
-            timeout=st.secrets.api_config.timeout_seconds,
+        response: requests.Response = http_client.get(
+            f"{FINNHUB_URL}/stock/metric",
+            endpoint="stock/metric",
+            params={"symbol": symbol, "metric": "all", "token": _get_api_key()},
         )
         return response.json()
 
     except requests.HTTPError as he:
-        logging.error("Error: " + he)
+        # Raise so a rate limited or failed response is not cached
+        logging.error("Error: %s", he)
+        raise
 
 
-@st.cache_data(show_spinner="Query company metrics ...")
+@tracked_cache_data(show_spinner="Query company metrics ...")
 def get_finnhub_company_metrics(symbol: str) -> tuple[str, str, str, str]:
     symbol = symbol.upper()
 
@@ -44,31 +58,55 @@ def get_finnhub_company_metrics(symbol: str) -> tuple[str, str, str, str]:
     )
 
 
-@st.cache_data(show_spinner="Querying earnings results ...")
+def clear_company_metrics() -> None:
+    """Forget cached company metrics so the next calls fetch them again."""
+    get_finnhub_company_metrics.clear()
+    _call_finnhub_company_metrics.clear()
+
+
+@tracked_cache_data(show_spinner="Querying earnings results ...")
 def _get_finnhub_earnings_data(symbol: str) -> pd.DataFrame:
     """Call Finnhub to get last 4 earnings periods."""
     symbol = symbol.upper()
-    finnhub_df: pd.DataFrame = pd.read_json(
-        f"https://finnhub.io/api/v1/stock/earnings?symbol={symbol}&token={FINNHUB_KEY}"
+    logging.info("API call: Finnhub.io: Earnings")
+    response: requests.Response = http_client.get(
+        f"{FINNHUB_URL}/stock/earnings",
+        endpoint="stock/earnings",
+        params={"symbol": symbol, "token": _get_api_key()},
     )
+    finnhub_df: pd.DataFrame = pd.DataFrame(response.json())
     return finnhub_df
 
 
-@st.cache_data(show_spinner="Calculating earnings results ...")
 def get_finnhub_earnings_surprises(symbol: str, days_ago: int = 365) -> pd.DataFrame:
     """Return DataFrame with earnings dates and results.
 
-    Also returns next 4 earnings calls. The limit includes the next 4 earnings
-    as the latest 4 entries.
+    Sliced from the local earnings calendar which also has scheduled
+    earnings calls with estimates only. Companies not in the calendar are
+    called one at a time for their last 4 earnings periods.
     """
-    finnhub_df: pd.DataFrame = _get_finnhub_earnings_data(symbol)
+    history_df: pd.DataFrame | None = get_earnings_history(symbol)
+    if history_df is None:
+        finnhub_df: pd.DataFrame = _get_finnhub_earnings_data(symbol)
+    else:
+        finnhub_df = pd.DataFrame(
+            {
+                "estimate": history_df["epsEstimate"],
+                "actual": history_df["epsActual"],
+                # No surprise percent against a zero estimate
+                "surprisePercent": (history_df["epsActual"] - history_df["epsEstimate"])
+                / history_df["epsEstimate"].abs().where(history_df["epsEstimate"] != 0)
+                * 100,
+                "period": history_df["date"].dt.strftime("%Y-%m-%d"),
+            }
+        )
 
     diff_date: datetime = datetime.datetime.now() - datetime.timedelta(days=days_ago)
     earliest_earnings_date: str = diff_date.strftime("%Y-%m-%d")
 
-    finnhub_dated_df = finnhub_df[finnhub_df["period"] >= earliest_earnings_date]
-
-    finnhub_dated_df.sort_values(by=["quarter"], ascending=False, inplace=True)
+    finnhub_dated_df = finnhub_df[
+        finnhub_df["period"] >= earliest_earnings_date
+    ].sort_values(by=["period"], ascending=False)
     result_df = finnhub_dated_df[
         ["estimate", "actual", "surprisePercent", "period"]
     ].rename(
@@ -83,7 +121,7 @@ def get_finnhub_earnings_surprises(symbol: str, days_ago: int = 365) -> pd.DataF
     return result_df.reset_index(drop=True)
 
 
-@st.cache_data(show_spinner="Querying competitor data ...")
+@tracked_cache_data(show_spinner="Querying competitor data ...")
 def get_company_competitors(symbol: str) -> pd.Series:
     """Get list of peers of a given company.
 
@@ -98,12 +136,13 @@ def get_company_competitors(symbol: str) -> pd.Series:
     result = None
     try:
         logging.info("API call: Finnhub.io: Company competitors")
-        response: requests.Response = requests.get(
-            f"https://finnhub.io/api/v1/stock/peers?symbol={symbol}&token={FINNHUB_KEY}",
-            timeout=st.secrets.api_config.timeout_seconds,
+        response: requests.Response = http_client.get(
+            f"{FINNHUB_URL}/stock/peers",
+            endpoint="stock/peers",
+            params={"symbol": symbol, "token": _get_api_key()},
         )
         result: json = json.loads(response.content)
     except requests.HTTPError as he:
-        logging.error("Error: " + he)
+        logging.error("Error: %s", he)
 
     return pd.Series(result)
@@ -5,19 +5,28 @@ import pandas as pd
 import streamlit as st
 import requests
 
-FMG_KEY: str = st.secrets.financial_model_prep.apikey
+from deps.common import http_client
+from deps.common.metrics import tracked_cache_data
+
+FMP_URL: str = "https://financialmodelingprep.com/api/v3"
+
+
+def _get_api_key() -> str:
+    """FinancialModelingPrep key from secrets. Not needed with `local` backend."""
+    return st.secrets.get("financial_model_prep", {}).get("apikey", "")
 
 
 def get_earnings_surprises_fmp(symbol: str) -> pd.DataFrame:
     """Return DataFrame with expected and actual earnings results."""
-    url = f"https://financialmodelingprep.com/api/v3/earnings-surprises/{symbol}?apikey={apikey}"
-    response = requests.Response = requests.get(
-        url, timeout=st.secrets.api_config.timeout_seconds
+    response: requests.Response = http_client.get(
+        f"{FMP_URL}/earnings-surprises/{symbol}",
+        endpoint="earnings-surprises",
+        params={"apikey": _get_api_key()},
     )
     return pd.json_normalize(response.json())
 
 
-@st.cache_data(show_spinner="Finding biggest drops in market ...")
+@tracked_cache_data(show_spinner="Finding biggest drops in market ...")
 def get_top_losing(percent_threshold: float) -> pd.DataFrame:
     """Return stocks with largest drops from open to close price.
 
@@ -29,10 +38,10 @@ def get_top_losing(percent_threshold: float) -> pd.DataFrame:
         exchangeShortName.
     """
     logging.info("API call: top drops")
-    response: requests.Response = requests.get(
-        "https://financialmodelingprep.com/api/v3/stock_market/losers?"
-        + f"apikey={FMG_KEY}",
-        timeout=st.secrets.api_config.timeout_seconds,
+    response: requests.Response = http_client.get(
+        f"{FMP_URL}/stock_market/losers",
+        endpoint="stock_market/losers",
+        params={"apikey": _get_api_key()},
     )
     response_df = pd.json_normalize(response.json())
     return response_df[response_df["changesPercentage"] < percent_threshold * -100]
@@ -50,9 +59,63 @@ def get_company_metrics_fmp(symbol: str) -> pd.DataFrame:
     Returns:
         DataFrame of results.
     """
-    response = requests.Response = requests.get(
-        "https://financialmodelingprep.com/api/v3/income-statement/"
-        + f"{symbol.upper()}?limit=120&period=quarter&apikey={FMG_KEY}",
-        timeout=st.secrets.api_config.timeout_seconds,
+    response: requests.Response = http_client.get(
+        f"{FMP_URL}/income-statement/{symbol.upper()}",
+        endpoint="income-statement",
+        params={"limit": 120, "period": "quarter", "apikey": _get_api_key()},
     )
     return pd.json_normalize(response.json())
+
+
+# Profile fields renamed to the Yahoo Finance names used by pages
+PROFILE_COLUMNS: dict[str, str] = {
+    "symbol": "symbol",
+    "companyName": "longName",
+    "mktCap": "marketCap",
+    "price": "previousClose",
+    "industry": "industry",
+    "sector": "sector",
+    "description": "longBusinessSummary",
+    "fullTimeEmployees": "fullTimeEmployees",
+    "address": "address1",
+    "city": "city",
+    "state": "state",
+    "country": "country",
+    "website": "website",
+}
+
+
+@tracked_cache_data(show_spinner="Querying company data ...")
+def get_company_profile_fmp(symbol: str) -> pd.DataFrame:
+    """Company details in the columns of `yahoo.get_company_yahoo`.
+
+    Ratios such as `trailingPE` are not in the profile and are left out.
+
+    Args:
+        symbol: Company stock symbol.
+
+    Returns:
+        One row DataFrame, empty if the symbol is unknown or the call failed.
+    """
+    result_df: pd.DataFrame = pd.DataFrame()
+
+    try:
+        logging.info("API call: FMP: Company profile")
+        response: requests.Response = http_client.get(
+            f"{FMP_URL}/profile/{symbol.upper()}",
+            endpoint="profile",
+            params={"apikey": _get_api_key()},
+        )
+        profile_df: pd.DataFrame = pd.json_normalize(response.json())
+        result_df = profile_df.reindex(columns=list(PROFILE_COLUMNS)).rename(
+            columns=PROFILE_COLUMNS
+        )
+        result_df["shortName"] = result_df["longName"]
+        if not result_df.empty:
+            result_df["fullTimeEmployees"] = pd.to_numeric(
+                result_df["fullTimeEmployees"], errors="coerce"
+            )
+    except Exception as e:
+        logging.error(e)
+
+    return result_df
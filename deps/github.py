@@ -1,17 +1,49 @@
 """Get data from GitHub."""
 
+from io import StringIO
 import logging
 
+import requests
 import streamlit as st
 import pandas as pd
 
+from deps.common.snapshot import BackgroundSnapshot, to_typed
 
-@st.cache_data(show_spinner="Getting static data ...")
-def get_static_company_data() -> pd.DataFrame:
-    """Get stock data."""
-    logging.info("API call: us_tickers.csv")
-    csv_df: pd.DataFrame = pd.read_csv(
-        "https://raw.githubusercontent.com/xcollantes/stock_analysis_dataset/main/us_tickers.csv"
+
+# Age of local us_tickers.csv copy before it is refreshed in the background
+REFRESH_TTL_SECONDS: int = 24 * 60 * 60
+
+
+def _parse_us_tickers(response: requests.Response) -> pd.DataFrame:
+    """Typed company data with a sorted unique `symbol` index."""
+    csv_df: pd.DataFrame = pd.read_csv(StringIO(response.text))
+    csv_df = to_typed(csv_df, category_columns=["type", "sector", "industry"])
+
+    return (
+        csv_df.dropna(subset=["symbol"])
+        .drop_duplicates(subset=["symbol"])
+        .set_index("symbol")
+        .sort_index()
     )
 
-    return csv_df
+
+# One copy per process shared by all sessions
+_static_company_snapshot = BackgroundSnapshot(
+    "us_tickers",
+    "https://raw.githubusercontent.com/xcollantes/stock_analysis_dataset/main/us_tickers.csv",
+    _parse_us_tickers,
+    ttl_seconds=REFRESH_TTL_SECONDS,
+)
+
+
+def get_static_company_data() -> pd.DataFrame:
+    """Get stock data indexed by symbol.
+
+    The DataFrame is shared by all sessions; do not modify it.
+    """
+    if _static_company_snapshot.is_loaded:
+        return _static_company_snapshot.get()
+
+    logging.info("API call: us_tickers.csv")
+    with st.spinner("Getting static data ..."):
+        return _static_company_snapshot.get()
@@ -0,0 +1,535 @@
+"""Technical indicators of daily closes of one or many symbols.
+
+Every indicator is computed on a DataFrame of closes with one column per
+symbol so all symbols are computed at once. Results are kept per symbol and
+indicator with the date and close of the last bar. When a symbol gets new
+bars only the new rows are computed, with NumPy:
+    Rolling indicators are computed again from just enough earlier bars to
+        fill their window.
+    Recursive indicators such as EMA and RSI carry on from their values at
+        the last bar.
+New rows are written after the kept rows in place while there is room, so an
+update does not copy the history. Kept rows are trimmed to `MAX_MEMO_BARS`
+when they are copied to a larger buffer.
+A changed close at the last bar, such as after a dividend adjusted history,
+computes the symbol again from the start.
+"""
+
+from collections import OrderedDict
+from datetime import date, timedelta
+import threading
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
+
+from deps.common.concurrency import map_bounded
+from deps.common.metrics import register_store
+from deps.price_store import get_daily_history
+
+
+# Trading days per year to annualize volatility
+TRADING_DAYS: int = 252
+
+# Results kept per symbol and indicator, least recently used evicted first.
+# Enough for every default indicator of about 1,300 symbols.
+MAX_MEMO_ENTRIES: int = 8192
+
+# Bars kept per result when trimmed, unless a request needs more. Ten years
+# of daily bars with the longest warmup.
+MAX_MEMO_BARS: int = 4096
+
+# Least spare rows after the last bar so new bars are written in place
+MIN_SPARE_BARS: int = 32
+
+
+# Recursive indicator values at the last bar by name, one value per symbol
+State = dict[str, np.ndarray]
+
+
+class IndicatorKind(NamedTuple):
+    """How to compute one kind of indicator.
+
+    Attributes:
+        title: Name shown on charts.
+        compute: Takes closes with one column per symbol and the window, and
+            returns values of every row and the state at the last row.
+        extend: Takes closes as an array from `lookback` rows before the
+            first new row, the window and the state at the row before the
+            first new row, and returns values of at least the new rows,
+            last rows last, and the state at the last row. Same values as
+            `compute`.
+        lookback: Bars before the first new bar needed to extend values, as
+            a function of the window. One for recursive indicators which
+            carry on from their state at the last bar.
+        warmup: Bars before the first shown bar for values to settle, as a
+            function of the window.
+        price_scale: Whether values are prices drawn on the price axis.
+        y_format: d3 format of values on charts.
+    """
+
+    title: str
+    compute: Callable[[pd.DataFrame, int], tuple[pd.DataFrame, State]]
+    extend: Callable[[np.ndarray, int, State], tuple[np.ndarray, State]]
+    lookback: Callable[[int], int]
+    warmup: Callable[[int], int]
+    price_scale: bool
+    y_format: str
+
+
+class Indicator(NamedTuple):
+    """Kind of indicator in `INDICATOR_KINDS` and its window in bars."""
+
+    kind: str
+    window: int
+
+    @property
+    def label(self) -> str:
+        return f"{INDICATOR_KINDS[self.kind].title} {self.window}"
+
+
+class _Buffer:
+    def __init__(self, dates: np.ndarray, values: np.ndarray) -> None:
+        """Indicator values of symbols computed together, with spare rows.
+
+        Rows before `length` never change, so memos of different lengths
+        share one buffer and new bars are written after the last row in
+        place until the spare rows run out.
+
+        Args:
+            dates: Nanoseconds since the epoch of each row.
+            values: Rows of each date with one column per symbol.
+        """
+        length: int = len(dates)
+        capacity: int = length + max(MIN_SPARE_BARS, length // 8)
+        self.dates: np.ndarray = np.empty(capacity, dtype="int64")
+        self.values: np.ndarray = np.empty((capacity, values.shape[1]))
+        self.dates[:length] = dates
+        self.values[:length] = values
+        self.length: int = length
+
+
+class _Memo(NamedTuple):
+    """Indicator values of one symbol up to its last bar.
+
+    Symbols computed together share a buffer so they are updated together
+    next time.
+    """
+
+    buffer: _Buffer
+    column: int
+    length: int
+    last_close: float
+    state: dict[str, float]
+
+
+def _windows(values: np.ndarray, window: int) -> np.ndarray:
+    """Each row's `window` rows up to it on a last axis, from row `window`."""
+    return sliding_window_view(values, window, axis=0)
+
+
+def _sma(closes: pd.DataFrame, window: int) -> tuple[pd.DataFrame, State]:
+    """Simple moving average of the last `window` closes."""
+    return closes.rolling(window).mean(), {}
+
+
+def _extend_sma(
+    closes: np.ndarray, window: int, state: State
+) -> tuple[np.ndarray, State]:
+    return _windows(closes, window).mean(axis=-1), {}
+
+
+def _ema(closes: pd.DataFrame, window: int) -> tuple[pd.DataFrame, State]:
+    """Exponential moving average with a span of `window` closes."""
+    ema: pd.DataFrame = closes.ewm(
+        span=window, adjust=False, ignore_na=True, min_periods=window
+    ).mean()
+    return ema, {"ema": ema.iloc[-1].to_numpy()}
+
+
+def _extend_ema(
+    closes: np.ndarray, window: int, state: State
+) -> tuple[np.ndarray, State]:
+    alpha: float = 2 / (window + 1)
+    ema: np.ndarray = state["ema"]
+    values: np.ndarray = np.empty((len(closes) - 1, closes.shape[1]))
+    for row, close in enumerate(closes[1:]):
+        ema = np.where(np.isnan(close), ema, ema + alpha * (close - ema))
+        values[row] = ema
+    return values, {"ema": ema}
+
+
+def _volatility(closes: pd.DataFrame, window: int) -> tuple[pd.DataFrame, State]:
+    """Annualized standard deviation of daily log returns."""
+    returns: pd.DataFrame = np.log(closes / closes.shift(1))
+    return returns.rolling(window).std() * np.sqrt(TRADING_DAYS), {}
+
+
+def _extend_volatility(
+    closes: np.ndarray, window: int, state: State
+) -> tuple[np.ndarray, State]:
+    returns: np.ndarray = np.log(closes[1:] / closes[:-1])
+    return _windows(returns, window).std(axis=-1, ddof=1) * np.sqrt(TRADING_DAYS), {}
+
+
+def _max_drawdown(closes: pd.DataFrame, window: int) -> tuple[pd.DataFrame, State]:
+    """Largest fall from a high within the last `window` closes.
+
+    Negative fraction of the high. Highs are also looked for in the
+    `window` closes before each fall.
+    """
+    drawdown: pd.DataFrame = closes / closes.rolling(window, min_periods=1).max() - 1
+    return drawdown.rolling(window, min_periods=1).min(), {}
+
+
+def _extend_max_drawdown(
+    closes: np.ndarray, window: int, state: State
+) -> tuple[np.ndarray, State]:
+    # Like pandas, NaN closes are skipped by fmax and fmin
+    highs: np.ndarray = np.fmax.reduce(_windows(closes, window), axis=-1)
+    drawdown: np.ndarray = closes[window - 1 :] / highs - 1
+    return np.fmin.reduce(_windows(drawdown, window), axis=-1), {}
+
+
+def _rsi(closes: pd.DataFrame, window: int) -> tuple[pd.DataFrame, State]:
+    """Relative strength index from Wilder's averages of gains and losses."""
+    changes: pd.DataFrame = closes.diff()
+    average_gain: pd.DataFrame = (
+        changes.clip(lower=0)
+        .ewm(alpha=1 / window, adjust=False, ignore_na=True, min_periods=window)
+        .mean()
+    )
+    average_loss: pd.DataFrame = (
+        (-changes.clip(upper=0))
+        .ewm(alpha=1 / window, adjust=False, ignore_na=True, min_periods=window)
+        .mean()
+    )
+
+    rsi: pd.DataFrame = 100 - 100 / (1 + average_gain / average_loss)
+    return rsi, {
+        "gain": average_gain.iloc[-1].to_numpy(),
+        "loss": average_loss.iloc[-1].to_numpy(),
+    }
+
+
+def _extend_rsi(
+    closes: np.ndarray, window: int, state: State
+) -> tuple[np.ndarray, State]:
+    alpha: float = 1 / window
+    gain: np.ndarray = state["gain"]
+    loss: np.ndarray = state["loss"]
+    changes: np.ndarray = np.diff(closes, axis=0)
+    values: np.ndarray = np.empty_like(changes)
+    for row, change in enumerate(changes):
+        traded: np.ndarray = ~np.isnan(change)
+        gain = np.where(traded, gain + alpha * (np.fmax(change, 0) - gain), gain)
+        loss = np.where(traded, loss + alpha * (np.fmax(-change, 0) - loss), loss)
+        values[row] = 100 - 100 / (1 + gain / loss)
+    return values, {"gain": gain, "loss": loss}
+
+
+INDICATOR_KINDS: dict[str, IndicatorKind] = {
+    "sma": IndicatorKind(
+        "SMA",
+        _sma,
+        _extend_sma,
+        lambda window: window,
+        lambda window: window,
+        True,
+        "$.2f",
+    ),
+    "ema": IndicatorKind(
+        "EMA",
+        _ema,
+        _extend_ema,
+        lambda window: 1,
+        lambda window: 3 * window,
+        True,
+        "$.2f",
+    ),
+    "volatility": IndicatorKind(
+        "Volatility",
+        _volatility,
+        _extend_volatility,
+        lambda window: window + 1,
+        lambda window: window + 1,
+        False,
+        ".1%",
+    ),
+    "max_drawdown": IndicatorKind(
+        "Max drawdown",
+        _max_drawdown,
+        _extend_max_drawdown,
+        lambda window: 2 * window,
+        lambda window: 2 * window,
+        False,
+        ".1%",
+    ),
+    "rsi": IndicatorKind(
+        "RSI",
+        _rsi,
+        _extend_rsi,
+        lambda window: 1,
+        lambda window: 3 * window,
+        False,
+        ".0f",
+    ),
+}
+
+# Choices offered on the Stock symbol page
+DEFAULT_INDICATORS: list[Indicator] = [
+    Indicator("sma", 50),
+    Indicator("sma", 200),
+    Indicator("ema", 20),
+    Indicator("volatility", 20),
+    Indicator("max_drawdown", 252),
+    Indicator("rsi", 14),
+]
+
+# Results updated in place as new bars arrive
+_memo: OrderedDict[tuple[str, Indicator], _Memo] = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def get_indicators(
+    symbols: Iterable[str], indicators: Iterable[Indicator], start: date
+) -> pd.DataFrame:
+    """Indicators of daily closes of many symbols from the local price store.
+
+    Args:
+        symbols: Company stock symbols.
+        indicators: Indicators to compute.
+        start: First calendar day of values. Closes from before it are read
+            so the first values are already settled.
+
+    Returns:
+        Values indexed by date with a (symbol, indicator label) column for
+        every symbol with price history.
+    """
+    indicators = list(indicators)
+    if not indicators:
+        return pd.DataFrame()
+
+    symbols = [symbol.upper() for symbol in symbols]
+    warmup_bars: int = max(
+        (INDICATOR_KINDS[kind].warmup(window) for kind, window in indicators),
+        default=0,
+    )
+    # Calendar days holding the bars, with room for holidays
+    history_start: date = start - timedelta(days=warmup_bars * 7 // 5 + 10)
+
+    histories: list[pd.DataFrame | None] = map_bounded(
+        lambda symbol: get_daily_history(symbol, history_start), symbols
+    )
+    closes: dict[str, pd.Series] = {
+        symbol: history["Close"]
+        for symbol, history in zip(symbols, histories)
+        if history is not None and not history.empty
+    }
+    if not closes:
+        return pd.DataFrame()
+
+    closes_df: pd.DataFrame = pd.DataFrame(closes)
+    values: dict[Indicator, pd.DataFrame] = compute_indicators(closes_df, indicators)
+
+    indicators_df: pd.DataFrame = pd.concat(
+        {
+            (symbol, indicator.label): values[indicator][symbol]
+            for symbol in closes_df.columns
+            for indicator in indicators
+        },
+        axis=1,
+    )
+    indicators_df.columns.names = ["symbol", None]
+    return indicators_df[
+        indicators_df.index >= pd.Timestamp(start, tz=indicators_df.index.tz)
+    ]
+
+
+def compute_indicators(
+    closes_df: pd.DataFrame, indicators: Iterable[Indicator]
+) -> dict[Indicator, pd.DataFrame]:
+    """Indicators of closes, only computing bars not computed before.
+
+    Args:
+        closes_df: Daily closes indexed by date with one column per symbol.
+        indicators: Indicators to compute.
+
+    Returns:
+        Values of each indicator with the index and columns of `closes_df`.
+        Do not modify them.
+    """
+    return {indicator: _update(closes_df, indicator) for indicator in indicators}
+
+
+def clear_indicators() -> None:
+    """Forget every computed indicator."""
+    with _memo_lock:
+        _memo.clear()
+
+
+def _get_memos() -> list[np.ndarray]:
+    with _memo_lock:
+        return [memo.buffer.values for memo in _memo.values()]
+
+
+register_store("deps.indicators._memo", _get_memos, clear_indicators, MAX_MEMO_ENTRIES)
+
+
+def _update(closes_df: pd.DataFrame, indicator: Indicator) -> pd.DataFrame:
+    """One indicator of every symbol from results of earlier bars if any."""
+    kind: IndicatorKind = INDICATOR_KINDS[indicator.kind]
+    window: int = indicator.window
+    dates: np.ndarray = closes_df.index.asi8
+    closes: np.ndarray = closes_df.to_numpy(dtype="float64")
+    symbols: list[str] = list(closes_df.columns)
+
+    with _memo_lock:
+        memos: list[_Memo | None] = [_memo.get((symbol, indicator)) for symbol in symbols]
+
+    # Columns of symbols last computed together
+    groups: dict[tuple[int, int], list[int]] = {}
+    full: list[int] = []
+    for column, memo in enumerate(memos):
+        if memo is None:
+            full.append(column)
+        else:
+            groups.setdefault((id(memo.buffer), memo.length), []).append(column)
+
+    result: np.ndarray = np.full(closes.shape, np.nan)
+    new_memos: dict[int, _Memo] = {}
+
+    for columns in groups.values():
+        buffer: _Buffer = memos[columns[0]].buffer
+        length: int = memos[columns[0]].length
+        last_date: int = buffer.dates[length - 1]
+        position: int = int(np.searchsorted(dates, last_date))
+        lookback: int = kind.lookback(window)
+        if (
+            buffer.dates[0] > dates[0]
+            or position == len(dates)
+            or dates[position] != last_date
+            or position + 1 < lookback
+        ):
+            full.extend(columns)
+            continue
+
+        # Same close at the last bar, else history was adjusted since. A
+        # recursive indicator with no value yet starts again too.
+        current: np.ndarray = closes[position, columns] == np.array(
+            [memos[column].last_close for column in columns]
+        )
+        for name in memos[columns[0]].state:
+            current &= ~np.isnan([memos[column].state[name] for column in columns])
+        full.extend(np.array(columns)[~current].tolist())
+        columns = np.array(columns)[current].tolist()
+        if not columns:
+            continue
+
+        buffer_columns: np.ndarray = np.array(
+            [memos[column].column for column in columns]
+        )
+        new: int = len(dates) - position - 1
+        if new:
+            new_values, state = kind.extend(
+                closes[position + 1 - lookback :, columns],
+                window,
+                {
+                    name: np.array([memos[column].state[name] for column in columns])
+                    for name in memos[columns[0]].state
+                },
+            )
+            keep_from: int = max(
+                0,
+                min(
+                    length + new - MAX_MEMO_BARS,
+                    int(np.searchsorted(buffer.dates[:length], dates[0])),
+                ),
+            )
+            buffer, buffer_columns, length = _append(
+                buffer,
+                length,
+                buffer_columns,
+                keep_from,
+                dates[position + 1 :],
+                new_values[-new:],
+            )
+            for offset, column in enumerate(columns):
+                new_memos[column] = _Memo(
+                    buffer,
+                    buffer_columns[offset],
+                    length,
+                    closes[-1, column],
+                    {name: values[offset] for name, values in state.items()},
+                )
+
+        offset: int = length - len(dates)
+        if offset >= 0 and np.array_equal(buffer.dates[offset:length], dates):
+            result[:, columns] = buffer.values[offset:length, buffer_columns]
+        else:
+            # Kept dates missing from the request, such as days other
+            # symbols computed together traded on
+            rows: np.ndarray = np.minimum(
+                np.searchsorted(dates, buffer.dates[:length]), len(dates) - 1
+            )
+            found: np.ndarray = (dates[rows] == buffer.dates[:length]).nonzero()[0]
+            result[np.ix_(rows[found], columns)] = buffer.values[
+                np.ix_(found, buffer_columns)
+            ]
+
+    if full:
+        full_df, state = kind.compute(closes_df.iloc[:, full], window)
+        full_values: np.ndarray = full_df.to_numpy()
+        result[:, full] = full_values
+        buffer = _Buffer(dates, full_values)
+        for offset, column in enumerate(full):
+            new_memos[column] = _Memo(
+                buffer,
+                offset,
+                len(dates),
+                closes[-1, column],
+                {name: values[offset] for name, values in state.items()},
+            )
+
+    with _memo_lock:
+        for column, memo in new_memos.items():
+            _memo[(symbols[column], indicator)] = memo
+        for symbol in symbols:
+            if (symbol, indicator) in _memo:
+                _memo.move_to_end((symbol, indicator))
+        while len(_memo) > MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+
+    return pd.DataFrame(result, index=closes_df.index, columns=closes_df.columns)
+
+
+def _append(
+    buffer: _Buffer,
+    length: int,
+    columns: np.ndarray,
+    keep_from: int,
+    dates: np.ndarray,
+    values: np.ndarray,
+) -> tuple[_Buffer, np.ndarray, int]:
+    """Add rows after the first `length` rows of some columns of a buffer.
+
+    Rows are written in place if no other update has written past `length`
+    and there is room. Otherwise the rows from `keep_from` of the columns
+    are copied to a new buffer with the new rows.
+
+    Returns:
+        Buffer holding the rows, the columns in it and its rows.
+    """
+    with _memo_lock:
+        if buffer.length == length and length + len(dates) <= len(buffer.dates):
+            buffer.dates[length : length + len(dates)] = dates
+            buffer.values[length : length + len(dates), columns] = values
+            buffer.length += len(dates)
+            return buffer, columns, buffer.length
+
+    new_buffer = _Buffer(
+        np.concatenate([buffer.dates[keep_from:length], dates]),
+        np.concatenate([buffer.values[keep_from:length, columns], values]),
+    )
+    return new_buffer, np.arange(len(columns)), new_buffer.length
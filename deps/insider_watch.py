@@ -1,88 +1,189 @@
 """Calls to get data for insider trading."""
 
 from datetime import date, timedelta
+import logging
 import pandas as pd
 import requests
 import streamlit as st
 
-
-@st.cache_data(show_spinner="Querying House transactions ...")
-def _get_ticker_transactions_house(symbol: str) -> pd.DataFrame:
-    """Get House Watcher data for all symbols."""
-    symbol: str = symbol.upper()
-
-    house_response = requests.get(
+from deps.common.metrics import tracked_cache_data, tracked_cache_resource
+from deps.common.snapshot import load_snapshot, to_typed
+
+# How often the source files are checked for changes
+REFRESH_TTL: str = "6h"
+
+# Using last 2 years
+# Members are required to file 60 days
+# https://ethics.house.gov/financial-dislosure/specific-disclosure-requirements
+TRADES_WINDOW_DAYS: int = 600
+
+HOUSE_TRADE_COLUMNS: list[str] = [
+    "disclosure_date",
+    "transaction_date",
+    "owner",
+    "representative",
+    "district",
+    "state",
+    "asset_description",
+    "type",
+    "amount",
+    "party",
+    "sector",
+]
+
+SENATE_TRADE_COLUMNS: list[str] = [
+    "transaction_date",
+    "owner",
+    "senator",
+    "type",
+    "amount",
+    "party",
+    "sector",
+    "asset_type",
+    "comment",
+]
+
+
+# Resource cache keeps one shared copy instead of a copy per caller; do not
+# modify the returned DataFrame.
+@tracked_cache_resource(
+    ttl=REFRESH_TTL, max_entries=1, show_spinner="Querying House transactions ..."
+)
+def _get_transactions_house() -> pd.DataFrame:
+    """Get House Watcher data for all symbols indexed by ticker."""
+    logging.info("API call: House Stock Watcher: all transactions")
+    return load_snapshot(
+        "house_transactions",
         "https://house-stock-watcher-data.s3-us-west-2.amazonaws.com/data/all_transactions.json",
-        timeout=5,
+        _parse_house,
     )
 
-    return pd.json_normalize(house_response.json())
 
+@tracked_cache_resource(
+    ttl=REFRESH_TTL, max_entries=1, show_spinner="Querying Senate transactions ..."
+)
+def _get_transactions_senate() -> pd.DataFrame:
+    """Get Senate Watcher data for all symbols indexed by ticker.
 
-@st.cache_data(show_spinner="Querying Senate transactions ...")
-def _get_ticker_transactions_senate(symbol: str) -> pd.DataFrame:
-    """Get Senate Watcher data for all symbols."""
-    symbol: str = symbol.upper()
-    senate_response = requests.get(
+    Each transaction is one row rather than one row per ticker.
+    """
+    logging.info("API call: Senate Stock Watcher: all ticker transactions")
+    return load_snapshot(
+        "senate_transactions",
         "https://senate-stock-watcher-data.s3-us-west-2.amazonaws.com/aggregate/all_ticker_transactions.json",
-        timeout=5,
+        _parse_senate,
+    )
+
+
+def _parse_house(response: requests.Response) -> pd.DataFrame:
+    """Typed House transactions from House Watcher JSON."""
+    df: pd.DataFrame = pd.json_normalize(response.json())
+    df = to_typed(
+        df,
+        date_columns={"transaction_date": "%Y-%m-%d", "disclosure_date": "%m/%d/%Y"},
+        category_columns=[
+            "owner",
+            "type",
+            "amount",
+            "district",
+            "state",
+            "party",
+            "industry",
+            "sector",
+        ],
     )
+    return _index_by_ticker(df)
+
+
+def _parse_senate(response: requests.Response) -> pd.DataFrame:
+    """Typed Senate transactions from Senate Watcher JSON grouped by ticker."""
+    df: pd.DataFrame = pd.json_normalize(
+        response.json(),
+        record_path="transactions",
+        meta=["ticker"],
+        meta_prefix="aggregate_",
+    )
+    df["ticker"] = df.pop("aggregate_ticker")
+    df = to_typed(
+        df,
+        date_columns={"transaction_date": None, "disclosure_date": None},
+        category_columns=[
+            "owner",
+            "type",
+            "amount",
+            "asset_type",
+            "state",
+            "party",
+            "industry",
+            "sector",
+        ],
+    )
+    return _index_by_ticker(df)
+
 
-    return pd.json_normalize(senate_response.json())
+def _index_by_ticker(df: pd.DataFrame) -> pd.DataFrame:
+    """Set sorted `ticker` index, dropping rows without a ticker."""
+    df = df.dropna(subset=["ticker"])
+    df = df.assign(ticker=df["ticker"].astype(str).str.upper())
+    return df.set_index("ticker").sort_index()
+
+
+def get_trades_window_start() -> date:
+    """First day of trades shown, `TRADES_WINDOW_DAYS` before today."""
+    return date.today() - timedelta(days=TRADES_WINDOW_DAYS)
+
+
+def _filter_trades(
+    df: pd.DataFrame, symbol: str, since: date, columns: list[str]
+) -> pd.DataFrame:
+    """Trades of one symbol after a date, newest first, in display columns."""
+    stock_df: pd.DataFrame = _get_ticker_rows(df, symbol.upper())
+    stock_df = stock_df[stock_df["transaction_date"] > pd.Timestamp(since)]
+
+    return (
+        stock_df.sort_values(by="transaction_date", ascending=False)[columns]
+        .reset_index(drop=True)
+    )
+
+
+def _get_ticker_rows(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Copy of rows for one symbol from a DataFrame with sorted ticker index.
+
+    Binary search on the index so a lookup costs O(log n + matches).
+    """
+    start: int = df.index.searchsorted(symbol, side="left")
+    stop: int = df.index.searchsorted(symbol, side="right")
+    return df.iloc[start:stop].reset_index()
 
 
-@st.cache_data(show_spinner="Querying insider House of Reps trading ...")
-def show_house_trades_dataframe(symbol: str) -> None:
-    """Use API for Representatives who trade stock in given time.
+@tracked_cache_data(ttl=REFRESH_TTL, show_spinner="Querying insider House of Reps trading ...")
+def get_house_trades(symbol: str, since: date) -> pd.DataFrame:
+    """Return House trades of a symbol made after a date, newest first.
 
     Use https://housestockwatcher.com for House of Representatives who
     trade a symbol.
+
+    Args:
+        symbol: Company stock symbol.
+        since: Only trades with a later transaction date are returned.
     """
-    st.write("### US House of Representatives trades")
+    return _filter_trades(
+        _get_transactions_house(), symbol, since, HOUSE_TRADE_COLUMNS
+    )
+
 
-    symbol: str = symbol.upper()
-    df = _get_ticker_transactions_house(symbol)
+def show_house_trades_dataframe(trades_df: pd.DataFrame) -> None:
+    """Render trades of a symbol by Representatives.
 
-    stock_df: pd.DataFrame = df[df["ticker"] == symbol].reset_index(drop=True)
+    Args:
+        trades_df: From `get_house_trades` since `get_trades_window_start()`.
+    """
+    st.write("### US House of Representatives trades")
 
-    if stock_df.empty:
+    if trades_df.empty:
         _show_no_trades()
     else:
-        stock_df["transaction_date"] = pd.to_datetime(
-            stock_df["transaction_date"], format="%Y-%m-%d", errors="coerce"
-        )
-
-        # Using last 2 years
-        # Members are required to file 60 days
-        # https://ethics.house.gov/financial-dislosure/specific-disclosure-requirements
-        stock_df = stock_df[
-            stock_df["transaction_date"].dt.date > date.today() - timedelta(days=600)
-        ]
-
-        if stock_df.empty:
-            _show_no_trades()
-        else:
-            stock_df["disclosure_date"] = pd.to_datetime(
-                stock_df["disclosure_date"], errors="coerce"
-            )
-
-            st.dataframe(
-                stock_df.sort_values(by="transaction_date", ascending=False)[
-                    [
-                        "disclosure_date",
-                        "transaction_date",
-                        "owner",
-                        "representative",
-                        "district",
-                        "state",
-                        "asset_description",
-                        "type",
-                        "amount",
-                        "party",
-                        "sector",
-                    ]
-                ].reset_index(drop=True)
-            )
+        st.dataframe(trades_df)
 
         with st.expander("Data explanation"):
             st.write(
@@ -116,55 +217,34 @@ def show_house_trades_dataframe(symbol: str) -> None:
             )
 
 
-@st.cache_data(show_spinner="Querying insider Senate trading ...")
-def show_senate_trades_dataframe(symbol: str) -> None:
-    """Use API for Senators who trade stock in a given times.
+@tracked_cache_data(ttl=REFRESH_TTL, show_spinner="Querying insider Senate trading ...")
+def get_senate_trades(symbol: str, since: date) -> pd.DataFrame:
+    """Return Senate trades of a symbol made after a date, newest first.
 
     Use https://senatestockwatcher.com for Senators who
     trade a symbol.
+
+    Args:
+        symbol: Company stock symbol.
+        since: Only trades with a later transaction date are returned.
     """
-    st.write("### US Senate trades")
+    return _filter_trades(
+        _get_transactions_senate(), symbol, since, SENATE_TRADE_COLUMNS
+    )
 
-    symbol: str = symbol.upper()
-    df = _get_ticker_transactions_senate(symbol)
 
-    stock_df: pd.DataFrame = df[df["ticker"] == symbol].reset_index(drop=True)
+def show_senate_trades_dataframe(trades_df: pd.DataFrame) -> None:
+    """Render trades of a symbol by Senators.
 
-    if stock_df.empty:
+    Args:
+        trades_df: From `get_senate_trades` since `get_trades_window_start()`.
+    """
+    st.write("### US Senate trades")
+
+    if trades_df.empty:
         _show_no_trades()
     else:
-        stock_trades_df = pd.json_normalize(
-            stock_df.transactions.iloc[0]
-        )  # Only one row per stock
-
-        stock_trades_df["transaction_date"] = pd.to_datetime(
-            stock_trades_df["transaction_date"]
-        )
-
-        # Last 2 years
-        stock_trades_df = stock_trades_df[
-            stock_trades_df["transaction_date"].dt.date
-            > date.today() - timedelta(days=600)
-        ]
-
-        if stock_trades_df.empty:
-            _show_no_trades()
-        else:
-            st.dataframe(
-                stock_trades_df.sort_values(by="transaction_date", ascending=False)[
-                    [
-                        "transaction_date",
-                        "owner",
-                        "senator",
-                        "type",
-                        "amount",
-                        "party",
-                        "sector",
-                        "asset_type",
-                        "comment",
-                    ]
-                ].reset_index(drop=True)
-            )
+        st.dataframe(trades_df)
 
         with st.expander("Data explanation"):
             st.write(
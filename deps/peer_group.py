@@ -0,0 +1,146 @@
+"""Fundamentals of a company's peer group."""
+
+from typing import NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+from deps.common.concurrency import map_bounded
+from deps.common.metrics import tracked_cache_data
+from deps.providers import get_company_info
+
+
+# Seconds to wait for all competitors before using the ones returned
+DEFAULT_PEERS_TIMEOUT_SECONDS: int = 10
+
+# Company details shown in the competitor table
+OVERVIEW_COLUMNS: list[str] = [
+    "symbol",
+    "shortName",
+    "trailingPE",
+    "recommendationKey",
+    "industry",
+    "sector",
+    "longBusinessSummary",
+    "fullTimeEmployees",
+    "totalCash",
+    "fiftyTwoWeekLow",
+    "previousClose",
+    "fiftyTwoWeekHigh",
+    "dividendYield",
+    "marketCap",
+]
+
+# Financial ratios compared in the competitor charts
+METRIC_COLUMNS: list[str] = [
+    "symbol",
+    "shortName",
+    "trailingPE",
+    "priceToSalesTrailing12Months",
+    "profitMargins",
+    "debtToEquity",
+    "totalRevenue",
+    "totalCashPerShare",
+    "operatingCashflow",
+    "totalCash",
+    "sharesShort",
+    "sharesOutstanding",
+]
+
+
+class PeerGroupMatrix(NamedTuple):
+    """Fundamentals of every company in a peer group.
+
+    Attributes:
+        overview_df: One row per company with `OVERVIEW_COLUMNS`.
+        metrics_df: Long form of `METRIC_COLUMNS` with symbol, shortName,
+            metric and value columns as used by `competitor_ratio_charts`.
+    """
+
+    overview_df: pd.DataFrame
+    metrics_df: pd.DataFrame
+
+
+class _IncompletePeerGroupError(Exception):
+    """Raised with the matrix of the peers returned when others were missing.
+
+    Raising keeps `st.cache_data` from caching the partial matrix.
+    """
+
+    def __init__(self, matrix: PeerGroupMatrix) -> None:
+        super().__init__("Peer group is missing companies")
+        self.matrix = matrix
+
+
+def get_peer_group_matrix(peers: tuple[str, ...]) -> PeerGroupMatrix:
+    """Build fundamentals of a peer group in one pass.
+
+    Companies in the same group such as GOOG, META and MSFT share one cached
+    matrix when their peer lists match. Only complete matrices are cached,
+    so a peer left out for being slow is fetched again on the next call.
+
+    Args:
+        peers: Sorted unique symbols of the group including the company.
+
+    Returns:
+        Fundamentals of peers returned within `api_config.peers_timeout_seconds`,
+        one time budget for the whole group rather than per peer. Peers that
+        fail or are too slow are left out.
+    """
+    try:
+        return _get_complete_peer_group_matrix(peers)
+    except _IncompletePeerGroupError as e:
+        return e.matrix
+
+
+@tracked_cache_data(
+    ttl="1h", max_entries=64, show_spinner="Comparing competitors ..."
+)
+def _get_complete_peer_group_matrix(peers: tuple[str, ...]) -> PeerGroupMatrix:
+    """Fundamentals of every peer. See `get_peer_group_matrix`.
+
+    Raises:
+        _IncompletePeerGroupError: A peer failed or missed the time budget.
+    """
+    all_columns: list[str] = list(dict.fromkeys(OVERVIEW_COLUMNS + METRIC_COLUMNS))
+
+    # Fields change according to the data source
+    #
+    # NOTE: Yahoo Finance API may use a different symbol such as input
+    # 'GOOG' (Class C share with no voting rights) will output 'GOOGL'
+    # (Class A share with voting rights).
+    company_infos: list[pd.DataFrame | None] = map_bounded(
+        get_company_info,
+        peers,
+        timeout=st.secrets.api_config.get(
+            "peers_timeout_seconds", DEFAULT_PEERS_TIMEOUT_SECONDS
+        ),
+    )
+    company_dfs: list[pd.DataFrame] = [
+        company_df.reindex(columns=all_columns)
+        for company_df in company_infos
+        if company_df is not None and not company_df.empty
+    ]
+    wide_df: pd.DataFrame = (
+        pd.concat(company_dfs, ignore_index=True)
+        if company_dfs
+        else pd.DataFrame(columns=all_columns)
+    )
+
+    # Ratios no company in the group reports would be empty chart rows
+    ratios_df: pd.DataFrame = wide_df[METRIC_COLUMNS].dropna(axis=1, how="all")
+    metrics_df: pd.DataFrame = pd.melt(
+        ratios_df.reindex(
+            columns=list(dict.fromkeys(["symbol", "shortName", *ratios_df.columns]))
+        ),
+        id_vars=["symbol", "shortName"],
+        var_name="metric",
+    )
+
+    matrix = PeerGroupMatrix(
+        overview_df=wide_df[OVERVIEW_COLUMNS],
+        metrics_df=metrics_df,
+    )
+    if any(company_df is None for company_df in company_infos):
+        raise _IncompletePeerGroupError(matrix)
+    return matrix
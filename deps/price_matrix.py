@@ -0,0 +1,276 @@
+"""Daily bars of every listed company as one matrix for market screens.
+
+Bars of each symbol in us_tickers.csv come from the local price store, so a
+refresh only calls Yahoo Finance for bars the store does not have yet. The
+matrix is saved as one Parquet table and held in memory with a column per
+symbol for each field. Screens over the whole market are then array
+operations on the matrix without network calls.
+
+A first refresh fetches every symbol from Yahoo Finance, one request each
+within the `yahoo` rate limit, so only the background scheduler refreshes
+the matrix. Pages never build it and get no screen until it is built and
+has the last market session.
+"""
+
+from datetime import datetime, timedelta
+import logging
+from pathlib import Path
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from deps.common.concurrency import map_bounded
+from deps.common.market_calendar import MARKET_TZ, last_market_close
+from deps.common.metrics import register_store
+from deps.common.snapshot import get_data_dir, replace_file
+from deps.github import get_static_company_data
+from deps.price_store import get_daily_history
+
+
+# 52 weeks of bars with the volume average before them
+MATRIX_DAYS: int = 400
+
+FIELDS: list[str] = ["Close", "High", "Low", "Volume"]
+
+# Calendar days of the 52 week range
+RANGE_DAYS: int = 365
+
+# Bars before the last bar averaged to find volume spikes
+VOLUME_AVERAGE_BARS: int = 20
+
+# Bars of about three months averaged for the volume shown with drops
+THREE_MONTH_BARS: int = 63
+
+# Columns of `us_tickers.csv` shown with screened symbols
+COMPANY_COLUMNS: list[str] = ["name", "type", "sector", "industry", "website"]
+
+# Matrix and screen shared by every session and the scheduler
+_matrix_df: pd.DataFrame | None = None
+_screen_df: pd.DataFrame | None = None
+_matrix_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def _get_matrices() -> list[pd.DataFrame]:
+    with _matrix_lock:
+        return [df for df in (_matrix_df, _screen_df) if df is not None]
+
+
+def _clear_matrices() -> None:
+    """Forget the matrix in memory so the next screen reads it from disk."""
+    global _matrix_df, _screen_df
+
+    with _matrix_lock:
+        _matrix_df = None
+        _screen_df = None
+
+
+# One matrix and its screen
+register_store("deps.price_matrix._matrix_df", _get_matrices, _clear_matrices, 2)
+
+
+def refresh_price_matrix() -> pd.DataFrame:
+    """Bring bars of all listed companies up to date and store them.
+
+    Returns:
+        Matrix indexed by date with a (field, symbol) column per symbol for
+        each of `FIELDS`.
+    """
+    global _matrix_df, _screen_df
+
+    start_time: float = time.monotonic()
+    history_start = datetime.now().date() - timedelta(days=MATRIX_DAYS)
+    symbols: list[str] = get_static_company_data().index.tolist()
+
+    with _refresh_lock:
+        logging.info("Refreshing price matrix of %d symbols", len(symbols))
+        histories: list[pd.DataFrame | None] = map_bounded(
+            lambda symbol: get_daily_history(symbol, history_start), symbols
+        )
+        symbol_bars: dict[str, pd.DataFrame] = {
+            symbol: history[FIELDS]
+            for symbol, history in zip(symbols, histories)
+            if history is not None and not history.empty
+        }
+        if not symbol_bars:
+            raise RuntimeError("No price history of any symbol for the price matrix")
+
+        bars_df: pd.DataFrame = pd.concat(symbol_bars, names=["symbol", "Date"])
+        _write_bars(bars_df)
+        matrix_df: pd.DataFrame = _to_matrix(bars_df)
+
+        with _matrix_lock:
+            _matrix_df = matrix_df
+            _screen_df = None
+
+    logging.info(
+        "Price matrix of %d symbols refreshed in %.1fs",
+        matrix_df["Close"].shape[1],
+        time.monotonic() - start_time,
+    )
+    return matrix_df
+
+
+def get_price_matrix() -> pd.DataFrame | None:
+    """Stored matrix of all listed companies without calling Yahoo Finance.
+
+    Returns:
+        Matrix as returned by `refresh_price_matrix`, or None if never
+        refreshed. Do not modify the returned DataFrame.
+    """
+    global _matrix_df
+
+    with _matrix_lock:
+        if _matrix_df is None and _get_path().exists():
+            _matrix_df = _to_matrix(pd.read_parquet(_get_path()))
+        return _matrix_df
+
+
+def is_current(matrix_df: pd.DataFrame) -> bool:
+    """Whether a matrix has bars of the last market session."""
+    last_close: datetime = last_market_close(datetime.now(MARKET_TZ))
+    return matrix_df.index[-1].date() >= last_close.date()
+
+
+def get_market_screen() -> pd.DataFrame | None:
+    """Latest day of every listed company, computed once per refresh.
+
+    Returns:
+        Screen as returned by `compute_market_screen`, or None if the matrix
+        was never refreshed or is not current. Do not modify the returned
+        DataFrame.
+    """
+    global _screen_df
+
+    matrix_df: pd.DataFrame | None = get_price_matrix()
+    if matrix_df is None or not is_current(matrix_df):
+        return None
+
+    static_df: pd.DataFrame = get_static_company_data()
+    with _matrix_lock:
+        # Not kept if the matrix was replaced meanwhile
+        if _matrix_df is not matrix_df:
+            return compute_market_screen(matrix_df, static_df)
+        if _screen_df is None:
+            _screen_df = compute_market_screen(matrix_df, static_df)
+        return _screen_df
+
+
+def compute_market_screen(
+    matrix_df: pd.DataFrame, static_df: pd.DataFrame
+) -> pd.DataFrame:
+    """Day change, 52 week range and volume spike of every symbol at once.
+
+    Args:
+        matrix_df: Matrix from `get_price_matrix`.
+        static_df: Company data indexed by symbol from `get_static_company_data`.
+
+    Returns:
+        One row per symbol indexed by `symbol` with price, change,
+        changesPercentage as in FinancialModelingPrep, 52WeekLow, 52WeekHigh,
+        rangePosition from 0 at the low to 1 at the high, volume,
+        averageVolume, volumeRatio, threeMonthAverageVolume and
+        `COMPANY_COLUMNS`. Prices are NaN for symbols with no bar on the last
+        day.
+    """
+    closes: pd.DataFrame = matrix_df["Close"]
+    last_date: pd.Timestamp = closes.index[-1]
+
+    price: np.ndarray = closes.iloc[-1].to_numpy()
+    # Last close before the last day, even if the symbol did not trade the day before
+    previous: np.ndarray = closes.iloc[:-1].ffill().iloc[-1].to_numpy()
+
+    in_range = closes.index > last_date - pd.Timedelta(days=RANGE_DAYS)
+    low: np.ndarray = matrix_df["Low"][in_range].min().to_numpy()
+    high: np.ndarray = matrix_df["High"][in_range].max().to_numpy()
+
+    volumes: pd.DataFrame = matrix_df["Volume"]
+    volume: np.ndarray = volumes.iloc[-1].to_numpy()
+    average_volume: np.ndarray = (
+        volumes.iloc[-VOLUME_AVERAGE_BARS - 1 : -1].mean().to_numpy()
+    )
+    three_month_volume: np.ndarray = volumes.iloc[-THREE_MONTH_BARS:].mean().to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        screen_df = pd.DataFrame(
+            {
+                "price": price,
+                "change": price - previous,
+                "changesPercentage": (price / previous - 1) * 100,
+                "52WeekLow": low,
+                "52WeekHigh": high,
+                "rangePosition": (price - low) / (high - low),
+                "volume": volume,
+                "averageVolume": average_volume,
+                "volumeRatio": volume / average_volume,
+                "threeMonthAverageVolume": three_month_volume,
+            },
+            index=pd.Index(closes.columns, name="symbol"),
+        )
+
+    return screen_df.join(static_df[COMPANY_COLUMNS])
+
+
+def screen_drops(
+    drop_percent: float,
+    sector: str = "",
+    industry: str = "",
+    min_volume_ratio: float = 0.0,
+) -> pd.DataFrame | None:
+    """Companies which fell at least a percent on the last day.
+
+    Args:
+        drop_percent: Fraction such as 0.10 for drops of 10% or more.
+        sector: Only companies in this sector if set.
+        industry: Only companies in this industry if set.
+        min_volume_ratio: Only companies trading at least this multiple of
+            their average volume.
+
+    Returns:
+        Columns of `compute_market_screen` with a `symbol` column, largest
+        drops first, or None if there is no current matrix.
+    """
+    screen_df: pd.DataFrame | None = get_market_screen()
+    if screen_df is None:
+        return None
+    return filter_drops(screen_df, drop_percent, sector, industry, min_volume_ratio)
+
+
+def filter_drops(
+    screen_df: pd.DataFrame,
+    drop_percent: float,
+    sector: str = "",
+    industry: str = "",
+    min_volume_ratio: float = 0.0,
+) -> pd.DataFrame:
+    """Rows of a market screen matching drop settings. See `screen_drops`."""
+    mask: np.ndarray = screen_df["changesPercentage"].to_numpy() <= -drop_percent * 100
+    if sector:
+        mask &= (screen_df["sector"] == sector).to_numpy()
+    if industry:
+        mask &= (screen_df["industry"] == industry).to_numpy()
+    if min_volume_ratio:
+        mask &= screen_df["volumeRatio"].to_numpy() >= min_volume_ratio
+
+    return (
+        screen_df[mask]
+        .sort_values(by="changesPercentage")
+        .reset_index()
+    )
+
+
+def _to_matrix(bars_df: pd.DataFrame) -> pd.DataFrame:
+    """Wide matrix from bars indexed by symbol and date."""
+    return bars_df.unstack("symbol").sort_index()
+
+
+def _get_path() -> Path:
+    return get_data_dir() / "price_matrix.parquet"
+
+
+def _write_bars(bars_df: pd.DataFrame) -> None:
+    """Replace the stored matrix."""
+    data_path: Path = _get_path()
+    replace_file(data_path, bars_df.to_parquet)
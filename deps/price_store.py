@@ -0,0 +1,185 @@
+"""Local store of daily price history per symbol.
+
+Bars from Yahoo Finance are kept as one Parquet file per symbol. Requests are
+served by slicing the local bars and only the missing date ranges are fetched.
+"""
+
+from datetime import date, datetime, timedelta
+import json
+import logging
+from pathlib import Path
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from deps.common import http_client
+from deps.common.metrics import track_call
+from deps.common.rate_limit import get_governor
+from deps.common.snapshot import get_data_dir, replace_file
+
+
+# Check Yahoo for new bars at most this often per symbol
+REFRESH_SECONDS: int = 60 * 60
+
+# yfinance calls share the pooled session of this host
+YAHOO_HOST: str = "query2.finance.yahoo.com"
+
+_symbol_locks: dict[str, threading.Lock] = {}
+_symbol_locks_lock = threading.Lock()
+
+# `yf.download` collects results in module state of yfinance so only one
+# download may run at a time.
+_download_lock = threading.Lock()
+
+# yfinance downloads one symbol at a time instead of on its thread pool when
+# its logger is at DEBUG, which it is whenever the root logger is.
+logging.getLogger("yfinance").setLevel(logging.INFO)
+
+
+def get_daily_history(symbol: str, start: date) -> pd.DataFrame:
+    """Return daily bars of a symbol from a start date until today.
+
+    Args:
+        symbol: Company stock symbol.
+        start: First calendar day of history.
+
+    Returns:
+        Yahoo Finance history with a `Date` index in Eastern Time. Empty if
+        Yahoo has no data for the symbol.
+    """
+    symbol = symbol.upper()
+
+    with _get_symbol_lock(symbol):
+        bars_df, meta = _read_bars(symbol)
+        fetched: list[pd.DataFrame] = []
+
+        # Older range than stored, or nothing stored yet
+        covered_from: date | None = (
+            date.fromisoformat(meta["start"]) if meta.get("start") else None
+        )
+        if covered_from is None or start < covered_from:
+            fetched.append(_fetch_bars(symbol, start, covered_from))
+            covered_from = start
+
+        # Newer bars. The last stored bar is fetched again since it may have
+        # been stored before the market closed.
+        if not bars_df.empty and time.time() - meta.get("fetched_at", 0) > REFRESH_SECONDS:
+            new_df: pd.DataFrame = _fetch_bars(symbol, bars_df.index[-1].date(), None)
+
+            # Yahoo adjusts all earlier prices after a dividend or split
+            if _has_corporate_action(new_df.iloc[1:]):
+                logging.info("Refetching %s history after dividend or split", symbol)
+                bars_df = bars_df.iloc[0:0]
+                new_df = _fetch_bars(symbol, covered_from, None)
+
+            fetched.append(new_df)
+
+        if fetched:
+            frames = [df for df in [bars_df, *fetched] if not df.empty]
+            if frames:
+                bars_df = pd.concat(frames)
+                bars_df = bars_df[~bars_df.index.duplicated(keep="last")].sort_index()
+                _write_bars(symbol, bars_df, covered_from)
+
+    if bars_df.empty:
+        return bars_df
+
+    return bars_df[bars_df.index >= pd.Timestamp(start, tz=bars_df.index.tz)]
+
+
+def _get_symbol_lock(symbol: str) -> threading.Lock:
+    """Lock so one symbol's file is updated by one thread at a time."""
+    with _symbol_locks_lock:
+        return _symbol_locks.setdefault(symbol, threading.Lock())
+
+
+def _get_paths(symbol: str) -> tuple[Path, Path]:
+    """Parquet bars and JSON metadata file of a symbol."""
+    prices_dir: Path = get_data_dir() / "prices"
+    prices_dir.mkdir(exist_ok=True)
+    return prices_dir / f"{symbol}.parquet", prices_dir / f"{symbol}.json"
+
+
+def _read_bars(symbol: str) -> tuple[pd.DataFrame, dict]:
+    """Stored bars and metadata, or empty if symbol was never fetched."""
+    data_path, meta_path = _get_paths(symbol)
+    if not (data_path.exists() and meta_path.exists()):
+        return pd.DataFrame(), {}
+
+    return pd.read_parquet(data_path), json.loads(meta_path.read_text())
+
+
+def _write_bars(symbol: str, bars_df: pd.DataFrame, covered_from: date) -> None:
+    """Replace stored bars of a symbol."""
+    data_path, meta_path = _get_paths(symbol)
+    meta: dict = {"start": covered_from.isoformat(), "fetched_at": time.time()}
+
+    replace_file(data_path, bars_df.to_parquet)
+    replace_file(meta_path, lambda path: Path(path).write_text(json.dumps(meta)))
+
+
+def _fetch_bars(symbol: str, start: date, end: date | None) -> pd.DataFrame:
+    """Call Yahoo Finance for daily bars from start up to but excluding end."""
+    logging.info("API call: Yahoo API: historic prices %s from %s", symbol, start)
+    get_governor("yahoo").acquire()
+
+    with track_call("yahoo", "history"):
+        return get_ticker(symbol).history(
+            start=start,
+            end=end or datetime.now().date() + timedelta(days=1),
+            interval="1d",
+        )
+
+
+def download_closes(symbols: list[str], start: date) -> pd.DataFrame:
+    """Daily closes of many symbols in one batched yfinance download.
+
+    Not kept in the local store since the store holds full bars per symbol.
+
+    Args:
+        symbols: Company stock symbols.
+        start: First calendar day of history.
+
+    Returns:
+        Closes adjusted for dividends and splits, indexed by date with one
+        column per symbol. Columns are NaN where Yahoo has no data.
+    """
+    logging.info("API call: Yahoo API: historic closes of %d symbols", len(symbols))
+    governor = get_governor("yahoo")
+    for _ in symbols:
+        governor.acquire()
+
+    with _download_lock, track_call("yahoo", "download"):
+        download_df: pd.DataFrame = yf.download(
+            symbols,
+            start=start,
+            end=datetime.now().date() + timedelta(days=1),
+            interval="1d",
+            auto_adjust=True,
+            progress=False,
+            session=http_client.get_session(YAHOO_HOST),
+        )
+
+    if download_df.empty:
+        return pd.DataFrame(columns=symbols, dtype="float64")
+
+    closes: pd.DataFrame | pd.Series = download_df["Close"]
+    # One symbol comes back without a symbol column level
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    return closes.reindex(columns=symbols)
+
+
+def get_ticker(symbol: str) -> yf.Ticker:
+    """yfinance Ticker sending requests through the pooled Yahoo session."""
+    return yf.Ticker(symbol, session=http_client.get_session(YAHOO_HOST))
+
+
+def _has_corporate_action(bars_df: pd.DataFrame) -> bool:
+    """Whether any bar has a dividend or stock split."""
+    return any(
+        column in bars_df.columns and bars_df[column].fillna(0).ne(0).any()
+        for column in ["Dividends", "Stock Splits"]
+    )
@@ -0,0 +1,57 @@
+"""Data source of each kind of data used by pages.
+
+Pages call the functions here rather than a provider module so the source
+can be changed in secrets without code changes.
+
+Set in `st.secrets.providers`:
+    company_info: 'yahoo' (default) or 'fmp'.
+    drops: 'fmp' (default) for FinancialModelingPrep's biggest losers, or
+        'price_matrix' to screen every listed company in the local price
+        matrix.
+"""
+
+from typing import Callable
+
+import pandas as pd
+import streamlit as st
+
+from deps.fmp import get_company_profile_fmp
+from deps.yahoo import get_company_yahoo
+
+
+# Functions returning one row of company details and ratios in Yahoo Finance
+# column names
+COMPANY_INFO_PROVIDERS: dict[str, Callable[[str], pd.DataFrame]] = {
+    "yahoo": get_company_yahoo,
+    "fmp": get_company_profile_fmp,
+}
+
+# Sources of the biggest drops of the day on the Top drops page
+DROPS_PROVIDERS: list[str] = ["fmp", "price_matrix"]
+
+
+def get_company_info(symbol: str) -> pd.DataFrame:
+    """Company details and ratios from the provider set in secrets.
+
+    Args:
+        symbol: Company stock symbol.
+
+    Returns:
+        One row DataFrame with Yahoo Finance column names such as `longName`
+        and `marketCap`. Empty if the provider has no data.
+    """
+    provider: str = st.secrets.get("providers", {}).get("company_info", "yahoo")
+    if provider not in COMPANY_INFO_PROVIDERS:
+        raise ValueError(
+            f"providers.company_info must be one of {list(COMPANY_INFO_PROVIDERS)}: "
+            + provider
+        )
+    return COMPANY_INFO_PROVIDERS[provider](symbol)
+
+
+def get_drops_provider() -> str:
+    """Source of the biggest drops set in secrets, one of `DROPS_PROVIDERS`."""
+    provider: str = st.secrets.get("providers", {}).get("drops", "fmp")
+    if provider not in DROPS_PROVIDERS:
+        raise ValueError(f"providers.drops must be one of {DROPS_PROVIDERS}: {provider}")
+    return provider
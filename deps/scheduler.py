@@ -0,0 +1,114 @@
+"""Background jobs that pre-warm data before users ask for it.
+
+Set in `st.secrets.scheduler`:
+    enabled: Start the scheduler with the app.
+    times: Times of day in Eastern Time to run on trading days.
+
+Each run also refreshes the local earnings calendar, and first the local
+price matrix when it is the source of drops.
+"""
+
+from datetime import datetime, time, timedelta
+import logging
+import threading
+import time as time_module
+
+import streamlit as st
+
+from deps.charts.charts import days_ago_input
+from deps.common.market_calendar import MARKET_TZ, next_market_time
+from deps.drops_components import MIN_DROP_PERCENT, TopDrops
+from deps.earnings_calendar import refresh_earnings_calendar
+from deps.price_matrix import refresh_price_matrix
+from deps.price_store import get_daily_history
+from deps.providers import get_drops_provider
+
+
+# After the open settles and after the close
+DEFAULT_TIMES: list[str] = ["09:45", "16:15"]
+
+# Price history shown for a symbol picked on the Top drops page
+PREWARM_HISTORY: str = "6 months"
+
+_THREAD_PREFIXES: tuple[str, ...] = ("prewarm", "provider")
+
+_started: bool = False
+_started_lock = threading.Lock()
+
+
+class _BackgroundThreadFilter(logging.Filter):
+    """Drop Streamlit warnings about scheduler threads having no session."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (
+            threading.current_thread().name.startswith(_THREAD_PREFIXES)
+            and "missing ScriptRunContext" in record.getMessage()
+        )
+
+
+def start_scheduler() -> None:
+    """Start the pre-warm thread once per process if enabled in secrets."""
+    global _started
+
+    config = st.secrets.get("scheduler", {})
+    if not config.get("enabled", False):
+        return
+
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").addFilter(
+        _BackgroundThreadFilter()
+    )
+
+    threading.Thread(
+        target=_run_scheduler,
+        args=([time.fromisoformat(t) for t in config.get("times", DEFAULT_TIMES)],),
+        name="prewarm-scheduler",
+        daemon=True,
+    ).start()
+
+
+def _run_scheduler(times: list[time]) -> None:
+    """Pre-warm now, then at each scheduled time on trading days."""
+    while True:
+        if get_drops_provider() == "price_matrix":
+            try:
+                refresh_price_matrix()
+            except Exception as e:
+                logging.error("Price matrix refresh failed: %s", e)
+
+        try:
+            prewarm_top_drops()
+        except Exception as e:
+            logging.error("Pre-warm failed: %s", e)
+
+        try:
+            refresh_earnings_calendar()
+        except Exception as e:
+            logging.error("Earnings calendar refresh failed: %s", e)
+
+        run_at: datetime = next_market_time(datetime.now(MARKET_TZ), times)
+        logging.info("Next pre-warm at %s", run_at)
+        time_module.sleep(max(0.0, (run_at - datetime.now(MARKET_TZ)).total_seconds()))
+
+
+def prewarm_top_drops() -> None:
+    """Refresh shared drops and price history of every symbol in them."""
+    start_time: float = time_module.monotonic()
+    history_start = datetime.now().date() - timedelta(
+        days=days_ago_input(PREWARM_HISTORY)
+    )
+
+    # Drops of every threshold, sector and industry
+    dataset_df = TopDrops(MIN_DROP_PERCENT).refresh()
+
+    for symbol in dataset_df.index.unique():
+        try:
+            get_daily_history(symbol, history_start)
+        except Exception as e:
+            logging.error("Pre-warm of %s history failed: %s", symbol, e)
+
+    logging.info("Pre-warm done in %.1fs", time_module.monotonic() - start_time)
@@ -3,11 +3,17 @@
 from datetime import datetime, timedelta
 import logging
 
-import streamlit as st
 import pandas as pd
-import yfinance as yf
 
+from deps.common.metrics import track_call, tracked_cache_data
+from deps.common.rate_limit import get_governor
 from deps.common.utils import dict_check
+from deps.price_store import (
+    REFRESH_SECONDS,
+    download_closes,
+    get_daily_history,
+    get_ticker,
+)
 
 
 # DONE
@@ -87,12 +93,16 @@ from deps.common.utils import dict_check
 
 
 # KEEP
-@st.cache_data(show_spinner="Querying historical prices ...")
+@tracked_cache_data(
+    ttl=REFRESH_SECONDS, max_entries=128, show_spinner="Querying historical prices ..."
+)
 def get_historic_prices(ticker_symbol: str, days_ago: int) -> pd.DataFrame:
     """Given a date range, returns historical price range.
 
-    Yahoo Finance API does not have weekends since markets are closed but the
-    `days_ago` parameter will count only market open days.
+    Yahoo Finance API does not have weekends since markets are closed so the
+    result has only market open days within the `days_ago` calendar days.
+    Bars come from the local price store which only calls Yahoo Finance for
+    dates it does not have yet.
 
     Args:
       ticker_symbol: String of ticker.
@@ -101,11 +111,9 @@ def get_historic_prices(ticker_symbol: str, days_ago: int) -> pd.DataFrame:
     Returns:
       Historical data.
     """
-    days_ago -= (days_ago // 7) * 2  # Subtract weekends
-
-    logging.info("API call: Yahoo API: historic prices")
-    df: pd.DataFrame = yf.Ticker(ticker_symbol.upper())
-    history = df.history(period=f"{days_ago}d")
+    history: pd.DataFrame = get_daily_history(
+        ticker_symbol, datetime.now().date() - timedelta(days=days_ago)
+    ).copy()
     history["DateCloseET"] = history.index  # Add non-index field
 
     history["PercentChange"] = history["Close"].pct_change()
@@ -113,6 +121,40 @@ def get_historic_prices(ticker_symbol: str, days_ago: int) -> pd.DataFrame:
     return history
 
 
+@tracked_cache_data(
+    ttl=REFRESH_SECONDS, max_entries=32, show_spinner="Querying historical prices ..."
+)
+def get_comparison_prices(symbols: tuple[str, ...], days_ago: int) -> pd.DataFrame:
+    """Daily closes of many symbols with change since the first day.
+
+    Args:
+        symbols: Company stock symbols.
+        days_ago: Range of stock history prior to today.
+
+    Returns:
+        Long form with DateCloseET, Name (symbol), Close, PercentChange from
+        the day before and ChangeSinceStart from the first close in range.
+        Symbols Yahoo has no data for are left out.
+    """
+    closes_df: pd.DataFrame = download_closes(
+        list(symbols), datetime.now().date() - timedelta(days=days_ago)
+    ).dropna(axis=1, how="all")
+
+    wide_df: pd.DataFrame = pd.concat(
+        {
+            "Close": closes_df,
+            "PercentChange": closes_df.pct_change(fill_method=None),
+            # First close of each symbol, which may be after the first date
+            "ChangeSinceStart": closes_df / closes_df.bfill().iloc[0] - 1,
+        },
+        axis=1,
+    )
+    wide_df.columns.names = [None, "Name"]
+    wide_df.index.name = "DateCloseET"
+
+    return wide_df.stack(level="Name").reset_index()
+
+
 # # NOT USED
 # @st.cache_data(show_spinner="Converting metrics data frame ...")
 # def handle_filter_metrics(ratio_df: pd.DataFrame) -> pd.DataFrame:
@@ -138,15 +180,17 @@ def get_historic_prices(ticker_symbol: str, days_ago: int) -> pd.DataFrame:
 
 
 # KEEP
-@st.cache_data(show_spinner="Querying company data ...")
+@tracked_cache_data(show_spinner="Querying company data ...")
 def get_company_yahoo(symbol: str) -> pd.DataFrame:
     """Get all financial metrics, company details, and filing info for a company."""
     result_df: pd.DataFrame = pd.DataFrame()
 
     try:
         logging.info("API call: Yahoo Finance: Company ratios")
-        ticker = yf.Ticker(symbol)
-        result_df = pd.json_normalize(ticker.info)
+        get_governor("yahoo").acquire()
+        with track_call("yahoo", "info"):
+            ticker = get_ticker(symbol)
+            result_df = pd.json_normalize(ticker.info)
         # result_df.rename(columns={"underlyingSymbol": "symbol"}, inplace=True)
     except Exception as he:
         logging.error(he)
@@ -9,19 +9,53 @@ PageConfig().get_config()
 import os
 import logging
 import streamlit as st
-from deps.common.errors import symbol_has_error
+from deps.common.concurrency import Section, show_sections
+from deps.common.errors import symbol_has_error, symbols_have_error
+from deps.common.utils import split_symbols
 from deps.charts.charts import (
     days_ago_input,
-    show_financial_metrics_competitors_chart,
+    get_competitors_matrix,
+    get_historical_chart_data,
+    show_comparison_chart,
+    show_competitors,
     show_historical_chart,
 )
-from deps.insider_watch import show_house_trades_dataframe, show_senate_trades_dataframe
+from deps.indicators import DEFAULT_INDICATORS, Indicator
+from deps.insider_watch import (
+    get_house_trades,
+    get_senate_trades,
+    get_trades_window_start,
+    show_house_trades_dataframe,
+    show_senate_trades_dataframe,
+)
+from deps.common.metrics import start_metrics_server
+from deps.scheduler import start_scheduler
 from passphrase.utils import is_auth
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 url_args = st.experimental_get_query_params()
 
+start_scheduler()
+start_metrics_server()
+
+HISTORY_OPTIONS: tuple[str, ...] = (
+    "5 days",
+    "30 days",
+    "60 days",
+    "90 days",
+    "6 months",
+    "1 year",
+    "5 years",
+    "10 years",
+)
+
+MAX_COMPARE_SYMBOLS: int = 20
+
+INDICATOR_CHOICES: dict[str, Indicator] = {
+    indicator.label: indicator for indicator in DEFAULT_INDICATORS
+}
+
 
 def main() -> None:
     with st.form(key="stock_info_form"):
@@ -32,25 +66,74 @@ def main() -> None:
 
         selection_days: str = st.selectbox(
             "Days ago price history",
-            ("5 days", "30 days", "60 days", "90 days", "6 months", "1 year"),
+            HISTORY_OPTIONS,
             index=5,  # Default selection on render
         )
 
+        indicator_labels: list[str] = st.multiselect(
+            "Indicators", list(INDICATOR_CHOICES)
+        )
+
         submit = st.form_submit_button(label="Go")
 
+    with st.expander("Compare symbols"):
+        with st.form(key="compare_form"):
+            symbols: list[str] = split_symbols(
+                st.text_input(
+                    label=f"Up to {MAX_COMPARE_SYMBOLS} stock symbols",
+                    placeholder="GOOG, MSFT, AMZN",
+                )
+            )
+            compare_error_message: str = symbols_have_error(
+                symbols, MAX_COMPARE_SYMBOLS
+            )
+
+            compare_days: str = st.selectbox(
+                "Days ago price history", HISTORY_OPTIONS, index=5
+            )
+
+            compare = st.form_submit_button(label="Compare")
+
+    if compare:
+        if compare_error_message:
+            st.error(compare_error_message)
+        else:
+            show_comparison_chart(symbols, days_ago_input(compare_days))
+
     if submit:
         if error_message:
             st.error(error_message)
         else:
-            show_historical_chart(symbol_value.upper(), days_ago_input(selection_days))
-            st.write()
-            st.write("### Competitor benchmarks")
-            st.write(
-                "If a company fundamentals outperform competitors, this would be a signal of an opportunity."
+            symbol: str = symbol_value.upper()
+            days_ago: int = days_ago_input(selection_days)
+            indicators: list[Indicator] = [
+                INDICATOR_CHOICES[label] for label in indicator_labels
+            ]
+            # Sections do not depend on each other so all are fetched at once
+            show_sections(
+                [
+                    Section(
+                        "price history",
+                        lambda: get_historical_chart_data(symbol, days_ago, indicators),
+                        lambda data: show_historical_chart(symbol, data),
+                    ),
+                    Section(
+                        "competitor benchmarks",
+                        lambda: get_competitors_matrix(symbol),
+                        lambda peer_matrix: show_competitors(symbol, peer_matrix),
+                    ),
+                    Section(
+                        "House trades",
+                        lambda: get_house_trades(symbol, get_trades_window_start()),
+                        show_house_trades_dataframe,
+                    ),
+                    Section(
+                        "Senate trades",
+                        lambda: get_senate_trades(symbol, get_trades_window_start()),
+                        show_senate_trades_dataframe,
+                    ),
+                ]
             )
-            show_financial_metrics_competitors_chart(symbol_value)
-            show_house_trades_dataframe(symbol_value)
-            show_senate_trades_dataframe(symbol_value)
 
 
 if __name__ == "__main__":
@@ -6,20 +6,39 @@ from deps.page_config import PageConfig
 PageConfig().get_config()
 
 import logging
+import pandas as pd
 import streamlit as st
+from deps.common.concurrency import Section, show_sections
 from deps.common.errors import symbol_has_error
 from deps.charts.charts import (
     days_ago_input,
-    show_financial_metrics_competitors_chart,
+    get_competitors_matrix,
+    get_historical_chart_data,
+    show_competitors,
     show_historical_chart,
 )
-from deps.drops_components import TopDrops
+from deps.drops_components import DROP_PERCENT_OPTIONS, TopDrops
+from deps.github import get_static_company_data
+from deps.common.metrics import start_metrics_server
+from deps.scheduler import start_scheduler
 from passphrase.utils import is_auth
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 
 url_args = st.experimental_get_query_params()
 
+start_scheduler()
+start_metrics_server()
+
+# Option of the sector and industry filters showing every company
+ALL_OPTION: str = "All"
+DEFAULT_SECTOR: str = "Technology"
+DEFAULT_DROP_PERCENT: float = 0.10
+
+DROP_PERCENT_CHOICES: dict[str, float] = {
+    f"{percent:.0%}": percent for percent in DROP_PERCENT_OPTIONS
+}
+
 
 def main() -> None:
     st.title("Today's top drops")
@@ -27,8 +46,40 @@ def main() -> None:
         "Find the largest shocks of the day in a market may lead to finding an undervalued stock."
     )
 
-    drops = TopDrops(0.10)
-    drops.get_drop_table(color="purple")
+    static_co_df: pd.DataFrame = get_static_company_data()
+    drop_column, sector_column, industry_column = st.columns(3)
+
+    drop_label: str = drop_column.selectbox(
+        "Drop of at least",
+        list(DROP_PERCENT_CHOICES),
+        index=DROP_PERCENT_OPTIONS.index(DEFAULT_DROP_PERCENT),
+    )
+
+    sectors: list[str] = sorted(static_co_df["sector"].dropna().unique())
+    sector: str = sector_column.selectbox(
+        "Sector",
+        [ALL_OPTION, *sectors],
+        index=sectors.index(DEFAULT_SECTOR) + 1 if DEFAULT_SECTOR in sectors else 0,
+    )
+
+    # Industries of the chosen sector
+    sector_co_df: pd.DataFrame = (
+        static_co_df
+        if sector == ALL_OPTION
+        else static_co_df[static_co_df["sector"] == sector]
+    )
+    industry: str = industry_column.selectbox(
+        "Industry",
+        [ALL_OPTION, *sorted(sector_co_df["industry"].dropna().unique())],
+    )
+
+    # Every setting is a slice of the same drops
+    drops = TopDrops(
+        DROP_PERCENT_CHOICES[drop_label],
+        sector="" if sector == ALL_OPTION else sector,
+        industry="" if industry == ALL_OPTION else industry,
+    )
+    drops.stream_drop_table(color="purple")
 
     with st.form(key="stock_drop_form"):
         symbol_value = st.text_input(
@@ -43,9 +94,22 @@ def main() -> None:
         if error_message:
             st.error(error_message)
         else:
-            show_historical_chart(symbol_value, days_ago_input("6 months"))
-            st.write("### Competitor benchmarks")
-            show_financial_metrics_competitors_chart(symbol_value)
+            show_sections(
+                [
+                    Section(
+                        "price history",
+                        lambda: get_historical_chart_data(
+                            symbol_value, days_ago_input("6 months")
+                        ),
+                        lambda data: show_historical_chart(symbol_value, data),
+                    ),
+                    Section(
+                        "competitor benchmarks",
+                        lambda: get_competitors_matrix(symbol_value),
+                        lambda peer_matrix: show_competitors(symbol_value, peer_matrix),
+                    ),
+                ]
+            )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+"""Rebuilds of the shared top drops."""
+
+import unittest
+from unittest import mock
+
+import pandas as pd
+import requests
+from streamlit.testing.v1 import AppTest
+
+from deps import drops_components
+from deps.common import http_client
+from deps.finnhub import clear_company_metrics
+from deps.fmp import get_top_losing
+
+
+def _build_drops() -> None:
+    """Page script building the shared drops where Streamlit caches values."""
+    from deps.drops_components import TopDrops
+
+    TopDrops(0.05).get_dataset()
+
+
+class DropsRebuildTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.price: float = 90.0
+        self.market_cap: float = 1000.0
+
+        static_co_df = pd.DataFrame(
+            {
+                "name": ["Acme Inc."],
+                "type": ["stock"],
+                "sector": ["Technology"],
+                "industry": ["Software"],
+                "website": ["https://acme.example"],
+            },
+            index=pd.Index(["ACME"], name="symbol"),
+        )
+        for patch in [
+            mock.patch.object(http_client, "get", side_effect=self._get),
+            mock.patch.object(
+                drops_components,
+                "get_static_company_data",
+                return_value=static_co_df,
+            ),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.addCleanup(drops_components._clear_stored_drops)
+        self.addCleanup(clear_company_metrics)
+        self.addCleanup(get_top_losing.clear)
+
+    def _get(self, url: str, endpoint: str | None = None, **kwargs) -> mock.Mock:
+        """Current provider data for the FMP losers or Finnhub metrics."""
+        response = mock.Mock(spec=requests.Response)
+        if endpoint == "stock_market/losers":
+            response.json.return_value = [
+                {
+                    "symbol": "ACME",
+                    "name": "Acme Inc.",
+                    "change": self.price - 100.0,
+                    "price": self.price,
+                    "changesPercentage": self.price - 100.0,
+                }
+            ]
+        else:
+            response.json.return_value = {
+                "metric": {
+                    "marketCapitalization": self.market_cap,
+                    "3MonthAverageTradingVolume": 1.5,
+                    "52WeekLow": 80.0,
+                    "52WeekHigh": 120.0,
+                }
+            }
+        return response
+
+    def _run_page(self) -> pd.DataFrame:
+        app = AppTest.from_function(_build_drops, default_timeout=30)
+        app.secrets["api_config"] = {"max_workers": 2}
+        app.secrets["providers"] = {"drops": "fmp"}
+        app.run()
+        self.assertFalse(app.exception)
+        return drops_components._get_current_drops("fmp")
+
+    def test_rebuild_of_aged_drops_shows_new_provider_data(self) -> None:
+        df: pd.DataFrame = self._run_page()
+        self.assertEqual(df.loc["ACME", "price"], 90.0)
+        self.assertEqual(df.loc["ACME", "marketCap"], 1000.0)
+        self.assertEqual(df.loc["ACME", "threeMonthAverageVolume"], 1.5e6)
+
+        # Age the stored drops past `DROPS_TTL` as the providers move on
+        with drops_components._drops_store_lock:
+            stored = drops_components._drops_store["fmp"]
+            drops_components._drops_store["fmp"] = stored._replace(
+                built_at=stored.built_at - drops_components.DROPS_TTL * 2
+            )
+        self.price = 85.0
+        self.market_cap = 900.0
+
+        df = self._run_page()
+        self.assertEqual(df.loc["ACME", "price"], 85.0)
+        self.assertEqual(df.loc["ACME", "marketCap"], 900.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
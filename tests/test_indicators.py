@@ -0,0 +1,62 @@
+"""Technical indicators updated with new bars."""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from deps.indicators import DEFAULT_INDICATORS, clear_indicators, compute_indicators
+
+
+def _closes(bars: int, symbols: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0, 0.02, (bars, symbols)), axis=0)),
+        index=pd.bdate_range(end="2024-01-02", periods=bars, tz="America/New_York"),
+        columns=[f"S{column}" for column in range(symbols)],
+    )
+
+
+class IndicatorUpdateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_indicators()
+        self.addCleanup(clear_indicators)
+
+    def test_new_bars_match_full_computation(self) -> None:
+        closes_df: pd.DataFrame = _closes(1_000, 3)
+        # A symbol without bars for a few days
+        closes_df.iloc[700:705, 1] = np.nan
+
+        for bars in [800, 801, 850, 1_000]:
+            updated = compute_indicators(closes_df.iloc[:bars], DEFAULT_INDICATORS)
+        clear_indicators()
+        computed = compute_indicators(closes_df, DEFAULT_INDICATORS)
+
+        for indicator in DEFAULT_INDICATORS:
+            np.testing.assert_allclose(
+                updated[indicator].to_numpy(),
+                computed[indicator].to_numpy(),
+                rtol=1e-9,
+                err_msg=indicator.label,
+            )
+
+    def test_changed_close_computes_again(self) -> None:
+        closes_df: pd.DataFrame = _closes(600, 1)
+        compute_indicators(closes_df.iloc[:-1], DEFAULT_INDICATORS)
+
+        # Dividend adjusted history
+        adjusted_df: pd.DataFrame = closes_df * 0.98
+        updated = compute_indicators(adjusted_df, DEFAULT_INDICATORS)
+        clear_indicators()
+        computed = compute_indicators(adjusted_df, DEFAULT_INDICATORS)
+
+        for indicator in DEFAULT_INDICATORS:
+            np.testing.assert_allclose(
+                updated[indicator].to_numpy(),
+                computed[indicator].to_numpy(),
+                err_msg=indicator.label,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
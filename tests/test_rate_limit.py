@@ -0,0 +1,65 @@
+"""Adaptive rate limiting of provider requests."""
+
+import unittest
+from unittest import mock
+
+import requests
+from requests.adapters import BaseAdapter
+import streamlit as st
+from streamlit.runtime.secrets import AttrDict
+
+from deps.common import http_client, rate_limit
+from deps.price_store import YAHOO_HOST
+
+
+class _TooManyRequestsAdapter(BaseAdapter):
+    """Answers every request with 429 Too Many Requests."""
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 429
+        response.headers["Retry-After"] = "0"
+        response._content = b""
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class YahooRateLimitTest(unittest.TestCase):
+    def setUp(self) -> None:
+        for patch in [
+            mock.patch.object(
+                st,
+                "secrets",
+                AttrDict({"api_config": {"rate_limits": {"yahoo": 120}}}),
+            ),
+            mock.patch.dict(http_client._sessions, clear=True),
+            mock.patch.dict(rate_limit._governors, clear=True),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_429_through_yahoo_session_slows_yahoo_bucket(self) -> None:
+        session = http_client.get_session(YAHOO_HOST)
+        session.mount("https://", _TooManyRequestsAdapter())
+
+        # As yfinance sends requests through the session it is given
+        session.get("https://query1.finance.yahoo.com/v8/finance/chart/AAPL")
+
+        stats: dict = rate_limit.get_governor("yahoo").stats()
+        self.assertEqual(stats["throttledCount"], 1)
+        self.assertEqual(stats["requestsPerMinute"], 60.0)
+
+    def test_yahoo_hosts_have_yahoo_governor(self) -> None:
+        for host in ["query1.finance.yahoo.com", "query2.finance.yahoo.com"]:
+            self.assertIs(
+                rate_limit.get_governor_for_host(host),
+                rate_limit.get_governor("yahoo"),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()